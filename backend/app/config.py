@@ -24,6 +24,11 @@ class Settings(BaseSettings):
     aws_secret_access_key: str
     aws_bedrock_model_id: str = "anthropic.claude-3-sonnet-20240229-v1:0"
     aws_bedrock_embedding_model_id: str = "amazon.titan-embed-text-v1"
+    embedding_max_concurrency: int = 8
+    embedding_requests_per_second: float = 20.0  # per process; backs off further when throttled
+    embedding_cache_dir: Optional[str] = "data/embedding_cache"  # relative to the backend directory; empty disables
+    embedding_cache_max_bytes: int = 512 * 1024 * 1024
+    embedding_query_cache_size: int = 1024  # query embeddings kept in memory, in front of the disk cache
     
     # Database
     database_url: str
@@ -33,6 +38,9 @@ class Settings(BaseSettings):
     opensearch_url: str = "https://localhost:9200"
     opensearch_username: str = "admin"
     opensearch_password: str = "admin"
+    vector_index_path: str = "data/vectors"  # relative to the backend directory
+    vector_nprobe: int = 8  # IVF lists probed per query: higher is more accurate, slower
+    vector_quantization: str = "int8"  # codes scanned per probe: int8 or float16
     
     # Authentication
     secret_key: str
@@ -60,9 +68,12 @@ class Settings(BaseSettings):
     
     # Performance
     max_workers: int = 4
+    extraction_queue_depth: Optional[int] = None  # defaults to 2x max_workers
     chunk_size: int = 1000
     chunk_overlap: int = 150
+    content_defined_chunking: bool = True
     max_chunks_per_query: int = 20
+    page_archive_max_bytes: Optional[int] = 4 * 1024 * 1024 * 1024  # oldest archive segments are dropped beyond this
     
     class Config:
         env_file = ".env"
@@ -1,17 +1,22 @@
 from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 import asyncio
+import contextlib
 import json
+import time
 
 from app.config import get_settings
 from app.services.llm import get_llm, get_embeddings
 from app.services.search import SearchService
 from app.services.auth import verify_token, get_current_user
-from app.models.schemas import SearchRequest, SearchResponse, ChatRequest, ChatResponse
+from app.models.schemas import SearchRequest, SearchResponse, ChatRequest, ChatResponse, IngestionJob
 from app.services.rag import RAGService
 from app.services.public_sources import public_sources_manager
+from app.services.search_stream import STREAM_HEADERS, STREAM_MEDIA_TYPES, stream_search
+from app.services.web_scraper import web_scraper, cleanup_scraper
 
 settings = get_settings()
 app = FastAPI(
@@ -35,24 +40,61 @@ security = HTTPBearer()
 # Initialize services
 search_service = None
 rag_service = None
+index_refresh_task = None
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    global search_service, rag_service
+    global search_service, rag_service, index_refresh_task
     
     # Initialize LLM and embeddings
     llm = get_llm()
     embeddings = get_embeddings()
     
     # Initialize services
-    search_service = SearchService(embeddings=embeddings)
+    search_service = SearchService(
+        embeddings=embeddings,
+        index_path=settings.vector_index_path,
+        nprobe=settings.vector_nprobe,
+        vector_quantization=settings.vector_quantization,
+        max_chunks_per_query=settings.max_chunks_per_query,
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        content_defined_chunking=settings.content_defined_chunking
+    )
     rag_service = RAGService(llm=llm, embeddings=embeddings)
     
+    # Parse crawled pages in worker processes so extraction never blocks request handling
+    web_scraper.start_extraction_pool(
+        max_workers=settings.max_workers,
+        max_queue_depth=settings.extraction_queue_depth
+    )
+    
+    if web_scraper.page_archive:
+        await asyncio.to_thread(web_scraper.page_archive.set_max_total_bytes, settings.page_archive_max_bytes)
+    
+    # Keep the public sources index fresh in the background; queries never wait on crawls
+    index_refresh_task = asyncio.create_task(public_sources_manager.run_index_refresher())
+    
     print(f"🚀 {settings.app_name} started successfully with AWS Bedrock integration")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background crawling, persist the indexes and release network resources"""
+    if index_refresh_task:
+        index_refresh_task.cancel()
+        # Let an in-flight crawl unwind before its documents are saved
+        with contextlib.suppress(asyncio.CancelledError):
+            await index_refresh_task
+    if search_service:
+        await asyncio.to_thread(search_service.save)
+    # Also holds pages added by live fallback searches since the last crawl
+    await asyncio.to_thread(public_sources_manager.index.save)
+    await cleanup_scraper()
+
+
 @app.get("/auth/me")
 async def get_current_user_info(
     current_user: Dict = Depends(get_current_user)
@@ -189,16 +231,19 @@ async def search_get(
     q: str = Query(..., description="Search query"),
     sources: str = Query(default="docs", description="Comma-separated sources"),
     top_k: int = Query(default=10, description="Number of results"),
-    authenticated: bool = Query(default=False, description="Is user authenticated")
+    authenticated: bool = Query(default=False, description="Is user authenticated"),
+    deadline_ms: Optional[int] = Query(default=None, ge=1, description="Latency budget; slower sources return partial results")
 ):
     """Main search endpoint (GET) - supports unauthenticated access"""
     try:
+        started = time.perf_counter()
         # Parse sources
         source_list = [s.strip() for s in sources.split(',')]
         
         # For unauthenticated users, only search public sources
         if not authenticated:
-            results = public_sources_manager.search_public_sources(q)
+            search = await public_sources_manager.search_with_deadline(q, deadline_ms)
+            results = search.results
             
             # Limit results
             results = results[:top_k]
@@ -230,7 +275,9 @@ async def search_get(
                     "source": ["docs"],
                     "time": ["any", "past_year", "past_month", "past_week"]
                 },
-                "execution_time_ms": 45
+                "execution_time_ms": round((time.perf_counter() - started) * 1000),
+                "partial": bool(search.incomplete_sources),
+                "incomplete_sources": search.incomplete_sources
             }
         
         # For authenticated users, use regular search
@@ -282,6 +329,21 @@ async def search_get(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/search/stream")
+async def search_stream(
+    q: str = Query(..., description="Search query"),
+    top_k: int = Query(default=10, description="Number of results in the final frame"),
+    deadline_ms: Optional[int] = Query(default=None, ge=1, description="Latency budget; slower sources return partial results"),
+    framing: Literal["sse", "ndjson"] = Query(default="sse", alias="format", description="sse or ndjson")
+):
+    """Streaming public search: a frame per source as soon as it is scored, then a final merged frame"""
+    return StreamingResponse(
+        stream_search(public_sources_manager, q, framing, top_k=top_k, deadline_ms=deadline_ms),
+        media_type=STREAM_MEDIA_TYPES[framing],
+        headers=STREAM_HEADERS
+    )
+
+
 @app.post("/search", response_model=SearchResponse)
 async def search(
     request: SearchRequest,
@@ -294,7 +356,9 @@ async def search(
             query=request.query,
             sources=request.sources,
             top_k=request.top_k,
-            user_permissions=current_user.get("groups", [])
+            user_permissions=current_user.get("groups", []),
+            lexical_weight=request.lexical_weight,
+            vector_weight=request.vector_weight
         )
         
         # Generate AI summary if requested
@@ -385,13 +449,28 @@ async def trigger_ingestion(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        # Trigger ingestion job
-        job_id = await search_service.trigger_ingestion(sources)
+        # Re-index archived pages of the sources; crawls keep the archive current
+        job_id = await search_service.trigger_ingestion(sources, public_sources_manager.iter_archived_documents)
         return {"job_id": job_id, "status": "started"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/ingest/{job_id}", response_model=IngestionJob)
+async def get_ingestion_job(
+    job_id: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Status of an ingestion job (admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    job = search_service.get_ingestion_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+
 @app.get("/admin/stats")
 async def get_admin_stats(
     current_user: Dict = Depends(get_current_user)
@@ -402,6 +481,8 @@ async def get_admin_stats(
     
     try:
         stats = await search_service.get_stats()
+        stats["upstream_hosts"] = web_scraper.host_health.snapshot()
+        stats["embeddings"] = search_service.embeddings.embedder.stats()
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
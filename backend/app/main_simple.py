@@ -1,8 +1,12 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Dict, Any, Tuple
+import asyncio
+import contextlib
 import json
 import os
+import time
 
 # Simple config for development
 class Settings:
@@ -15,6 +19,7 @@ class Settings:
     creator_github = "https://github.com/vaibhavnagre"
     creator_linkedin = "https://linkedin.com/in/vaibhavnagre"
     allowed_origins = ["http://localhost:3000", "http://localhost:3001", "http://localhost:3002"]
+    max_workers = 4
 
 settings = Settings()
 
@@ -55,18 +60,25 @@ def load_public_sources():
         return {"public_sources": [], "categories": {}, "search_config": {}}
 
 # Search function
-async def search_public_sources(query: str, sources_config: Dict) -> List[Dict[str, Any]]:
-    """Real search function that scrapes actual websites"""
+async def search_public_sources(
+    query: str,
+    sources_config: Dict,
+    deadline_ms: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Search public sources from the local index (crawled in the background).
+    
+    Returns the results and the ids of sources that missed the deadline.
+    """
     from app.services.public_sources import public_sources_manager
     
     try:
         # Use the async search implementation directly
-        results = await public_sources_manager.search_public_sources(query, max_results=10)
-        return results
+        search = await public_sources_manager.search_with_deadline(query, deadline_ms, max_results=10)
+        return search.results, search.incomplete_sources
     except Exception as e:
         print(f"Error in real search: {e}")
         # Fallback to mock results if real search fails
-        return mock_search_fallback(query, sources_config)
+        return mock_search_fallback(query, sources_config), []
 
 def mock_search_fallback(query: str, sources_config: Dict) -> List[Dict[str, Any]]:
     """Fallback mock search function"""
@@ -116,6 +128,33 @@ def mock_search_fallback(query: str, sources_config: Dict) -> List[Dict[str, Any
     results.sort(key=lambda x: x.get("score", 0), reverse=True)
     return results[:20]  # Return top 20 results
 
+index_refresh_task = None
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the extraction pool and the background crawler that keeps the public sources index fresh"""
+    global index_refresh_task
+    from app.services.public_sources import public_sources_manager
+    from app.services.web_scraper import web_scraper
+    
+    web_scraper.start_extraction_pool(max_workers=settings.max_workers)
+    index_refresh_task = asyncio.create_task(public_sources_manager.run_index_refresher())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background crawling, persist the public sources index and release network resources"""
+    from app.services.public_sources import public_sources_manager
+    from app.services.web_scraper import cleanup_scraper
+    
+    if index_refresh_task:
+        index_refresh_task.cancel()
+        # Let an in-flight crawl unwind before its documents are saved
+        with contextlib.suppress(asyncio.CancelledError):
+            await index_refresh_task
+    # Also holds pages added by live fallback searches since the last crawl
+    await asyncio.to_thread(public_sources_manager.index.save)
+    await cleanup_scraper()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -156,16 +195,18 @@ async def search_public(
     q: str = Query(..., description="Search query"),
     sources: str = Query(default="", description="Comma-separated source IDs"),
     top_k: int = Query(default=10, description="Number of results"),
-    authenticated: bool = Query(default=False, description="Is user authenticated")
+    authenticated: bool = Query(default=False, description="Is user authenticated"),
+    deadline_ms: Optional[int] = Query(default=None, ge=1, description="Latency budget; slower sources return partial results")
 ):
     """Public search endpoint - no authentication required"""
     try:
+        started = time.perf_counter()
         # Load sources configuration
         sources_config = load_public_sources()
         
         # For unauthenticated users, only search public sources
         if not authenticated:
-            results = await search_public_sources(q, sources_config)
+            results, incomplete_sources = await search_public_sources(q, sources_config, deadline_ms)
             
             # Limit results
             results = results[:top_k]
@@ -197,12 +238,14 @@ async def search_public(
                     "source": ["docs"],
                     "time": ["any", "past_year", "past_month", "past_week"]
                 },
-                "execution_time_ms": 45,
-                "sources_searched": len(sources_config.get("public_sources", []))
+                "execution_time_ms": round((time.perf_counter() - started) * 1000),
+                "sources_searched": len(sources_config.get("public_sources", [])),
+                "partial": bool(incomplete_sources),
+                "incomplete_sources": incomplete_sources
             }
         
         # For authenticated users, return enhanced results (mock)
-        results = await search_public_sources(q, sources_config)
+        results, incomplete_sources = await search_public_sources(q, sources_config, deadline_ms)
         
         return {
             "query": q,
@@ -215,13 +258,32 @@ async def search_public(
                 "source": ["docs", "forums", "tickets"],
                 "time": ["any", "past_year", "past_month", "past_week"]
             },
-            "execution_time_ms": 45,
-            "sources_searched": len(sources_config.get("public_sources", []))
+            "execution_time_ms": round((time.perf_counter() - started) * 1000),
+            "sources_searched": len(sources_config.get("public_sources", [])),
+            "partial": bool(incomplete_sources),
+            "incomplete_sources": incomplete_sources
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/search/stream")
+async def search_stream(
+    q: str = Query(..., description="Search query"),
+    top_k: int = Query(default=10, description="Number of results in the final frame"),
+    deadline_ms: Optional[int] = Query(default=None, ge=1, description="Latency budget; slower sources return partial results"),
+    framing: Literal["sse", "ndjson"] = Query(default="sse", alias="format", description="sse or ndjson")
+):
+    """Streaming public search: a frame per source as soon as it is scored, then a final merged frame"""
+    from app.services.public_sources import public_sources_manager
+    from app.services.search_stream import STREAM_HEADERS, STREAM_MEDIA_TYPES, stream_search
+    
+    return StreamingResponse(
+        stream_search(public_sources_manager, q, framing, top_k=top_k, deadline_ms=deadline_ms),
+        media_type=STREAM_MEDIA_TYPES[framing],
+        headers=STREAM_HEADERS
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
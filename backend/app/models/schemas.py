@@ -9,6 +9,8 @@ class SearchRequest(BaseModel):
     top_k: int = Field(default=10, description="Number of results to return")
     include_ai_summary: bool = Field(default=True, description="Include AI-generated summary")
     filters: Optional[Dict[str, Any]] = Field(default=None, description="Additional filters")
+    lexical_weight: float = Field(default=1.0, ge=0, description="Weight of keyword (BM25) matches in the fused ranking; 0 disables them")
+    vector_weight: float = Field(default=1.0, ge=0, description="Weight of semantic (vector) matches in the fused ranking; 0 disables them")
 
 
 class Citation(BaseModel):
@@ -0,0 +1,112 @@
+import re
+import unicodedata
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+# Runs of letters/digits, optionally joined by ``-``, ``_`` or ``.`` into identifiers
+# such as ``SAV-1234``, ``max_depth`` or ``asyncio.gather``
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_.][^\W_]+)*")
+IDENTIFIER_DELIMITERS = re.compile(r"[-_.]")
+# camelCase / PascalCase boundaries: ``getUserID`` -> get, User, ID; ``HTTPServer`` -> HTTP, Server
+CAMEL_CASE_PARTS = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+DEFAULT_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i if in into is it its of on or
+that the their then there these they this to was were what when where which who will with
+""".split())
+
+
+def s_stem(token: str) -> str:
+    """Harman's S-stemmer: conflate English plurals and nothing else"""
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    return token
+
+
+class Analyzer:
+    """Text analysis chain shared by indexing and querying.
+
+    Text is Unicode-normalized (NFKC), split into tokens, case-folded,
+    stopword-filtered and lightly stemmed. Identifiers are kept whole and
+    also split into their parts, so ``SAV-1234`` yields ``sav-1234``,
+    ``sav`` and ``1234``, and ``getUserName`` yields ``getusername``,
+    ``get``, ``user`` and ``name``. Documents and queries must go through
+    the same analyzer for their terms to meet; ``config`` describes it so an
+    index can tell when its stored terms were produced by a different one.
+    """
+
+    def __init__(
+        self,
+        normalization: Optional[str] = "NFKC",
+        split_identifiers: bool = True,
+        stopwords: Iterable[str] = DEFAULT_STOPWORDS,
+        stemming: bool = True
+    ):
+        self.normalization = normalization
+        self.split_identifiers = split_identifiers
+        self.stopwords: FrozenSet[str] = frozenset(stopwords)
+        self.stemming = stemming
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Analyzer":
+        """Build an analyzer from a ``search_config.index.analyzer`` section"""
+        stopwords = config.get("stopwords", True)
+        if stopwords is True:
+            stopwords = DEFAULT_STOPWORDS
+        elif not stopwords:
+            stopwords = ()
+        return cls(
+            normalization=config.get("normalization", "NFKC"),
+            split_identifiers=config.get("split_identifiers", True),
+            stopwords=stopwords,
+            stemming=config.get("stemming", True)
+        )
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {
+            "normalization": self.normalization,
+            "split_identifiers": self.split_identifiers,
+            "stopwords": sorted(self.stopwords),
+            "stemming": self.stemming,
+        }
+
+    def _split(self, token: str) -> List[str]:
+        parts = []
+        for piece in IDENTIFIER_DELIMITERS.split(token):
+            parts.extend(CAMEL_CASE_PARTS.findall(piece) or [piece])
+        return parts
+
+    def analyze(self, text: str) -> List[str]:
+        """Terms for a piece of text, in order"""
+        if not text:
+            return []
+        if self.normalization:
+            text = unicodedata.normalize(self.normalization, text)
+
+        terms = []
+        stopwords, stemming = self.stopwords, self.stemming
+        for token in TOKEN_PATTERN.findall(text):
+            folded = token.casefold()
+            if folded not in stopwords:
+                terms.append(s_stem(folded) if stemming else folded)
+            # Plain words (lower, Capitalized or UPPER letters only) have nothing to split
+            if not self.split_identifiers or (token.isalpha() and (token[1:].islower() or token.isupper())):
+                continue
+            parts = self._split(token)
+            if len(parts) < 2:
+                continue
+            for part in parts:
+                part = part.casefold()
+                if part not in stopwords:
+                    terms.append(s_stem(part) if stemming else part)
+        return terms
+
+
+# Default analyzer for callers without index configuration (e.g. ranking live results)
+default_analyzer = Analyzer()
@@ -0,0 +1,217 @@
+import json
+from typing import Any, Dict, Hashable, Iterable, Iterator, Mapping, MutableMapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .vector_store import StringColumn, open_store, write_store
+
+CHUNK_STORE_FORMAT_VERSION = 1
+
+
+class StoredChunks(Mapping[str, Dict[str, Any]]):
+    """Chunk metadata mapped from a chunk store; each lookup decodes one row.
+
+    Rows are in chunk id order. Text is a string column and positions an
+    ``(n, 3)`` array of chunk index, start and end character.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.keys = StringColumn(columns["chunk_key_offsets"], columns["chunk_key_data"])
+        self.texts = StringColumn(columns["text_offsets"], columns["text_data"])
+        self.doc_rows = columns["chunk_doc_rows"]
+        self.positions = columns["positions"]
+        self.doc_keys = StringColumn(columns["doc_key_offsets"], columns["doc_key_data"])
+
+    def _row(self, row: int) -> Dict[str, Any]:
+        chunk_index, start_char, end_char = self.positions[row].tolist()
+        return {
+            "doc_id": self.doc_keys[int(self.doc_rows[row])],
+            "content": self.texts[row],
+            "chunk_index": chunk_index,
+            "start_char": start_char,
+            "end_char": end_char,
+        }
+
+    def __getitem__(self, chunk_id: str) -> Dict[str, Any]:
+        row = self.keys.find(chunk_id) if isinstance(chunk_id, str) else None
+        if row is None:
+            raise KeyError(chunk_id)
+        return self._row(row)
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return isinstance(chunk_id, str) and self.keys.find(chunk_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys.to_list())
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """All chunks in row order, decoding each column once"""
+        doc_keys = self.doc_keys.to_list()
+        for chunk_id, content, doc_row, (chunk_index, start_char, end_char) in zip(
+            self.keys.to_list(), self.texts.to_list(), self.doc_rows.tolist(), self.positions.tolist()
+        ):
+            yield chunk_id, {
+                "doc_id": doc_keys[doc_row],
+                "content": content,
+                "chunk_index": chunk_index,
+                "start_char": start_char,
+                "end_char": end_char,
+            }
+
+
+class StoredDocuments(Mapping[str, Dict[str, Any]]):
+    """Document metadata mapped from a chunk store.
+
+    Fields other than the chunk ids are one JSON string per document; the
+    chunk ids are rows into the chunk columns, in document order.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], chunk_keys: StringColumn):
+        self.keys = StringColumn(columns["doc_key_offsets"], columns["doc_key_data"])
+        self.fields = StringColumn(columns["doc_field_offsets"], columns["doc_field_data"])
+        self.chunk_offsets = columns["doc_chunk_offsets"]
+        self.chunk_rows = columns["doc_chunk_rows"]
+        self.chunk_keys = chunk_keys
+
+    def _row(self, row: int, fields: str) -> Dict[str, Any]:
+        start, end = int(self.chunk_offsets[row]), int(self.chunk_offsets[row + 1])
+        document = json.loads(fields)
+        document["chunk_ids"] = [self.chunk_keys[chunk_row] for chunk_row in self.chunk_rows[start:end].tolist()]
+        return document
+
+    def __getitem__(self, doc_id: str) -> Dict[str, Any]:
+        row = self.keys.find(doc_id) if isinstance(doc_id, str) else None
+        if row is None:
+            raise KeyError(doc_id)
+        return self._row(row, self.fields[row])
+
+    def __contains__(self, doc_id: object) -> bool:
+        return isinstance(doc_id, str) and self.keys.find(doc_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys.to_list())
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for row, (doc_id, fields) in enumerate(zip(self.keys.to_list(), self.fields.to_list())):
+            yield doc_id, self._row(row, fields)
+
+
+class LayeredDict(MutableMapping):
+    """A dict of changes over a read-only base mapping.
+
+    Opening a store wraps its mappings in these, so only entries changed
+    since the last save are held in memory. Values read from the base are
+    fresh copies: store a changed value back rather than mutating it.
+    """
+
+    def __init__(self, base: Optional[Mapping] = None, changes: Optional[Dict] = None):
+        self.base: Mapping = base if base is not None else {}
+        self.changes: Dict = dict(changes or {})
+        # Base keys that were deleted
+        self.removed: Set[Hashable] = set()
+        self._count = len(self.base) + sum(1 for key in self.changes if key not in self.base)
+
+    def __getitem__(self, key):
+        if key in self.changes:
+            return self.changes[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.changes or (key not in self.removed and key in self.base)
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._count += 1
+        self.changes[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.changes.pop(key, None)
+        if key in self.base:
+            self.removed.add(key)
+        self._count -= 1
+
+    def __iter__(self) -> Iterator:
+        for key in self.base:
+            if key not in self.removed and key not in self.changes:
+                yield key
+        yield from self.changes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """All entries, reading the base sequentially rather than key by key"""
+        for key, value in self.base.items():
+            if key not in self.removed and key not in self.changes:
+                yield key, value
+        yield from self.changes.items()
+
+
+def write_chunk_store(
+    path: str,
+    chunks: Iterable[Tuple[str, Dict[str, Any]]],
+    documents: Iterable[Tuple[str, Dict[str, Any]]],
+    header: Dict[str, Any]
+):
+    """Write chunk and document metadata as a columnar store, atomically.
+
+    Chunks whose document is missing, and chunk ids a document lists but
+    that are missing, are left out.
+    """
+    documents = sorted(documents, key=lambda item: item[0])
+    doc_rows = {doc_id: row for row, (doc_id, _) in enumerate(documents)}
+    chunks = sorted((item for item in chunks if item[1]["doc_id"] in doc_rows), key=lambda item: item[0])
+    chunk_rows = {chunk_id: row for row, (chunk_id, _) in enumerate(chunks)}
+
+    positions = np.array(
+        [(chunk["chunk_index"], chunk["start_char"], chunk["end_char"]) for _, chunk in chunks], dtype=np.int64
+    ).reshape(-1, 3)
+    doc_chunks = [
+        [chunk_rows[chunk_id] for chunk_id in document["chunk_ids"] if chunk_id in chunk_rows]
+        for _, document in documents
+    ]
+    doc_chunk_offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+    np.cumsum([len(rows) for rows in doc_chunks], out=doc_chunk_offsets[1:])
+    fields = [
+        json.dumps({name: value for name, value in document.items() if name != "chunk_ids"},
+                   separators=(",", ":"), default=str)
+        for _, document in documents
+    ]
+
+    chunk_key_offsets, chunk_key_data = StringColumn.encode([chunk_id for chunk_id, _ in chunks])
+    text_offsets, text_data = StringColumn.encode([chunk["content"] for _, chunk in chunks])
+    doc_key_offsets, doc_key_data = StringColumn.encode([doc_id for doc_id, _ in documents])
+    doc_field_offsets, doc_field_data = StringColumn.encode(fields)
+    write_store(path, {
+        "chunk_key_offsets": chunk_key_offsets,
+        "chunk_key_data": chunk_key_data,
+        "text_offsets": text_offsets,
+        "text_data": text_data,
+        "chunk_doc_rows": np.array([doc_rows[chunk["doc_id"]] for _, chunk in chunks], dtype=np.int64),
+        "positions": positions,
+        "doc_key_offsets": doc_key_offsets,
+        "doc_key_data": doc_key_data,
+        "doc_field_offsets": doc_field_offsets,
+        "doc_field_data": doc_field_data,
+        "doc_chunk_offsets": doc_chunk_offsets,
+        "doc_chunk_rows": np.array([row for rows in doc_chunks for row in rows], dtype=np.int64),
+    }, dict(header, version=CHUNK_STORE_FORMAT_VERSION, chunks=len(chunks), documents=len(documents)))
+
+
+def open_chunk_store(path: str) -> Tuple[Dict[str, Any], StoredChunks, StoredDocuments]:
+    """Map a file written by ``write_chunk_store``; returns its header and chunk and document views"""
+    header, columns = open_store(path)
+    if header.get("version") != CHUNK_STORE_FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported chunk store version {header.get('version')}")
+    chunks = StoredChunks(columns)
+    return header, chunks, StoredDocuments(columns, chunks.keys)
@@ -0,0 +1,230 @@
+import hashlib
+import re
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.models.schemas import Document, DocumentChunk
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 150
+# A chunk is only cut at a boundary once it is at least this full
+MIN_CHUNK_FILL = 0.5
+# Characters pulled from a streaming source per read
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+# Cut points, best first; each match ends where the next chunk may start
+HEADING_BREAK = re.compile(r"\n+(?=#{1,6}\s)")
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_BREAK = re.compile(r"[.!?][\"')\]]*\s+")
+WORD_BREAK = re.compile(r"\s+")
+BOUNDARIES = (HEADING_BREAK, PARAGRAPH_BREAK, SENTENCE_BREAK, WORD_BREAK)
+NON_SPACE = re.compile(r"\S")
+
+# Content-defined cuts are only taken at natural breaks: headings, paragraphs and sentences
+NATURAL_BREAK = re.compile(f"{HEADING_BREAK.pattern}|{PARAGRAPH_BREAK.pattern}|{SENTENCE_BREAK.pattern}")
+HEADING_START = re.compile(r"#{1,6}\s")
+# Characters before a break that decide whether it is a cut point
+HASH_WINDOW = 32
+# A content-defined chunk holds at least this fraction of chunk_size beyond its overlap, and
+# cuts at the strongest break after that: chunks average ~0.8 x chunk_size, about as long as
+# fixed ones, so switching modes doesn't inflate embedding calls and index size
+CONTENT_DEFINED_MIN_FILL = 0.45
+
+TextSource = Union[str, IO[str], Iterable[str]]
+
+
+def iter_text(source: TextSource, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[str]:
+    """Text as a stream of pieces: a string as-is, a file in ``block_size`` reads, or any iterable of strings"""
+    if isinstance(source, str):
+        yield source
+    elif hasattr(source, "read"):
+        while True:
+            block = source.read(block_size)
+            if not block:
+                return
+            yield block
+    else:
+        yield from source
+
+
+def _last_boundary(buffer: str, start: int, end: int) -> Tuple[int, bool]:
+    """Best cut point in ``buffer[start:end]`` and whether it is a heading break"""
+    for pattern in BOUNDARIES:
+        cut = None
+        for match in pattern.finditer(buffer, start, end):
+            cut = match.end()
+        if cut is not None:
+            return cut, pattern is HEADING_BREAK
+    return end, False
+
+
+def _window_hash(window: str) -> float:
+    """Hash of the text just before a break, as a fraction in [0, 1)"""
+    digest = hashlib.blake2b(window.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / 2 ** 64
+
+
+def _content_defined_boundary(
+    buffer: str,
+    start: int,
+    end: int,
+    min_size: int
+) -> Optional[Tuple[int, bool]]:
+    """Strongest natural break in ``buffer[start:end]`` at least ``min_size`` in, and whether it is a heading.
+
+    The first heading always cuts. Otherwise a paragraph break beats a
+    sentence break, and among breaks of the same kind the one whose
+    preceding ``HASH_WINDOW`` characters hash highest wins. Which break
+    wins depends only on the text around the breaks; the chunk start just
+    decides which breaks are in the running. After an edit, the old and
+    new versions' windows mostly overlap, so they usually pick the same
+    cut within a chunk or two, and from that cut on the chunks are
+    identical. This is not guaranteed, only likely.
+    """
+    best: Optional[Tuple[bool, float]] = None
+    best_cut = None
+    for match in NATURAL_BREAK.finditer(buffer, start, end):
+        cut = match.end()
+        if cut - start < min_size:
+            continue
+        if "\n" in match.group() and HEADING_START.match(buffer, cut):
+            return cut, True
+        window = buffer[max(start, match.start() - HASH_WINDOW):match.start()]
+        strength = (PARAGRAPH_BREAK.search(match.group()) is not None, _window_hash(window))
+        if best is None or strength > best:
+            best, best_cut = strength, cut
+    return None if best_cut is None else (best_cut, False)
+
+
+def chunk_text(
+    source: TextSource,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    content_defined: bool = False
+) -> Iterator[Tuple[int, int, str]]:
+    """Split text into ``(start_char, end_char, text)`` chunks of at most ``chunk_size`` characters.
+
+    Chunks end at the best boundary in the back half of the size budget
+    (heading, then paragraph, then sentence, then word; a hard cut only if
+    there is none) and the next chunk starts up to ``chunk_overlap``
+    characters earlier, on a word start. A chunk that ends at a heading is
+    not overlapped, so sections start clean. Surrounding whitespace is
+    trimmed; offsets always index the original text.
+
+    With ``content_defined``, a chunk instead ends at the natural break
+    the text around it ranks strongest (see ``_content_defined_boundary``),
+    falling back to the rule above only when there is none in range.
+    Inserting or deleting a sentence then usually changes only the chunks
+    around the edit, even in text without paragraphs, where the fixed rule
+    can shift every chunk after the edit.
+
+    Only a window of about ``chunk_size + block_size`` characters is held
+    at a time, so a file or other streaming source of any size chunks in
+    flat memory. A string source is scanned in place without copies.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_overlap must be at least 0 and less than chunk_size")
+
+    pieces = iter_text(source, block_size)
+    buffer = ""
+    # Absolute offset of buffer[0], and of the next chunk's start
+    offset = 0
+    start = 0
+    exhausted = False
+    min_fill = max(1, int(chunk_size * MIN_CHUNK_FILL))
+    min_size = chunk_overlap + max(HASH_WINDOW, int(chunk_size * CONTENT_DEFINED_MIN_FILL))
+
+    while True:
+        # Keep at least one full chunk (plus a character to see past its end) buffered
+        while not exhausted and offset + len(buffer) < start + chunk_size + 1:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+                break
+            # Drop consumed text only when refilling; a single string source is never copied
+            buffer = buffer[start - offset:] + piece
+            offset = start
+
+        local_start = start - offset
+        match = NON_SPACE.search(buffer, local_start)
+        if match is None:
+            return
+        local_start = match.start()
+        if not exhausted and len(buffer) <= local_start + chunk_size:
+            # Skipped a long run of whitespace; read further before cutting
+            start = offset + local_start
+            continue
+
+        local_limit = local_start + chunk_size
+        heading = False
+        cut = None
+        if content_defined:
+            cut = _content_defined_boundary(buffer, local_start, min(local_limit, len(buffer)), min_size)
+        if cut is not None:
+            local_end, heading = cut
+        elif exhausted and len(buffer) <= local_limit:
+            local_end = len(buffer)
+        else:
+            local_end, heading = _last_boundary(buffer, local_start + min_fill, local_limit)
+
+        text = buffer[local_start:local_end].rstrip()
+        yield offset + local_start, offset + local_start + len(text), text
+        if local_end >= len(buffer) and exhausted:
+            return
+
+        next_start = local_end
+        if chunk_overlap and not heading:
+            # Step back by the overlap, then forward to the start of a word
+            back = max(local_start + 1, local_end - chunk_overlap)
+            word = WORD_BREAK.search(buffer, back - 1, local_end)
+            if word is not None and word.end() < local_end:
+                next_start = word.end()
+        start = offset + next_start
+
+
+def chunk_document(
+    document: Document,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    source: Optional[TextSource] = None,
+    content_defined: bool = False
+) -> Iterator[DocumentChunk]:
+    """Lazily chunk a document's content, or ``source`` when its text is streamed from elsewhere.
+
+    Chunk ids are derived from the chunk text, so a chunk that survives an
+    edit unchanged keeps its id wherever it moves in the document.
+    """
+    chunks = chunk_text(
+        document.content if source is None else source,
+        chunk_size,
+        chunk_overlap,
+        content_defined=content_defined
+    )
+    seen: Dict[str, int] = {}
+    for index, (start_char, end_char, text) in enumerate(chunks):
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+        # Repeated text within a document gets a numbered id per occurrence
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        yield DocumentChunk(
+            chunk_id=f"{document.doc_id}:{digest}" + (f"-{occurrence}" if occurrence else ""),
+            doc_id=document.doc_id,
+            content=text,
+            chunk_index=index,
+            start_char=start_char,
+            end_char=end_char
+        )
+
+
+def batched(chunks: Iterable[DocumentChunk], size: int) -> Iterator[List[DocumentChunk]]:
+    """Group a chunk stream into lists of at most ``size``"""
+    batch: List[DocumentChunk] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
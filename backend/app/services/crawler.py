@@ -0,0 +1,174 @@
+from collections import deque
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Any, AsyncContextManager, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .extraction import DEFAULT_EXTRACTOR, ScrapedContent
+from .urls import DEFAULT_STRIP_PARAMS, ScalableBloomFilter, canonicalize_url
+from .web_scraper import WebScraper
+
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_MAX_PAGES = 200
+# Pages fetched per round; each round is handed to the indexer before the next starts
+DEFAULT_BATCH_SIZE = 50
+
+
+def url_matches_pattern(url: str, pattern: str) -> bool:
+    """Match a URL against an include/exclude pattern.
+
+    Patterns with ``*`` are globs over the URL path (``/docs/*``,
+    ``*/admin/*``); plain patterns are substring matches on the full URL.
+    """
+    if '*' in pattern:
+        path = urlparse(url).path or '/'
+        return fnmatchcase(path, pattern)
+    return pattern in url
+
+
+@dataclass
+class CrawlSettings:
+    seeds: List[str]
+    allowed_domains: List[str]
+    max_depth: int = DEFAULT_MAX_DEPTH
+    max_pages: int = DEFAULT_MAX_PAGES
+    max_pages_per_domain: Optional[int] = None
+    include_patterns: List[str] = field(default_factory=list)
+    exclude_patterns: List[str] = field(default_factory=list)
+    crawl_delay: float = 0.0
+    extractor: str = DEFAULT_EXTRACTOR
+    respect_robots: bool = True
+    strip_query_params: List[str] = field(default_factory=lambda: list(DEFAULT_STRIP_PARAMS))
+
+    def is_allowed_domain(self, url: str) -> bool:
+        host = urlparse(url).netloc.lower()
+        return any(host == domain or host.endswith('.' + domain) for domain in self.allowed_domains)
+
+    def matches_patterns(self, url: str) -> bool:
+        if self.include_patterns and not any(url_matches_pattern(url, p) for p in self.include_patterns):
+            return False
+        if self.exclude_patterns and any(url_matches_pattern(url, p) for p in self.exclude_patterns):
+            return False
+        return True
+
+
+@dataclass
+class CrawlStats:
+    fetched: int = 0
+    failed: int = 0
+    skipped_known: int = 0
+    disallowed: int = 0
+    discovered: int = 0
+    pages_per_domain: Dict[str, int] = field(default_factory=dict)
+    max_depth_reached: int = 0
+
+
+class Crawler:
+    """Breadth-first crawler over a single source.
+
+    Keeps a FIFO frontier of ``(url, depth)`` pairs, dedupes canonicalized
+    URLs against a scalable Bloom filter (a few MB for millions of URLs, at
+    the cost of skipping roughly one unseen URL in a thousand), stops
+    following links past ``max_depth`` and enforces both an overall
+    ``max_pages`` budget and an optional per-domain budget. Seeds are always
+    fetched; discovered links must stay inside ``allowed_domains`` and pass
+    the include/exclude patterns. Pages are yielded as they are extracted so
+    the caller can index them incrementally.
+    """
+
+    def __init__(
+        self,
+        scraper: WebScraper,
+        settings: CrawlSettings,
+        limiter: Optional[AsyncContextManager[Any]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        self.scraper = scraper
+        self.settings = settings
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.stats = CrawlStats()
+        self._seen = ScalableBloomFilter()
+        self._frontier: Deque[Tuple[str, int]] = deque()
+
+    def _normalize(self, url: str) -> str:
+        return canonicalize_url(url, strip_params=self.settings.strip_query_params)
+
+    def mark_seen(self, urls: Iterable[str]):
+        """Treat URLs as already crawled (e.g. unchanged sitemap entries) so links to them are not refetched"""
+        for url in urls:
+            self._seen.add(self._normalize(url))
+            self.stats.skipped_known += 1
+
+    def _has_budget(self, url: str) -> bool:
+        per_domain = self.settings.max_pages_per_domain
+        if per_domain is None:
+            return True
+        host = urlparse(url).netloc.lower()
+        return self.stats.pages_per_domain.get(host, 0) < per_domain
+
+    def _enqueue(self, url: str, depth: int, is_seed: bool = False):
+        url = self._normalize(url)
+        if url in self._seen:
+            return
+        if not is_seed:
+            if depth > self.settings.max_depth:
+                return
+            if not self.settings.is_allowed_domain(url) or not self.settings.matches_patterns(url):
+                return
+        self._seen.add(url)
+        self._frontier.append((url, depth))
+        self.stats.discovered += 1
+
+    async def _next_batch(self) -> List[Tuple[str, int]]:
+        """Pop the next round of URLs in BFS order, charging them to the page budgets.
+        
+        URLs disallowed by robots.txt are dropped here so they never use up budget.
+        """
+        batch = []
+        while self._frontier and len(batch) < self.batch_size:
+            if self.stats.fetched + self.stats.failed + len(batch) >= self.settings.max_pages:
+                break
+            url, depth = self._frontier.popleft()
+            if not self._has_budget(url):
+                continue
+            if self.settings.respect_robots and not await self.scraper.is_allowed_by_robots(url):
+                self.stats.disallowed += 1
+                continue
+            host = urlparse(url).netloc.lower()
+            self.stats.pages_per_domain[host] = self.stats.pages_per_domain.get(host, 0) + 1
+            batch.append((url, depth))
+        return batch
+
+    async def crawl(self) -> AsyncIterator[ScrapedContent]:
+        """Crawl from the seeds, yielding extracted pages in BFS order"""
+        for seed in self.settings.seeds:
+            self._enqueue(seed, 0, is_seed=True)
+
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                break
+
+            contents = await self.scraper.fetch_many(
+                [url for url, _ in batch],
+                crawl_delay=self.settings.crawl_delay,
+                limiter=self.limiter,
+                extractor=self.settings.extractor,
+                with_links=True,
+                respect_robots=self.settings.respect_robots
+            )
+
+            for (url, depth), content in zip(batch, contents):
+                self.stats.max_depth_reached = max(self.stats.max_depth_reached, depth)
+                if content is None:
+                    self.stats.failed += 1
+                    continue
+                self.stats.fetched += 1
+
+                if depth < self.settings.max_depth:
+                    for link in content.links or []:
+                        self._enqueue(link, depth + 1)
+                # Links are only needed for the frontier; don't carry them into the index
+                content.links = None
+                yield content
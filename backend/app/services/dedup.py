@@ -0,0 +1,114 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+FINGERPRINT_BITS = 64
+# Words per shingle; 3-word shingles tolerate small edits but not reordered paragraphs
+SHINGLE_SIZE = 3
+# Fingerprints within this many differing bits are treated as the same page
+MAX_HAMMING_DISTANCE = 3
+# Pages shorter than this are too small to fingerprint reliably (e.g. stub pages all look alike)
+MIN_FINGERPRINT_TOKENS = 20
+
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def _shingle_digest(shingle: str) -> bytes:
+    return hashlib.blake2b(shingle.encode("utf-8"), digest_size=FINGERPRINT_BITS // 8).digest()
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of a text over overlapping word shingles.
+
+    Returns None when the text has fewer than ``MIN_FINGERPRINT_TOKENS`` words.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < MIN_FINGERPRINT_TOKENS:
+        return None
+
+    digests = {
+        _shingle_digest(" ".join(tokens[i:i + SHINGLE_SIZE]))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+    # Count set bits a byte column at a time: tallying byte values first keeps
+    # the per-bit work proportional to the 256 possible values, not the shingles
+    bit_counts = [0] * FINGERPRINT_BITS
+    for position in range(FINGERPRINT_BITS // 8):
+        for value, count in Counter(digest[position] for digest in digests).items():
+            for bit in range(8):
+                if value >> bit & 1:
+                    bit_counts[position * 8 + bit] += count
+
+    # A bit is set when more than half of the shingles have it set
+    threshold = len(digests) / 2
+    fingerprint = 0
+    for bit, count in enumerate(bit_counts):
+        if count > threshold:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+class SimHashLSH:
+    """Lookup table for near-duplicate fingerprints.
+
+    Each fingerprint is split into ``max_distance + 1`` bands. Two
+    fingerprints that differ in at most ``max_distance`` bits must agree
+    exactly on at least one band (pigeonhole), so only keys sharing a band
+    are compared instead of every stored fingerprint.
+    """
+
+    def __init__(self, max_distance: int = MAX_HAMMING_DISTANCE):
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self.band_count)
+        self._band_mask = (1 << self._band_bits) - 1
+        self._buckets: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._fingerprints: Dict[Hashable, int] = {}
+
+    def _bands(self, fingerprint: int) -> List[Tuple[int, int]]:
+        return [
+            (band, (fingerprint >> (band * self._band_bits)) & self._band_mask)
+            for band in range(self.band_count)
+        ]
+
+    def add(self, key: Hashable, fingerprint: int):
+        self.remove(key)
+        self._fingerprints[key] = fingerprint
+        for band in self._bands(fingerprint):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def remove(self, key: Hashable):
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for band in self._bands(fingerprint):
+            bucket = self._buckets.get(band)
+            if bucket is None:
+                continue
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band]
+
+    def candidates(self, fingerprint: int) -> List[Tuple[Hashable, int]]:
+        """Stored keys within ``max_distance`` bits of a fingerprint, closest first"""
+        keys: Set[Hashable] = set()
+        for band in self._bands(fingerprint):
+            keys.update(self._buckets.get(band, ()))
+
+        matches = []
+        for key in keys:
+            distance = hamming_distance(fingerprint, self._fingerprints[key])
+            if distance <= self.max_distance:
+                matches.append((key, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
@@ -0,0 +1,319 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+
+# Bedrock error codes that mean "slow down" rather than "this request is bad"
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 20.0
+MAX_RETRIES = 6
+# Query embeddings memoized in memory, in front of the disk cache
+DEFAULT_QUERY_CACHE_SIZE = 1024
+# Full-jitter exponential backoff bounds for throttled requests
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+# After throttling the request rate halves; each success wins back this fraction of the configured rate
+MIN_RATE_FRACTION = 0.05
+RATE_RECOVERY_FRACTION = 0.01
+
+
+class ThrottledError(Exception):
+    """The embedding service asked us to slow down; the request can be retried"""
+
+
+class EmbeddingBatchError(Exception):
+    """Some texts of a batch could not be embedded.
+
+    ``failed`` maps each failed input index to its error; ``results`` holds
+    the vectors that did succeed, in input order, with None where one failed.
+    """
+
+    def __init__(self, failed: Dict[int, Exception], results: List[Optional[List[float]]]):
+        self.failed = failed
+        self.results = results
+        indices = sorted(failed)
+        shown = ", ".join(map(str, indices[:10])) + (", ..." if len(indices) > 10 else "")
+        super().__init__(
+            f"Failed to embed {len(failed)} of {len(results)} texts (indices {shown}): {failed[indices[0]]}"
+        )
+
+
+class BedrockEmbeddingBackend:
+    """Embeds one text per ``invoke_model`` call (Titan text embeddings have no batch API)"""
+
+    def __init__(self, client: Any, model_id: str):
+        self.client = client
+        self.model_id = model_id
+
+    def embed(self, text: str) -> List[float]:
+        try:
+            response = self.client.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps({"inputText": text}),
+                contentType="application/json",
+                accept="application/json"
+            )
+        except Exception as e:
+            response = getattr(e, "response", None)
+            code = response.get("Error", {}).get("Code") if isinstance(response, dict) else None
+            if code in THROTTLING_ERROR_CODES:
+                raise ThrottledError(str(e)) from e
+            raise
+        return json.loads(response['body'].read()).get('embedding', [])
+
+
+class StubEmbeddingBackend:
+    """Offline stand-in for benchmarking: deterministic unit vectors with simulated latency and quota.
+
+    With ``quota`` set, requests beyond that many per second are throttled,
+    the way Bedrock enforces its per-account limits.
+    """
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        latency: float = 0.0,
+        quota: Optional[float] = None,
+        model_id: str = "stub"
+    ):
+        self.dim = dim
+        self.latency = latency
+        self.model_id = model_id
+        self._quota = TokenBucket(quota) if quota else None
+
+    def embed(self, text: str) -> List[float]:
+        if self._quota is not None and not self._quota.try_acquire():
+            raise ThrottledError("stub quota exceeded")
+        if self.latency:
+            time.sleep(self.latency)
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``burst`` saved up"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+
+class BatchEmbedder:
+    """Concurrent, rate-limited embedding of many texts with ordered results.
+
+    Requests go out on a bounded thread pool, each taking a token from a
+    shared bucket first. A throttling error is retried with full-jitter
+    exponential backoff and halves the bucket's rate; every success wins
+    back a little of it (AIMD), so sustained throughput settles just under
+    the service's quota instead of repeatedly hitting it.
+
+    With a ``cache``, texts already embedded by the same model are served
+    from it and only the misses (each distinct text once) are requested.
+    If some texts still fail after their retries, the vectors that did
+    succeed are cached and returned on an ``EmbeddingBatchError``, so a
+    retry only pays for the failures.
+
+    Search queries go through ``embed_query``, which puts a small in-memory
+    LRU of ``query_cache_size`` entries in front of the cache: repeated
+    queries skip the SQLite lookup, and queries seen before a restart, or
+    by another worker, still skip the model.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_retries: int = MAX_RETRIES,
+        cache: Optional[EmbeddingCache] = None,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_rate = requests_per_second
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(requests_per_second, burst=max(1.0, float(max_workers)))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "failed": 0}
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    @property
+    def model_id(self) -> str:
+        return self.backend.model_id
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed")
+            return self._pool
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _adjust_rate(self, throttled: bool):
+        with self._lock:
+            if throttled:
+                rate = max(self.max_rate * MIN_RATE_FRACTION, self.bucket.rate / 2)
+            else:
+                rate = min(self.max_rate, self.bucket.rate + self.max_rate * RATE_RECOVERY_FRACTION)
+        if rate != self.bucket.rate:
+            self.bucket.set_rate(rate)
+
+    def embed_one(self, text: str) -> List[float]:
+        """Embed a single text on the calling thread"""
+        if self.cache is not None:
+            vector = self.cache.get(self.model_id, text)
+            if vector is not None:
+                return vector
+        vector = self._request(text)
+        if self.cache is not None:
+            self.cache.put(self.model_id, text, vector)
+        return vector
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query: the in-memory LRU first, then the cache, then the model"""
+        with self._lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+                return vector
+        vector = self.embed_one(text)
+        with self._lock:
+            self._query_cache[text] = vector
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def _request(self, text: str) -> List[float]:
+        """One backend call, with rate limiting and retries"""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self._count("requests")
+            try:
+                vector = self.backend.embed(text)
+            except ThrottledError:
+                self._count("throttled")
+                self._adjust_rate(throttled=True)
+                if attempt == self.max_retries:
+                    self._count("failed")
+                    raise
+                time.sleep(random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+                continue
+            except Exception:
+                self._count("failed")
+                raise
+            self._adjust_rate(throttled=False)
+            return vector
+        raise AssertionError("unreachable")
+
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed texts concurrently; results are in input order"""
+        if not texts:
+            return []
+        if self.cache is None:
+            results: List[Optional[List[float]]] = [None] * len(texts)
+        else:
+            results = self.cache.get_many(self.model_id, texts)
+
+        # Request each missing text once, however often it repeats
+        missing: Dict[str, List[int]] = {}
+        for position, (text, vector) in enumerate(zip(texts, results)):
+            if vector is None:
+                missing.setdefault(text, []).append(position)
+        if not missing:
+            return results
+        pending = list(missing)
+        if len(pending) == 1:
+            futures = None
+        else:
+            pool = self._get_pool()
+            futures = [pool.submit(self._request, text) for text in pending]
+
+        embedded: List[str] = []
+        vectors: List[List[float]] = []
+        failed: Dict[int, Exception] = {}
+        for number, text in enumerate(pending):
+            try:
+                vector = self._request(text) if futures is None else futures[number].result()
+            except Exception as e:
+                for position in missing[text]:
+                    failed[position] = e
+                continue
+            embedded.append(text)
+            vectors.append(vector)
+            for position in missing[text]:
+                results[position] = vector
+        # Keep what was paid for even when part of the batch failed
+        if self.cache is not None:
+            self.cache.put_many(self.model_id, embedded, vectors)
+        if failed:
+            raise EmbeddingBatchError(failed, results)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_queries"] = len(self._query_cache)
+        stats["requests_per_second"] = round(self.bucket.rate, 2)
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_MAX_SIZE_BYTES = 512 * 1024 * 1024
+# SQLite caps bound parameters per statement; look keys up in batches below it
+LOOKUP_BATCH = 500
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Form of a text that decides cache identity: NFC, with whitespace runs collapsed"""
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Disk-backed, content-addressed embedding cache with LRU eviction.
+
+    Vectors are keyed by ``(model_id, sha256 of the normalized text)`` and
+    stored as float16 blobs in a SQLite database (3KB for a 1536-d Titan
+    embedding), so re-ingesting unchanged text costs no embedding calls.
+    float16 keeps about three significant digits, far below what changes a
+    cosine ranking. The total blob size is capped at ``max_size_bytes``;
+    least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_size: Optional[int] = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.cache_dir, "embeddings.sqlite3"),
+                check_same_thread=False,
+                isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model_id TEXT NOT NULL,
+                    text_hash BLOB NOT NULL,
+                    vector BLOB NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (model_id, text_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)")
+            self._total_size = conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model_id: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vectors for texts, in order, with None for misses"""
+        hashes = [text_hash(text) for text in texts]
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            conn = self._get_conn()
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), LOOKUP_BATCH):
+                batch = unique[start:start + LOOKUP_BATCH]
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model_id, *batch]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE model_id = ? AND text_hash = ?",
+                    [(now, model_id, key) for key in found]
+                )
+                conn.execute("COMMIT")
+            results = [
+                np.frombuffer(found[key], dtype=np.float16).astype(np.float32).tolist() if key in found else None
+                for key in hashes
+            ]
+            hits = sum(1 for vector in results if vector is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def get(self, model_id: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model_id, [text])[0]
+
+    def put_many(self, model_id: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors for texts"""
+        if not texts:
+            return
+        now = time.time()
+        rows = {
+            text_hash(text): np.asarray(vector, dtype=np.float16).tobytes()
+            for text, vector in zip(texts, vectors)
+        }
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("BEGIN")
+            for key, blob in rows.items():
+                previous = conn.execute(
+                    "SELECT LENGTH(vector) FROM embeddings WHERE model_id = ? AND text_hash = ?", (model_id, key)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (model_id, text_hash, vector, accessed_at) VALUES (?, ?, ?, ?)",
+                    (model_id, key, blob, now)
+                )
+                self._total_size += len(blob) - (previous[0] if previous else 0)
+            self._evict()
+            conn.execute("COMMIT")
+
+    def put(self, model_id: str, text: str, vector: Sequence[float]):
+        self.put_many(model_id, [text], [vector])
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size cap"""
+        conn = self._get_conn()
+        while self._total_size > self.max_size_bytes:
+            rows = conn.execute(
+                "SELECT model_id, text_hash, LENGTH(vector) FROM embeddings ORDER BY accessed_at LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            for model_id, key, size in rows:
+                conn.execute("DELETE FROM embeddings WHERE model_id = ? AND text_hash = ?", (model_id, key))
+                self._total_size -= size
+                if self._total_size <= self.max_size_bytes:
+                    break
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            conn = self._get_conn()
+            entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "entries": entries,
+                "size_bytes": self._total_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,284 @@
+import asyncio
+import re
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional
+from urllib.parse import urldefrag, urljoin
+
+import trafilatura
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+from .dedup import simhash
+
+# Pages whose main-content extraction yields less than this fall back to BeautifulSoup
+MIN_CONTENT_LENGTH = 100
+
+# Main content areas, tried in order by the selector-based extractors
+CONTENT_SELECTORS = [
+    'main', 'article', '.content', '.main-content',
+    '.post-content', '.entry-content', '#content',
+    '.documentation', '.docs-content'
+]
+
+DEFAULT_EXTRACTOR = "auto"
+
+
+@dataclass
+class ScrapedContent:
+    title: str
+    content: str
+    url: str
+    snippet: str
+    published_date: Optional[str] = None
+    breadcrumb: Optional[str] = None
+    links: Optional[List[str]] = None  # outgoing links, only filled in for crawls
+    simhash: Optional[int] = None  # near-duplicate fingerprint of ``content``
+
+
+def extract_content_with_trafilatura(html: str, url: str) -> Optional[ScrapedContent]:
+    """Extract main content from HTML using trafilatura"""
+    try:
+        # Extract main text content
+        content = trafilatura.extract(html, include_comments=False, include_tables=True)
+        if not content:
+            return None
+
+        # Extract title and other metadata
+        metadata = trafilatura.extract_metadata(html)
+        title = metadata.title if metadata and metadata.title else "Untitled"
+
+        # Create snippet (first 200 characters)
+        snippet = content[:200] + "..." if len(content) > 200 else content
+
+        # Clean up content
+        content = re.sub(r'\n\s*\n', '\n\n', content)  # Remove excessive newlines
+
+        return ScrapedContent(
+            title=title,
+            content=content,
+            url=url,
+            snippet=snippet,
+            published_date=metadata.date if metadata else None
+        )
+    except Exception as e:
+        print(f"Error extracting content from {url}: {e}")
+        return None
+
+
+def extract_content_with_bs4(html: str, url: str) -> Optional[ScrapedContent]:
+    """Fallback content extraction using BeautifulSoup"""
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+
+        # Try to find title
+        title_elem = soup.find('title')
+        title = title_elem.get_text().strip() if title_elem else "Untitled"
+
+        # Try to find main content areas
+        content = ""
+        for selector in CONTENT_SELECTORS:
+            elements = soup.select(selector)
+            if elements:
+                content = ' '.join([elem.get_text().strip() for elem in elements])
+                break
+
+        # If no specific content area found, get body text
+        if not content:
+            body = soup.find('body')
+            if body:
+                content = body.get_text()
+
+        # Clean up content
+        content = re.sub(r'\s+', ' ', content).strip()
+        snippet = content[:200] + "..." if len(content) > 200 else content
+
+        return ScrapedContent(
+            title=title,
+            content=content,
+            url=url,
+            snippet=snippet
+        )
+    except Exception as e:
+        print(f"Error extracting content with BS4 from {url}: {e}")
+        return None
+
+
+def _selector_to_xpath(selector: str) -> str:
+    """Translate the simple tag / .class / #id selectors in CONTENT_SELECTORS to XPath"""
+    if selector.startswith('.'):
+        return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')]"
+    if selector.startswith('#'):
+        return f"//*[@id='{selector[1:]}']"
+    return f"//{selector}"
+
+
+CONTENT_XPATHS = [etree.XPath(_selector_to_xpath(selector)) for selector in CONTENT_SELECTORS]
+
+
+def extract_content_with_lxml(html: str, url: str) -> Optional[ScrapedContent]:
+    """Fast content extraction using lxml's C parser and the same content selectors as BS4"""
+    try:
+        if isinstance(html, str):
+            # lxml refuses str input that carries an XML encoding declaration
+            html = html.encode('utf-8')
+        tree = lxml_html.fromstring(html, parser=lxml_html.HTMLParser(encoding='utf-8', remove_comments=True))
+
+        # Remove script and style elements
+        etree.strip_elements(tree, 'script', 'style', with_tail=False)
+
+        # Try to find title
+        title = (tree.findtext('.//title') or '').strip() or "Untitled"
+
+        # Try to find main content areas
+        content = ""
+        for xpath in CONTENT_XPATHS:
+            elements = xpath(tree)
+            if elements:
+                content = ' '.join([elem.text_content().strip() for elem in elements])
+                break
+
+        # If no specific content area found, get body text
+        if not content:
+            body = tree.find('.//body')
+            if body is not None:
+                content = body.text_content()
+
+        # Clean up content
+        content = re.sub(r'\s+', ' ', content).strip()
+        snippet = content[:200] + "..." if len(content) > 200 else content
+
+        return ScrapedContent(
+            title=title,
+            content=content,
+            url=url,
+            snippet=snippet
+        )
+    except Exception as e:
+        print(f"Error extracting content with lxml from {url}: {e}")
+        return None
+
+
+def extract_content_auto(html: str, url: str) -> Optional[ScrapedContent]:
+    """Extract a page, trying trafilatura first and falling back to BeautifulSoup"""
+    content = extract_content_with_trafilatura(html, url)
+    if not content or len(content.content) < MIN_CONTENT_LENGTH:
+        content = extract_content_with_bs4(html, url)
+    return content
+
+
+def extract_links(html: str, base_url: str) -> List[str]:
+    """Absolute http(s) links from a page's <a href> elements, fragments removed"""
+    try:
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        tree = lxml_html.fromstring(html, parser=lxml_html.HTMLParser(encoding='utf-8'))
+    except Exception as e:
+        print(f"Error extracting links from {base_url}: {e}")
+        return []
+
+    links = []
+    for href in tree.xpath('//a/@href'):
+        href = href.strip()
+        if not href or href.startswith(('#', 'mailto:', 'javascript:', 'tel:')):
+            continue
+        url = urldefrag(urljoin(base_url, href))[0]
+        if url.startswith(('http://', 'https://')):
+            links.append(url)
+    # Keep page order but drop repeats
+    return list(dict.fromkeys(links))
+
+
+EXTRACTORS = {
+    "auto": extract_content_auto,
+    "trafilatura": extract_content_with_trafilatura,
+    "bs4": extract_content_with_bs4,
+    "lxml": extract_content_with_lxml,
+}
+
+
+def extract_content(
+    html: str,
+    url: str,
+    extractor: str = DEFAULT_EXTRACTOR,
+    with_links: bool = False
+) -> Optional[ScrapedContent]:
+    """Extract a page with the named extractor (see EXTRACTORS), optionally collecting its links.
+
+    The content's SimHash is computed here too, so it runs in the extraction
+    pool rather than on the event loop.
+    """
+    extract = EXTRACTORS.get(extractor)
+    if extract is None:
+        print(f"Unknown extractor '{extractor}', using '{DEFAULT_EXTRACTOR}'")
+        extract = EXTRACTORS[DEFAULT_EXTRACTOR]
+    content = extract(html, url)
+    if content is None:
+        return None
+    content.simhash = simhash(content.content)
+    if with_links:
+        content.links = extract_links(html, url)
+    return content
+
+
+class ExtractionPool:
+    """Runs CPU-heavy HTML extraction in worker processes.
+
+    Keeps the event loop free while pages are parsed. At most
+    ``max_queue_depth`` extractions are submitted at once; further callers
+    wait, which applies backpressure to the crawler instead of buffering
+    unbounded HTML in memory.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue_depth: Optional[int] = None):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth or max_workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # One semaphore per event loop; asyncio primitives cannot be shared across loops
+        self._slots = weakref.WeakKeyDictionary()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.max_queue_depth)
+            self._slots[loop] = slots
+        return slots
+
+    async def extract(
+        self,
+        html: str,
+        url: str,
+        extractor: str = DEFAULT_EXTRACTOR,
+        with_links: bool = False
+    ) -> Optional[ScrapedContent]:
+        """Extract a page in a worker process"""
+        async with self._get_slots():
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(), extract_content, html, url, extractor, with_links
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a pathological page); start a fresh pool next time
+                print(f"Extraction pool broke while processing {url}, restarting it")
+                self._executor = None
+                return None
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
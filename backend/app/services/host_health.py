@@ -0,0 +1,225 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+# Smoothing factor for the latency and error-rate moving averages
+EWMA_ALPHA = 0.2
+# Consecutive failures, or a smoothed error rate above the threshold, open the circuit
+FAILURE_THRESHOLD = 5
+ERROR_RATE_THRESHOLD = 0.5
+MIN_SAMPLES_FOR_ERROR_RATE = 10
+# How long an open circuit fails fast before a half-open probe; doubles per failed probe
+OPEN_SECONDS = 30.0
+MAX_OPEN_SECONDS = 600.0
+# Per-request timeouts follow the host's observed latency within these bounds
+MIN_TIMEOUT_SECONDS = 5.0
+TIMEOUT_LATENCY_MULTIPLIER = 4.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+OK = "ok"
+OVERLOADED = "overloaded"
+ERROR = "error"
+
+
+def _release(waiter: asyncio.Future):
+    """Wake a queued request, which may be waiting on another thread's event loop"""
+    def wake():
+        if not waiter.done():
+            waiter.set_result(None)
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if waiter.get_loop() is running:
+        wake()
+    else:
+        waiter.get_loop().call_soon_threadsafe(wake)
+
+
+class HostUnavailableError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+@dataclass
+class HostHealth:
+    limit: float
+    latency_ewma: Optional[float] = None
+    error_rate: float = 0.0
+    samples: int = 0
+    consecutive_failures: int = 0
+    in_flight: int = 0
+    state: str = CLOSED
+    opened_at: float = 0.0
+    open_seconds: float = OPEN_SECONDS
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+
+class HostHealthTracker:
+    """Per-host health, adaptive concurrency and circuit breaking for upstream requests.
+
+    Each host gets a concurrency limit adjusted AIMD-style: it grows by
+    ``1 / limit`` per successful request up to ``max_limit`` and halves on a
+    failure or an overload signal (429/503). Latency and error rate are
+    tracked as moving averages. After ``FAILURE_THRESHOLD`` consecutive
+    failures, or when the error rate passes ``ERROR_RATE_THRESHOLD``, the
+    host's circuit opens and requests fail fast with ``HostUnavailableError``
+    until its open period ends; then a single half-open probe is let
+    through, with other requests queued behind it, and its result closes or
+    reopens the circuit.
+
+    One tracker serves the server loop and the search runtime loop, so, as
+    in ``SharedLimiter``, all state changes happen under a thread lock and
+    queued requests are woken on their own loop.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, max_timeout: float = 30.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.max_timeout = max_timeout
+        self._hosts: Dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host: str) -> HostHealth:
+        # Callers hold the lock
+        health = self._hosts.get(host)
+        if health is None:
+            health = HostHealth(limit=float(self.max_limit))
+            self._hosts[host] = health
+        return health
+
+    def request_timeout(self, host: str) -> float:
+        """Total timeout for the next request to a host, scaled to its usual latency"""
+        with self._lock:
+            latency = self._get(host).latency_ewma
+        if latency is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(MIN_TIMEOUT_SECONDS, latency * TIMEOUT_LATENCY_MULTIPLIER))
+
+    def _check_circuit(self, host: str, health: HostHealth):
+        if health.state != OPEN:
+            return
+        retry_in = health.opened_at + health.open_seconds - time.monotonic()
+        if retry_in > 0:
+            raise HostUnavailableError(host, retry_in)
+        health.state = HALF_OPEN
+
+    def _current_limit(self, health: HostHealth) -> int:
+        # Half-open lets a single probe through; the rest queue for its verdict
+        if health.state == HALF_OPEN:
+            return 1
+        return max(self.min_limit, int(health.limit))
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Hold one of the host's concurrency slots for the duration of a request"""
+        while True:
+            with self._lock:
+                health = self._get(host)
+                # Checked again after each wake-up: the circuit may have opened while we were queued
+                self._check_circuit(host, health)
+                if health.in_flight < self._current_limit(health):
+                    health.in_flight += 1
+                    break
+                waiter = asyncio.get_running_loop().create_future()
+                health.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in health.waiters:
+                        health.waiters.remove(waiter)
+                    else:
+                        # Woken but not taking the slot; pass the wake-up on
+                        self._wake(health)
+                raise
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                health.in_flight -= 1
+                self._wake(health)
+
+    def _wake(self, health: HostHealth):
+        free = self._current_limit(health) - health.in_flight
+        while free > 0 and health.waiters:
+            waiter = health.waiters.popleft()
+            if not waiter.done():
+                _release(waiter)
+                free -= 1
+
+    def record(self, host: str, latency: float, outcome: str):
+        """Feed back the result of a request: ``OK``, ``OVERLOADED`` or ``ERROR``"""
+        with self._lock:
+            self._record(host, self._get(host), latency, outcome)
+
+    def _record(self, host: str, health: HostHealth, latency: float, outcome: str):
+        health.samples += 1
+        failed = outcome != OK
+        health.error_rate += EWMA_ALPHA * ((1.0 if failed else 0.0) - health.error_rate)
+        if outcome != ERROR:
+            # Errors such as timeouts say nothing about how fast the host answers
+            if health.latency_ewma is None:
+                health.latency_ewma = latency
+            else:
+                health.latency_ewma += EWMA_ALPHA * (latency - health.latency_ewma)
+
+        if not failed:
+            health.consecutive_failures = 0
+            health.limit = min(float(self.max_limit), health.limit + 1.0 / health.limit)
+            if health.state != CLOSED:
+                print(f"Host {host} recovered, closing circuit")
+                health.state = CLOSED
+                health.open_seconds = OPEN_SECONDS
+                health.error_rate = 0.0
+            self._wake(health)
+            return
+
+        health.limit = max(float(self.min_limit), health.limit / 2)
+        if outcome == ERROR:
+            health.consecutive_failures += 1
+
+        if health.state == HALF_OPEN:
+            health.open_seconds = min(health.open_seconds * 2, MAX_OPEN_SECONDS)
+            self._open(host, health)
+        elif health.state == CLOSED and (
+            health.consecutive_failures >= FAILURE_THRESHOLD
+            or (health.samples >= MIN_SAMPLES_FOR_ERROR_RATE and health.error_rate > ERROR_RATE_THRESHOLD)
+        ):
+            self._open(host, health)
+
+    def _open(self, host: str, health: HostHealth):
+        print(f"Host {host} is failing, opening circuit for {health.open_seconds:.0f}s")
+        health.state = OPEN
+        health.opened_at = time.monotonic()
+        # Queued requests would only fail once they get a slot; fail them now
+        while health.waiters:
+            _release(health.waiters.popleft())
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current health of every host seen so far"""
+        with self._lock:
+            return {
+                host: {
+                    "state": health.state,
+                    "concurrency_limit": round(health.limit, 2),
+                    "in_flight": health.in_flight,
+                    "latency_ms": round(health.latency_ewma * 1000, 1) if health.latency_ewma is not None else None,
+                    "error_rate": round(health.error_rate, 3),
+                    "consecutive_failures": health.consecutive_failures,
+                }
+                for host, health in self._hosts.items()
+            }
@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .urls import canonicalize_url
+
+DEFAULT_MAX_SIZE_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+
+
+def cache_key(url: str) -> str:
+    """Canonical form of a URL used as the cache key"""
+    return canonicalize_url(url)
+
+
+class HttpCache:
+    """Disk-backed HTTP response cache with validators and LRU eviction.
+
+    Bodies are stored zlib-compressed in a SQLite database together with
+    their ``ETag`` / ``Last-Modified`` validators, so callers can revalidate
+    with conditional requests and treat ``304 Not Modified`` as a hit. The
+    total compressed size is capped at ``max_size_bytes``; least recently
+    used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_size: Optional[int] = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.cache_dir, "http_cache.sqlite3"),
+                check_same_thread=False,
+                isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self._total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Look up a cached response, marking it as recently used"""
+        key = cache_key(url)
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), key))
+
+        body, etag, last_modified, fetched_at = row
+        return CachedResponse(
+            url=key,
+            body=zlib.decompress(body).decode("utf-8"),
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at
+        )
+
+    def conditional_headers(self, cached: Optional[CachedResponse]) -> Dict[str, str]:
+        """Request headers that let the server answer 304 for an unchanged cached response"""
+        headers = {}
+        if cached is None:
+            return headers
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        if headers:
+            self.revalidations += 1
+        return headers
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store a fresh 200 response"""
+        with self._lock:
+            self.misses += 1
+        key = cache_key(url)
+        compressed = zlib.compress(body.encode("utf-8"), 6)
+        if len(compressed) > self.max_size_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            previous = conn.execute("SELECT size FROM responses WHERE url = ?", (key,)).fetchone()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (url, body, size, etag, last_modified, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, compressed, len(compressed), etag, last_modified, now, now)
+            )
+            self._total_size += len(compressed) - (previous[0] if previous else 0)
+            self._evict()
+
+    def mark_revalidated(self, url: str):
+        """Record a 304 response: the cached body is still current"""
+        now = time.time()
+        with self._lock:
+            self.hits += 1
+            self._get_conn().execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, cache_key(url))
+            )
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size cap"""
+        conn = self._get_conn()
+        while self._total_size > self.max_size_bytes:
+            rows = conn.execute("SELECT url, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total_size -= size
+                if self._total_size <= self.max_size_bytes:
+                    break
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            conn = self._get_conn()
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "entries": entries,
+                "size_bytes": self._total_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+            }
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,11 +1,23 @@
 import boto3
 import json
+import os
 from typing import List, Dict, Any, Optional
 from langchain.llms.base import LLM
 from langchain.embeddings.base import Embeddings
 from pydantic import BaseModel
 
 from app.config import get_settings
+from app.services.embedding import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_QUERY_CACHE_SIZE,
+    DEFAULT_REQUESTS_PER_SECOND,
+    BatchEmbedder,
+    BedrockEmbeddingBackend,
+    EmbeddingBatchError,
+)
+from app.services.embedding_cache import DEFAULT_MAX_SIZE_BYTES, EmbeddingCache
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', '..')
 
 
 class AWSBedrockLLM(LLM):
@@ -85,6 +97,11 @@ class AWSBedrockEmbeddings(Embeddings):
     region_name: str
     aws_access_key_id: str
     aws_secret_access_key: str
+    max_concurrency: int = DEFAULT_MAX_WORKERS
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = DEFAULT_MAX_SIZE_BYTES
+    query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -94,32 +111,28 @@ class AWSBedrockEmbeddings(Embeddings):
             aws_access_key_id=self.aws_access_key_id,
             aws_secret_access_key=self.aws_secret_access_key
         )
+        self.embedder = BatchEmbedder(
+            BedrockEmbeddingBackend(self.bedrock_client, self.model_id),
+            max_workers=self.max_concurrency,
+            requests_per_second=self.requests_per_second,
+            cache=EmbeddingCache(self.cache_dir, self.cache_max_bytes) if self.cache_dir else None,
+            query_cache_size=self.query_cache_size
+        )
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple documents"""
-        embeddings = []
-        for text in texts:
-            embedding = self.embed_query(text)
-            embeddings.append(embedding)
-        return embeddings
+        """Embed multiple documents concurrently, in input order"""
+        try:
+            return self.embedder.embed_many(texts)
+        except EmbeddingBatchError:
+            # Carries the vectors that did succeed; callers may keep them
+            raise
+        except Exception as e:
+            raise Exception(f"Error getting embeddings from AWS Bedrock: {str(e)}")
     
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query"""
-        request_body = {
-            "inputText": text
-        }
-        
         try:
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body),
-                contentType="application/json",
-                accept="application/json"
-            )
-            
-            response_body = json.loads(response['body'].read())
-            return response_body.get('embedding', [])
-            
+            return self.embedder.embed_query(text)
         except Exception as e:
             raise Exception(f"Error getting embeddings from AWS Bedrock: {str(e)}")
 
@@ -140,9 +153,18 @@ def get_embeddings() -> AWSBedrockEmbeddings:
     """Get configured AWS Bedrock embeddings instance"""
     settings = get_settings()
     
+    cache_dir = settings.embedding_cache_dir
+    if cache_dir and not os.path.isabs(cache_dir):
+        cache_dir = os.path.normpath(os.path.join(BACKEND_DIR, cache_dir))
+    
     return AWSBedrockEmbeddings(
         model_id=settings.aws_bedrock_embedding_model_id,
         region_name=settings.aws_region,
         aws_access_key_id=settings.aws_access_key_id,
-        aws_secret_access_key=settings.aws_secret_access_key
+        aws_secret_access_key=settings.aws_secret_access_key,
+        max_concurrency=settings.embedding_max_concurrency,
+        requests_per_second=settings.embedding_requests_per_second,
+        cache_dir=cache_dir,
+        cache_max_bytes=settings.embedding_cache_max_bytes,
+        query_cache_size=settings.embedding_query_cache_size
     )
@@ -0,0 +1,283 @@
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .http_cache import cache_key
+
+DEFAULT_MAX_SEGMENT_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_TOTAL_BYTES = 4 * 1024 * 1024 * 1024
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{5})\.warc\.gz$")
+
+
+@dataclass
+class ArchivedPage:
+    url: str
+    html: str
+    fetched_at: float
+    content_type: str = "text/html"
+
+
+@dataclass
+class ArchiveRecord:
+    """Location of one archived response inside a segment file"""
+    url: str
+    fetched_at: float
+    segment: str
+    offset: int
+    length: int
+
+
+def _segment_name(number: int) -> str:
+    return f"segment-{number:05d}.warc.gz"
+
+
+def _build_record(url: str, body: bytes, fetched_at: float, content_type: str) -> bytes:
+    """Serialize a WARC/1.1 ``resource`` record for a raw page"""
+    date = datetime.fromtimestamp(fetched_at, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    header = (
+        "WARC/1.1\r\n"
+        "WARC-Type: resource\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "\r\n"
+    )
+    return header.encode("utf-8") + body + b"\r\n\r\n"
+
+
+def _parse_record(data: bytes) -> ArchivedPage:
+    """Parse a decompressed record produced by ``_build_record``"""
+    header, _, rest = data.partition(b"\r\n\r\n")
+    fields: Dict[str, str] = {}
+    for line in header.decode("utf-8").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        fields[name.strip().lower()] = value.strip()
+
+    body = rest[:int(fields["content-length"])]
+    date = fields["warc-date"].replace("Z", "+00:00")
+    return ArchivedPage(
+        url=fields["warc-target-uri"],
+        html=body.decode("utf-8", errors="replace"),
+        fetched_at=datetime.fromisoformat(date).timestamp(),
+        content_type=fields.get("content-type", "text/html")
+    )
+
+
+def read_record(archive_dir: str, record: ArchiveRecord) -> ArchivedPage:
+    """Read one record straight from its segment.
+
+    Each record is its own gzip member, so it can be decompressed from its
+    offset without touching the rest of the segment. This is a plain function
+    so worker processes can read records without sharing a ``PageArchive``.
+    """
+    with open(os.path.join(archive_dir, record.segment), "rb") as f:
+        f.seek(record.offset)
+        data = f.read(record.length)
+    return _parse_record(gzip.decompress(data))
+
+
+class PageArchive:
+    """Append-only archive of raw fetched pages.
+
+    Responses are written as WARC ``resource`` records to size-capped
+    segment files (``segment-NNNNN.warc.gz``), one gzip member per record, so
+    segments stay readable by standard WARC tools. A SQLite offset index maps
+    ``(url, fetched_at)`` to the segment, offset and length of each record,
+    which lets extraction and indexing be re-run from disk without refetching
+    anything. A page whose body is unchanged since its last record is not
+    written again.
+
+    Whenever a segment fills up and the segments total more than
+    ``max_total_bytes`` (None for no limit), the oldest whole segments are
+    deleted along with their index entries; the segment being written is
+    always kept.
+    """
+
+    def __init__(
+        self,
+        archive_dir: str,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        max_total_bytes: Optional[int] = DEFAULT_MAX_TOTAL_BYTES
+    ):
+        self.archive_dir = archive_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._segment_number = 0
+        self._segment_file = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the offset index on first use"""
+        if self._conn is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.archive_dir, "index.sqlite3"),
+                check_same_thread=False,
+                isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS records (
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    segment TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    digest TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS records_url ON records (url, fetched_at)")
+            numbers = [
+                int(match.group(1))
+                for match in map(SEGMENT_PATTERN.match, os.listdir(self.archive_dir))
+                if match
+            ]
+            self._segment_number = max(numbers, default=0)
+            self._conn = conn
+            self._enforce_size_limit()
+        return self._conn
+
+    def _segment_sizes(self) -> List[Tuple[int, int]]:
+        """``(number, size)`` of every segment on disk, oldest first"""
+        segments = []
+        for name in os.listdir(self.archive_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.getsize(os.path.join(self.archive_dir, name))))
+        return sorted(segments)
+
+    def _enforce_size_limit(self):
+        """Delete the oldest segments and their records until the archive fits ``max_total_bytes``"""
+        if self.max_total_bytes is None:
+            return
+        segments = self._segment_sizes()
+        total = sum(size for _, size in segments)
+        for number, size in segments:
+            if total <= self.max_total_bytes or number >= self._segment_number:
+                break
+            name = _segment_name(number)
+            # Drop the index entries first so no lookup ever points into a missing file
+            self._conn.execute("DELETE FROM records WHERE segment = ?", (name,))
+            os.remove(os.path.join(self.archive_dir, name))
+            total -= size
+            print(f"Removed archive segment {name} to stay under {self.max_total_bytes} bytes")
+
+    def set_max_total_bytes(self, max_total_bytes: Optional[int]):
+        """Change the archive size limit, deleting old segments right away if it is now exceeded"""
+        with self._lock:
+            self.max_total_bytes = max_total_bytes
+            if self._conn is not None:
+                self._enforce_size_limit()
+
+    def _current_segment(self):
+        """Open segment for appending, rolling over to a new one once it is full"""
+        if self._segment_file is not None and self._segment_file.tell() >= self.max_segment_bytes:
+            self._segment_file.close()
+            self._segment_file = None
+            self._segment_number += 1
+            self._enforce_size_limit()
+        if self._segment_file is None:
+            path = os.path.join(self.archive_dir, _segment_name(self._segment_number))
+            self._segment_file = open(path, "ab")
+            if self._segment_file.tell() >= self.max_segment_bytes:
+                return self._current_segment()
+        return self._segment_file
+
+    def append(
+        self,
+        url: str,
+        html: str,
+        fetched_at: Optional[float] = None,
+        content_type: str = "text/html"
+    ) -> bool:
+        """Archive a fetched page; returns False when its body is unchanged since the last record"""
+        key = cache_key(url)
+        body = html.encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()
+        fetched_at = fetched_at or time.time()
+        compressed = gzip.compress(_build_record(url, body, fetched_at, content_type), compresslevel=6)
+
+        with self._lock:
+            conn = self._get_conn()
+            previous = conn.execute(
+                "SELECT digest FROM records WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (key,)
+            ).fetchone()
+            if previous and previous[0] == digest:
+                return False
+
+            segment_file = self._current_segment()
+            offset = segment_file.tell()
+            segment_file.write(compressed)
+            segment_file.flush()
+            # Indexed only once the bytes are written, so a crash never leaves a dangling offset
+            conn.execute(
+                "INSERT INTO records (url, fetched_at, segment, offset, length, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, fetched_at, _segment_name(self._segment_number), offset, len(compressed), digest)
+            )
+            return True
+
+    def lookup(self, url: str, at: Optional[float] = None) -> Optional[ArchiveRecord]:
+        """Latest record for a URL, or the latest one fetched no later than ``at``"""
+        with self._lock:
+            row = self._get_conn().execute(
+                """
+                SELECT url, fetched_at, segment, offset, length FROM records
+                WHERE url = ? AND fetched_at <= ?
+                ORDER BY fetched_at DESC LIMIT 1
+                """,
+                (cache_key(url), at if at is not None else float("inf"))
+            ).fetchone()
+        return ArchiveRecord(*row) if row else None
+
+    def get(self, url: str, at: Optional[float] = None) -> Optional[ArchivedPage]:
+        """Read back the archived page for a URL (see ``lookup``)"""
+        record = self.lookup(url, at)
+        return read_record(self.archive_dir, record) if record else None
+
+    def iter_latest(self) -> Iterator[ArchiveRecord]:
+        """The most recent record of every archived URL, in on-disk order"""
+        with self._lock:
+            rows = self._get_conn().execute(
+                """
+                SELECT url, MAX(fetched_at), segment, offset, length FROM records
+                GROUP BY url ORDER BY segment, offset
+                """
+            ).fetchall()
+        for row in rows:
+            yield ArchiveRecord(*row)
+
+    def stats(self) -> Dict[str, int]:
+        """Record counts and on-disk size"""
+        with self._lock:
+            conn = self._get_conn()
+            records, urls = conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM records").fetchone()
+            segments = [name for name in os.listdir(self.archive_dir) if SEGMENT_PATTERN.match(name)]
+        return {
+            "records": records,
+            "urls": urls,
+            "segments": len(segments),
+            "size_bytes": sum(os.path.getsize(os.path.join(self.archive_dir, name)) for name in segments),
+        }
+
+    def close(self):
+        """Close the open segment and the offset index"""
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
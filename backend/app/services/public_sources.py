@@ -1,9 +1,39 @@
 import json
 import os
 import asyncio
-from typing import Dict, List, Optional, Any
+import concurrent.futures
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from pathlib import Path
+from urllib.parse import urlparse
 from .web_scraper import web_scraper, ScrapedContent
+from .analysis import Analyzer
+from .extraction import DEFAULT_EXTRACTOR
+from .crawler import Crawler, CrawlSettings, DEFAULT_MAX_DEPTH, url_matches_pattern
+from .page_archive import read_record
+from .search_index import SearchIndex
+from ..models.schemas import Document
+from .urls import DEFAULT_STRIP_PARAMS, canonicalize_url
+from .runtime import SharedLimiter, search_runtime
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', '..')
+DEFAULT_INDEX_PATH = os.path.join('data', 'index')
+DEFAULT_REFRESH_INTERVAL_HOURS = 24
+DEFAULT_MAX_CONCURRENT_SOURCES = 4
+DEFAULT_MAX_CONCURRENT_REQUESTS_PER_SOURCE = 5
+DEFAULT_CRAWL_DELAY_SECONDS = 0.0
+DEFAULT_MAX_CRAWL_PAGES = 200
+# Time allowed past a search deadline for sources to score what they already fetched
+DEADLINE_GRACE_SECONDS = 0.05
+
+
+@dataclass
+class PublicSearchResult:
+    results: List[Dict[str, Any]]
+    incomplete_sources: List[str] = field(default_factory=list)
 
 class PublicSourcesManager:
     """Manages configuration and search for public data sources"""
@@ -16,6 +46,9 @@ class PublicSourcesManager:
         self.config_path = config_path
         self._config: Dict[str, Any] = {}
         self._load_config()
+        self.index = SearchIndex(self.get_index_path(), self.get_analyzer())
+        self._refresh_lock = asyncio.Lock()
+        self._limiters: Dict[str, SharedLimiter] = {}
     
     def _load_config(self):
         """Load configuration from JSON file"""
@@ -45,6 +78,14 @@ class PublicSourcesManager:
         return [source for source in self.get_all_sources() 
                 if source.get("search_enabled", False)]
     
+    def get_source_for_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """First search-enabled source whose crawl scope (domains and patterns) covers a URL"""
+        for source in self.get_search_enabled_sources():
+            settings = self.get_crawl_settings(source, [])
+            if settings.is_allowed_domain(url) and settings.matches_patterns(url):
+                return source
+        return None
+    
     def get_sources_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Get sources filtered by category"""
         return [source for source in self.get_all_sources()
@@ -58,81 +99,492 @@ class PublicSourcesManager:
         """Get search configuration"""
         return self._config.get("search_config", {})
     
+    def get_crawl_config(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        """Effective crawl settings for a source.
+        
+        Sources added through scripts/add_public_source.py describe crawling in
+        ``ingestion_config`` (``crawl_depth``, ``max_pages``, patterns) while
+        hand-written ones use ``crawl_config`` (``max_depth``, ``sitemap_url``,
+        ``allowed_domains``); both are honored, ``crawl_config`` winning.
+        """
+        crawl_config = dict(source.get("ingestion_config", {}))
+        crawl_config.update(source.get("crawl_config", {}))
+        if "max_depth" not in crawl_config and "crawl_depth" in crawl_config:
+            crawl_config["max_depth"] = crawl_config["crawl_depth"]
+        return crawl_config
+    
+    def get_index_config(self) -> Dict[str, Any]:
+        """Get local search index configuration"""
+        return self.get_search_config().get("index", {})
+    
+    def get_analyzer(self) -> Analyzer:
+        """Text analyzer for the local index, from ``search_config.index.analyzer``"""
+        return Analyzer.from_config(self.get_index_config().get("analyzer", {}))
+    
+    def get_index_path(self) -> str:
+        """Resolve the index directory, relative paths being relative to the backend directory"""
+        index_path = self.get_index_config().get("path", DEFAULT_INDEX_PATH)
+        if not os.path.isabs(index_path):
+            index_path = os.path.join(BACKEND_DIR, index_path)
+        return os.path.normpath(index_path)
+    
     async def search_public_sources(self, query: str, source_ids: Optional[List[str]] = None, max_results: int = 20) -> List[Dict[str, Any]]:
         """
-        Search across public sources by actually scraping content
+        Search across public sources using the local index.
+        
+        Sources are searched concurrently (bounded by ``max_concurrent_sources``)
+        and their results merged as each one completes. Sources that have never
+        been crawled fall back to live scraping when
+        ``search_config.index.live_fallback`` is enabled, and the scraped pages
+        are added to the index so the next query is served locally.
         """
+        search = await self.search_with_deadline(query, None, source_ids, max_results)
+        return search.results
+    
+    async def search_with_deadline(
+        self,
+        query: str,
+        deadline_ms: Optional[int],
+        source_ids: Optional[List[str]] = None,
+        max_results: int = 20
+    ) -> PublicSearchResult:
+        """
+        Search public sources within a latency budget.
+        
+        When ``deadline_ms`` elapses, in-flight fetches are cancelled, pages
+        fetched so far are still scored, and sources that could not finish
+        are listed in ``incomplete_sources``. ``None`` means no deadline.
+        """
+        async with aclosing(self.iter_search_events(query, deadline_ms, source_ids, max_results)) as events:
+            async for event in events:
+                if event["type"] == "final":
+                    return PublicSearchResult(results=event["results"], incomplete_sources=event["incomplete_sources"])
+        return PublicSearchResult(results=[])
+    
+    async def iter_search_events(
+        self,
+        query: str,
+        deadline_ms: Optional[int] = None,
+        source_ids: Optional[List[str]] = None,
+        max_results: int = 20
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search public sources, yielding each source's results as soon as it finishes.
+        
+        Yields one ``{"type": "source", ...}`` event per finished source, in
+        completion order, then a ``{"type": "final", ...}`` event with all
+        results merged and re-ranked. Deadline handling is as in
+        ``search_with_deadline``. Closing the generator early cancels the
+        sources still running.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_ms / 1000 if deadline_ms is not None else None
+        
         if source_ids is None:
             sources = self.get_search_enabled_sources()
         else:
             sources = [self.get_source_by_id(sid) for sid in source_ids if self.get_source_by_id(sid)]
         
+        tasks = {
+            asyncio.create_task(self._search_source(source, query, deadline)): source
+            for source in sources if source
+        }
+        
         all_results = []
+        incomplete_sources = []
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time()) + DEADLINE_GRACE_SECONDS
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    source = tasks[task]
+                    source_results, complete = task.result()
+                    all_results.extend(source_results)
+                    if not complete:
+                        incomplete_sources.append(source.get("id"))
+                    yield {
+                        "type": "source",
+                        "source": source.get("id"),
+                        "source_name": source.get("name"),
+                        "complete": complete,
+                        "results": source_results,
+                    }
+            # Sources still running past the grace period (e.g. stuck discovering URLs) are dropped
+            incomplete_sources.extend(tasks[task].get("id") for task in pending)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
         
-        for source in sources:
-            if not source:
-                continue
-                
-            source_id = source.get("id")
-            source_name = source.get("name")
-            base_url = source.get("base_url")
-            icon = source.get("display_config", {}).get("icon", "📄")
-            category = source.get("display_config", {}).get("category", "documentation")
+        # Sort all results by score
+        all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
+        yield {
+            "type": "final",
+            "results": all_results[:max_results],
+            "total_results": len(all_results),
+            "incomplete_sources": incomplete_sources,
+        }
+    
+    async def _search_source(
+        self,
+        source: Dict[str, Any],
+        query: str,
+        deadline: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Search a single source, returning its formatted top results and whether it finished in time"""
+        source_name = source.get("name")
+        live_fallback = self.get_index_config().get("live_fallback", True)
+        complete = True
+        
+        try:
+            async with self._get_limiter("__sources__", self._max_concurrent_sources()):
+                if self.index.has_source(source.get("id")):
+                    search_results = self.index.search(query, source_id=source.get("id"), limit=5)
+                elif live_fallback:
+                    print(f"{source_name} not indexed yet, searching live for: {query}")
+                    search_results, complete = await self._live_search_source(source, query, deadline)
+                else:
+                    return [], True
             
-            print(f"Searching {source_name} for: {query}")
+            # Format results for our API
+            return [self._format_result(source, result) for result in search_results[:5]], complete  # Top 5 results per source
             
-            try:
-                # Get URLs to scrape for this source
-                urls_to_search = await self._get_urls_for_source(source, query)
-                
-                if not urls_to_search:
-                    print(f"No URLs found for {source_name}")
-                    continue
-                
-                # Scrape content from URLs
-                scraped_contents = []
-                for url in urls_to_search[:10]:  # Limit to first 10 URLs per source
-                    content = await web_scraper.fetch_and_extract(url)
-                    if content:
-                        scraped_contents.append(content)
-                
-                if not scraped_contents:
-                    print(f"No content scraped from {source_name}")
-                    continue
-                
-                # Search through scraped content
-                search_results = web_scraper.search_content(scraped_contents, query)
-                
-                # Format results for our API
-                for result in search_results[:5]:  # Top 5 results per source
-                    formatted_result = {
-                        "title": result["title"],
-                        "url": result["url"],
-                        "source": source_id,
-                        "source_name": source_name,
-                        "source_icon": icon,
-                        "snippet": result["snippet"],
-                        "updated_at": result.get("published_date") or "2024-01-15T10:30:00Z",
-                        "score": result["score"],
-                        "breadcrumb": result.get("breadcrumb") or f"{source_name} > Documentation",
-                        "category": category
-                    }
-                    all_results.append(formatted_result)
-                    
-                print(f"Found {len(search_results)} results from {source_name}")
-                
-            except Exception as e:
-                print(f"Error searching {source_name}: {e}")
+        except Exception as e:
+            print(f"Error searching {source_name}: {e}")
+            return [], True
+    
+    def _max_concurrent_sources(self) -> int:
+        """Global limit on sources searched at the same time"""
+        return self.get_search_config().get("max_concurrent_sources", DEFAULT_MAX_CONCURRENT_SOURCES)
+    
+    def _max_concurrent_requests(self, source: Dict[str, Any]) -> int:
+        """Limit on in-flight upstream requests for a single source"""
+        crawl_config = self.get_crawl_config(source)
+        return crawl_config.get(
+            "max_concurrent_requests",
+            self.get_search_config().get("max_concurrent_requests_per_source", DEFAULT_MAX_CONCURRENT_REQUESTS_PER_SOURCE)
+        )
+    
+    def _get_limiter(self, key: str, limit: int) -> SharedLimiter:
+        """Get a limiter shared by every event loop searching through this manager"""
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters.setdefault(key, SharedLimiter(limit))
+        return limiter
+    
+    def _source_limiter(self, source: Dict[str, Any]) -> SharedLimiter:
+        """Limiter bounding concurrent upstream requests for a source"""
+        return self._get_limiter(f"source:{source.get('id')}", self._max_concurrent_requests(source))
+    
+    async def _fetch_page(self, source: Dict[str, Any], url: str, with_links: bool = False) -> Optional[ScrapedContent]:
+        """Fetch and extract a page through the shared scraper within the source's request budget"""
+        async with self._source_limiter(source):
+            return await web_scraper.fetch_and_extract(
+                url,
+                self.get_extractor(source),
+                with_links,
+                crawl_delay=self._crawl_delay(source),
+                respect_robots=self._respect_robots(source)
+            )
+    
+    def _crawl_delay(self, source: Dict[str, Any]) -> float:
+        """Minimum spacing in seconds between requests to one of the source's hosts"""
+        crawl_config = self.get_crawl_config(source)
+        return crawl_config.get(
+            "crawl_delay",
+            self.get_search_config().get("crawl_delay_seconds", DEFAULT_CRAWL_DELAY_SECONDS)
+        )
+    
+    def _respect_robots(self, source: Dict[str, Any]) -> bool:
+        """Whether to obey the source's robots.txt (on unless ``respect_robots_txt`` is false)"""
+        return self.get_crawl_config(source).get("respect_robots_txt", True)
+    
+    def get_extractor(self, source: Dict[str, Any]) -> str:
+        """Content extractor for the source's pages ("auto", "trafilatura", "bs4" or "lxml")"""
+        crawl_config = self.get_crawl_config(source)
+        return crawl_config.get("extractor", self.get_search_config().get("default_extractor", DEFAULT_EXTRACTOR))
+    
+    async def _fetch_pages(
+        self,
+        source: Dict[str, Any],
+        urls: List[str],
+        deadline: Optional[float] = None
+    ) -> List[ScrapedContent]:
+        """Fetch pages concurrently with per-host politeness, dropping failures and pages missing the deadline"""
+        contents = await web_scraper.fetch_many(
+            urls,
+            deadline=deadline,
+            crawl_delay=self._crawl_delay(source),
+            limiter=self._source_limiter(source),
+            extractor=self.get_extractor(source),
+            respect_robots=self._respect_robots(source)
+        )
+        return [content for content in contents if content]
+    
+    def _format_result(self, source: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Format a scored result for our API"""
+        source_name = source.get("name")
+        display_config = source.get("display_config", {})
+        return {
+            "title": result["title"],
+            "url": result["url"],
+            "source": source.get("id"),
+            "source_name": source_name,
+            "source_icon": display_config.get("icon", "📄"),
+            "snippet": result["snippet"],
+            "updated_at": result.get("published_date") or "2024-01-15T10:30:00Z",
+            "score": result["score"],
+            "breadcrumb": result.get("breadcrumb") or f"{source_name} > Documentation",
+            "category": display_config.get("category", "documentation")
+        }
+    
+    async def _live_search_source(
+        self,
+        source: Dict[str, Any],
+        query: str,
+        deadline: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Scrape a source on demand and score the pages against the query.
+        
+        Returns the scored results and whether every page was fetched before
+        ``deadline`` (an event loop time); pages fetched in time are still scored.
+        """
+        source_id = source.get("id")
+        source_name = source.get("name")
+        loop = asyncio.get_running_loop()
+        
+        # Get URLs to scrape for this source
+        try:
+            urls_to_search = await asyncio.wait_for(
+                self._get_urls_for_source(source, query),
+                None if deadline is None else max(0.0, deadline - loop.time())
+            )
+        except asyncio.TimeoutError:
+            print(f"Deadline reached while discovering URLs for {source_name}")
+            return [], False
+        
+        if not urls_to_search:
+            print(f"No URLs found for {source_name}")
+            return [], True
+        
+        # Known aliases would only fetch a copy of a page we already have
+        urls_to_search = [url for url in urls_to_search if self.index.canonical_url(url) in (None, url)]
+        
+        # Scrape content from URLs
+        scraped_contents = await self._fetch_pages(source, urls_to_search[:10], deadline)  # Limit to first 10 URLs per source
+        complete = deadline is None or loop.time() < deadline
+        
+        if not scraped_contents:
+            print(f"No content scraped from {source_name}")
+            return [], complete
+        
+        # Keep what we fetched so later queries can be answered locally, collapsing near-duplicates
+        scraped_contents = [
+            content for content in scraped_contents
+            if self.index.add_document(source_id, content) is None
+        ]
+        
+        # Search through scraped content
+        search_results = web_scraper.search_content(scraped_contents, query, analyzer=self.index.analyzer)
+        print(f"Found {len(search_results)} results from {source_name}" + ("" if complete else " (deadline reached)"))
+        return search_results, complete
+    
+    def get_crawl_settings(self, source: Dict[str, Any], seeds: List[str]) -> CrawlSettings:
+        """Build the crawler settings for a source"""
+        crawl_config = self.get_crawl_config(source)
+        base_url = source.get("base_url")
+        
+        allowed_domains = crawl_config.get("allowed_domains")
+        if not allowed_domains:
+            allowed_domains = [urlparse(url).netloc.lower() for url in [base_url] + seeds if url]
+        
+        max_depth = crawl_config.get("max_depth", DEFAULT_MAX_DEPTH)
+        if not crawl_config.get("crawl_enabled", True):
+            max_depth = 0  # Only the seeds themselves
+        
+        return CrawlSettings(
+            seeds=seeds,
+            allowed_domains=list(dict.fromkeys(allowed_domains)),
+            max_depth=max_depth,
+            max_pages=crawl_config.get("max_pages", DEFAULT_MAX_CRAWL_PAGES),
+            max_pages_per_domain=crawl_config.get("max_pages_per_domain"),
+            include_patterns=crawl_config.get("include_patterns", []),
+            exclude_patterns=crawl_config.get("exclude_patterns", []),
+            crawl_delay=self._crawl_delay(source),
+            extractor=self.get_extractor(source),
+            respect_robots=self._respect_robots(source),
+            strip_query_params=self._strip_query_params(source)
+        )
+    
+    def _strip_query_params(self, source: Dict[str, Any]) -> List[str]:
+        """Query parameters dropped when canonicalizing the source's URLs (defaults plus configured ones)"""
+        configured = self.get_crawl_config(source).get(
+            "strip_query_params", self.get_search_config().get("strip_query_params", [])
+        )
+        return DEFAULT_STRIP_PARAMS + [param.lower() for param in configured]
+    
+    async def crawl_source(self, source: Dict[str, Any]) -> int:
+        """Crawl a source into the local index, returning the number of pages indexed"""
+        source_id = source.get("id")
+        source_name = source.get("name")
+        crawl_config = self.get_crawl_config(source)
+        
+        print(f"Crawling {source_name} into the search index")
+        seeds = [source.get("base_url")] if source.get("base_url") else []
+        unchanged: List[str] = []
+        sitemap_url = crawl_config.get("sitemap_url")
+        if not sitemap_url and seeds and self._respect_robots(source):
+            # Fall back to a sitemap advertised in robots.txt
+            rules = await web_scraper.get_robots_rules(seeds[0])
+            sitemap_url = rules.sitemaps[0] if rules.sitemaps else None
+        if sitemap_url:
+            changed, unchanged = await self._get_changed_urls_from_sitemap(source, sitemap_url)
+            seeds.extend(changed)
+        seeds.extend(crawl_config.get("additional_urls", []))
+        
+        crawler = Crawler(
+            web_scraper,
+            self.get_crawl_settings(source, list(dict.fromkeys(seeds))),
+            limiter=self._source_limiter(source)
+        )
+        # Unchanged sitemap pages stay as indexed; don't refetch them when they are linked to
+        crawler.mark_seen(unchanged)
+        
+        duplicates = 0
+        async with aclosing(crawler.crawl()) as pages:
+            async for content in pages:
+                if self.index.add_document(source_id, content) is not None:
+                    duplicates += 1
+        
+        stats = crawler.stats
+        self.index.mark_source_crawled(source_id)
+        await asyncio.to_thread(self.index.save)
+        print(
+            f"Indexed {stats.fetched - duplicates} pages from {source_name} "
+            f"({duplicates} near-duplicates, {stats.failed} failed, {stats.skipped_known} unchanged, "
+            f"depth {stats.max_depth_reached})"
+        )
+        return stats.fetched - duplicates
+    
+    async def iter_archived_documents(self, source_ids: List[str]) -> AsyncIterator[Document]:
+        """Documents re-extracted from the latest archived copy of each page of the given sources.
+        
+        ``source_ids`` may contain "all". Pages are read from the web
+        scraper's page archive, so nothing is fetched; pages outside every
+        search-enabled source's crawl scope are skipped.
+        """
+        archive = web_scraper.page_archive
+        if archive is None:
+            return
+        records = await asyncio.to_thread(lambda: list(archive.iter_latest()))
+        for record in records:
+            source = self.get_source_for_url(record.url)
+            if source is None or ("all" not in source_ids and source.get("id") not in source_ids):
+                continue
+            page = await asyncio.to_thread(read_record, archive.archive_dir, record)
+            content = await web_scraper.extract(page.html, page.url, self.get_extractor(source))
+            if content is None or not content.content:
                 continue
+            fetched_at = datetime.fromtimestamp(page.fetched_at)
+            yield Document(
+                doc_id=page.url,
+                source=source.get("id"),
+                url=page.url,
+                title=content.title or page.url,
+                content=content.content,
+                created_at=fetched_at,
+                updated_at=fetched_at
+            )
+    
+    def _is_stale(self, source_id: str) -> bool:
+        """Whether a source is due for a background recrawl"""
+        crawled_at = self.index.source_crawled_at(source_id)
+        if crawled_at is None:
+            return True
+        interval_hours = self.get_index_config().get("refresh_interval_hours", DEFAULT_REFRESH_INTERVAL_HOURS)
+        return time.time() - crawled_at >= interval_hours * 3600
+    
+    async def refresh_index(self, source_ids: Optional[List[str]] = None, force: bool = False) -> Dict[str, int]:
+        """Recrawl stale (or all, with ``force``) search-enabled sources into the index"""
+        async with self._refresh_lock:
+            if source_ids is None:
+                sources = self.get_search_enabled_sources()
+            else:
+                sources = [self.get_source_by_id(sid) for sid in source_ids if self.get_source_by_id(sid)]
+            
+            indexed = {}
+            for source in sources:
+                source_id = source.get("id")
+                if not force and not self._is_stale(source_id):
+                    continue
+                try:
+                    indexed[source_id] = await self.crawl_source(source)
+                except Exception as e:
+                    print(f"Error crawling {source.get('name')}: {e}")
+            return indexed
+    
+    async def run_index_refresher(self, check_interval_seconds: int = 300):
+        """Background task that keeps the index fresh; the only network path besides cold-start fallback"""
+        while True:
+            await self.refresh_index()
+            # Pages added by live fallback searches are only in memory until saved; a clean index skips the write
+            await asyncio.to_thread(self.index.save)
+            await asyncio.sleep(check_interval_seconds)
+    
+    async def _get_changed_urls_from_sitemap(
+        self,
+        source: Dict[str, Any],
+        sitemap_url: str
+    ) -> Tuple[List[str], List[str]]:
+        """Stream the source's sitemap, splitting URLs into changed and unchanged since they were last indexed"""
+        crawl_config = self.get_crawl_config(source)
+        max_pages = crawl_config.get("max_pages", DEFAULT_MAX_CRAWL_PAGES)
         
-        # Sort all results by score
-        all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return all_results[:max_results]
+        changed = []
+        unchanged = []
+        print(f"Streaming sitemap: {sitemap_url}")
+        async with self._source_limiter(source):
+            async with aclosing(web_scraper.iter_sitemap_entries(sitemap_url)) as entries:
+                async for url, lastmod in entries:
+                    # Same spelling the crawler indexes pages under
+                    url = canonicalize_url(url, strip_params=self._strip_query_params(source))
+                    if not self._url_matches_patterns(crawl_config, url):
+                        continue
+                    indexed_at = self.index.indexed_at(url)
+                    # Without a lastmod we cannot tell, so refetch (the HTTP cache makes that cheap)
+                    if indexed_at is not None and lastmod is not None and lastmod <= indexed_at:
+                        unchanged.append(url)
+                        continue
+                    changed.append(url)
+                    if len(changed) >= max_pages:
+                        break
+        
+        print(f"{len(changed)} sitemap URLs changed, {len(unchanged)} unchanged for {source.get('name')}")
+        return changed, unchanged
+    
+    def _url_matches_patterns(self, crawl_config: Dict[str, Any], url: str) -> bool:
+        """Check a URL against the source's include/exclude patterns"""
+        include_patterns = crawl_config.get("include_patterns", [])
+        exclude_patterns = crawl_config.get("exclude_patterns", [])
+        
+        # Check include patterns
+        if include_patterns and not any(url_matches_pattern(url, pattern) for pattern in include_patterns):
+            return False
+        
+        # Check exclude patterns
+        if exclude_patterns and any(url_matches_pattern(url, pattern) for pattern in exclude_patterns):
+            return False
+        
+        return True
     
     async def _get_urls_for_source(self, source: Dict[str, Any], query: str) -> List[str]:
         """Get URLs to search for a specific source"""
         base_url = source.get("base_url")
-        crawl_config = source.get("crawl_config", {})
+        crawl_config = self.get_crawl_config(source)
         
         urls = []
         
@@ -140,7 +592,8 @@ class PublicSourcesManager:
         sitemap_url = crawl_config.get("sitemap_url")
         if sitemap_url:
             print(f"Checking sitemap: {sitemap_url}")
-            sitemap_urls = await web_scraper.discover_urls_from_sitemap(sitemap_url, max_urls=30)
+            async with self._source_limiter(source):
+                sitemap_urls = await web_scraper.discover_urls_from_sitemap(sitemap_url, max_urls=30)
             urls.extend(sitemap_urls)
         
         # Add additional URLs from config
@@ -151,68 +604,40 @@ class PublicSourcesManager:
         if not urls and base_url:
             print(f"No sitemap found, trying to discover URLs from {base_url}")
             try:
-                content = await web_scraper.fetch_and_extract(base_url)
+                content = await self._fetch_page(source, base_url, with_links=True)
                 if content:
-                    # For now, just search the main page
-                    urls = [base_url]
-                    
-                    # Could add logic here to discover more URLs from the main page
-                    # discovered_urls = web_scraper.discover_urls_from_page(base_url, content.content)
-                    # urls.extend(discovered_urls[:10])
+                    # Search the main page plus same-site pages it links to
+                    settings = self.get_crawl_settings(source, [base_url])
+                    urls = [base_url] + [
+                        link for link in content.links or []
+                        if settings.is_allowed_domain(link) and link != base_url
+                    ]
             except Exception as e:
                 print(f"Error discovering URLs from {base_url}: {e}")
                 if base_url:
                     urls = [base_url]  # Fallback to just the base URL
         
         # Filter URLs based on include/exclude patterns if configured
-        include_patterns = crawl_config.get("include_patterns", [])
-        exclude_patterns = crawl_config.get("exclude_patterns", [])
-        
-        if include_patterns or exclude_patterns:
-            filtered_urls = []
-            for url in urls:
-                # Check include patterns
-                if include_patterns:
-                    if not any(pattern in url for pattern in include_patterns):
-                        continue
-                
-                # Check exclude patterns
-                if exclude_patterns:
-                    if any(pattern in url for pattern in exclude_patterns):
-                        continue
-                
-                filtered_urls.append(url)
-            
-            urls = filtered_urls
+        strip_params = self._strip_query_params(source)
+        urls = [
+            canonicalize_url(url, strip_params=strip_params) for url in urls
+            if isinstance(url, str) and self._url_matches_patterns(crawl_config, url)
+        ]
+        urls = list(dict.fromkeys(urls))
         
         print(f"Found {len(urls)} URLs to search for {source.get('name')}")
         return [url for url in urls if url and isinstance(url, str)]  # Filter out None values
     
     def search_public_sources_sync(self, query: str, source_ids: Optional[List[str]] = None, max_results: int = 20) -> List[Dict[str, Any]]:
-        """Synchronous wrapper for async search - but run in a thread to avoid loop conflicts"""
-        import concurrent.futures
-        import threading
-        
-        def run_async_search():
-            # Create a new event loop for this thread
-            new_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(new_loop)
-            try:
-                return new_loop.run_until_complete(self.search_public_sources(query, source_ids, max_results))
-            finally:
-                new_loop.close()
-        
-        # Run the async search in a separate thread to avoid event loop conflicts
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_async_search)
-            try:
-                return future.result(timeout=30)  # 30 second timeout
-            except concurrent.futures.TimeoutError:
-                print(f"Search timeout for query: {query}")
-                return []
-            except Exception as e:
-                print(f"Error in threaded search: {e}")
-                return []
+        """Synchronous wrapper for async search, run on the shared background search loop"""
+        try:
+            return search_runtime.run(self.search_public_sources(query, source_ids, max_results), timeout=30)
+        except concurrent.futures.TimeoutError:
+            print(f"Search timeout for query: {query}")
+            return []
+        except Exception as e:
+            print(f"Error in background search: {e}")
+            return []
     
     def add_source(self, source_config: Dict[str, Any]) -> bool:
         """Add a new public source to the configuration"""
@@ -271,3 +696,5 @@ class PublicSourcesManager:
 
 # Global instance
 public_sources_manager = PublicSourcesManager()
+# The background search loop has its own scraper session; close it before the loop stops
+search_runtime.add_shutdown_hook(web_scraper.close_session)
@@ -0,0 +1,509 @@
+import heapq
+import math
+import os
+from collections import Counter
+from operator import itemgetter
+from typing import Any, Collection, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .analysis import Analyzer, default_analyzer
+from .vector_store import StringColumn, open_store, write_store
+
+# BM25 term-frequency saturation; higher values let repeated terms keep adding score
+K1 = 1.2
+# Field weights and length normalization: titles are short and each word in them matters more
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+TITLE_B = 0.5
+BODY_B = 0.75
+# Reciprocal-rank fusion damping (Cormack et al., 2009); larger values flatten the rank curve
+RRF_K = 60
+LEXICAL_INDEX_FORMAT_VERSION = 1
+
+
+def idf(doc_count: int, doc_freq: int) -> float:
+    """BM25 inverse document frequency (the +1 form, never negative)"""
+    return math.log(1.0 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def top_k(scores: Dict[Hashable, float], k: int) -> List[Tuple[Hashable, float]]:
+    """The ``k`` best-scoring items, best first, via a bounded heap"""
+    return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+
+class BM25F:
+    """BM25F scoring over a title and a body field.
+
+    Per-field term frequencies are length-normalized and weighted, summed into
+    one pseudo-frequency, then saturated once with ``k1`` (Robertson et al.,
+    "Simple BM25 extension to multiple weighted fields"). Length norms depend
+    only on a document and the corpus averages, so callers precompute them
+    once per corpus change and reuse them across queries.
+    """
+
+    def __init__(
+        self,
+        k1: float = K1,
+        title_weight: float = TITLE_WEIGHT,
+        body_weight: float = BODY_WEIGHT,
+        title_b: float = TITLE_B,
+        body_b: float = BODY_B
+    ):
+        self.k1 = k1
+        self.title_weight = title_weight
+        self.body_weight = body_weight
+        self.title_b = title_b
+        self.body_b = body_b
+
+    def length_norms(
+        self,
+        title_length: int,
+        body_length: int,
+        avg_title_length: float,
+        avg_body_length: float
+    ) -> Tuple[float, float]:
+        """Field weight divided by the field's length normalization, for one document"""
+        title_norm = 1.0 - self.title_b + self.title_b * title_length / (avg_title_length or 1.0)
+        body_norm = 1.0 - self.body_b + self.body_b * body_length / (avg_body_length or 1.0)
+        return self.title_weight / title_norm, self.body_weight / body_norm
+
+    def accumulate(
+        self,
+        scores: Dict[Hashable, float],
+        term_idf: float,
+        postings: Iterable[Tuple[Hashable, Sequence[int]]],
+        norms: Dict[Hashable, Tuple[float, float]]
+    ):
+        """Add one query term's contribution for every document in its postings.
+
+        ``postings`` yields ``(doc, (title_tf, body_tf))`` and ``norms`` maps a
+        doc to its ``length_norms``; docs missing from ``norms`` are skipped,
+        which is how callers filter (e.g. to one source).
+        """
+        k1 = self.k1
+        for doc, (title_tf, body_tf) in postings:
+            doc_norms = norms.get(doc)
+            if doc_norms is None:
+                continue
+            tf = title_tf * doc_norms[0] + body_tf * doc_norms[1]
+            scores[doc] = scores.get(doc, 0.0) + term_idf * tf / (k1 + tf)
+
+    def accumulate_existing(
+        self,
+        scores: Dict[Hashable, float],
+        term_idf: float,
+        postings: Mapping[Hashable, Sequence[int]],
+        norms: Dict[Hashable, Tuple[float, float]]
+    ):
+        """Like ``accumulate``, but only for documents that already have a score"""
+        k1 = self.k1
+        if len(postings) < len(scores):
+            matches = [(doc, tfs) for doc, tfs in postings.items() if doc in scores]
+        else:
+            matches = [(doc, postings[doc]) for doc in scores if doc in postings]
+        for doc, (title_tf, body_tf) in matches:
+            doc_norms = norms[doc]
+            tf = title_tf * doc_norms[0] + body_tf * doc_norms[1]
+            scores[doc] += term_idf * tf / (k1 + tf)
+
+    def top_k(
+        self,
+        terms: List[Tuple[float, Mapping[Hashable, Sequence[int]]]],
+        norms: Dict[Hashable, Tuple[float, float]],
+        k: int
+    ) -> List[Tuple[Hashable, float]]:
+        """Exact top ``k`` documents for a query given as ``(idf, postings)`` per term.
+
+        Uses MaxScore pruning: a term adds less than its IDF to any document,
+        so terms are scored rarest first, and once the k-th best score so far
+        reaches the summed IDF of the terms still to go, no document outside
+        the current candidates can make the top ``k``. The remaining (common,
+        long-postings) terms then only update existing candidates instead of
+        walking their whole postings.
+        """
+        terms = sorted(terms, key=itemgetter(0), reverse=True)
+        remaining = sum(term_idf for term_idf, _ in terms)
+        scores: Dict[Hashable, float] = {}
+        pruning = False
+        for term_idf, postings in terms:
+            if not pruning and len(scores) >= k > 0:
+                pruning = heapq.nlargest(k, scores.values())[-1] >= remaining
+            if pruning:
+                self.accumulate_existing(scores, term_idf, postings, norms)
+            else:
+                self.accumulate(scores, term_idf, postings.items(), norms)
+            remaining -= term_idf
+        return top_k(scores, k)
+
+
+def rank_documents(
+    documents: Sequence[Tuple[str, str]],
+    query: str,
+    limit: int,
+    scorer: BM25F = BM25F(),
+    analyzer: Analyzer = default_analyzer
+) -> List[Tuple[int, float]]:
+    """Rank a small ad-hoc set of ``(title, body)`` documents against a query.
+
+    Each document is analyzed once, so the cost is linear in the total text
+    size rather than in text size times query words. Returns
+    ``(position, score)`` pairs for documents matching at least one term.
+    """
+    query_terms = list(dict.fromkeys(analyzer.analyze(query)))
+    if not query_terms or not documents:
+        return []
+
+    postings: Dict[str, Dict[int, Tuple[int, int]]] = {term: {} for term in query_terms}
+    lengths = []
+    for position, (title, body) in enumerate(documents):
+        title_counts = Counter(analyzer.analyze(title))
+        body_counts = Counter(analyzer.analyze(body))
+        lengths.append((sum(title_counts.values()), sum(body_counts.values())))
+        for term in query_terms:
+            title_tf, body_tf = title_counts.get(term, 0), body_counts.get(term, 0)
+            if title_tf or body_tf:
+                postings[term][position] = (title_tf, body_tf)
+
+    avg_title = sum(length[0] for length in lengths) / len(lengths)
+    avg_body = sum(length[1] for length in lengths) / len(lengths)
+    norms = {
+        position: scorer.length_norms(title_length, body_length, avg_title, avg_body)
+        for position, (title_length, body_length) in enumerate(lengths)
+    }
+
+    terms = [(idf(len(documents), len(entries)), entries) for entries in postings.values() if entries]
+    return scorer.top_k(terms, norms, limit)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Tuple[Sequence[Hashable], float]],
+    k: int = RRF_K
+) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked lists given as ``(keys best first, weight)`` pairs.
+
+    Each key scores ``sum(weight / (k + rank))`` over the lists it appears in
+    (ranks start at 1), so only rank positions matter and retrievers with
+    incomparable score scales can be combined. Returns keys best first.
+    """
+    scores: Dict[Hashable, float] = {}
+    for keys, weight in rankings:
+        if weight <= 0:
+            continue
+        for rank, key in enumerate(keys, 1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=itemgetter(1), reverse=True)
+
+
+class _StoredPostings:
+    """Read-only postings of a ``BM25Index`` saved to a columnar store.
+
+    Documents are rows in key order; each term's postings are a slice of
+    ``(row, title_tf, body_tf)`` columns. Removing a document only masks
+    its row until the next save.
+    """
+
+    def __init__(self, header: Dict[str, Any], columns: Dict[str, np.ndarray]):
+        self.keys = StringColumn(columns["key_offsets"], columns["key_data"])
+        self.lengths = columns["lengths"]
+        self.terms = StringColumn(columns["term_offsets"], columns["term_data"])
+        self.posting_offsets = columns["posting_offsets"]
+        self.posting_rows = columns["posting_rows"]
+        self.posting_tfs = columns["posting_tfs"]
+        self.removed: Optional[np.ndarray] = None
+        self.count = len(self.keys)
+        self.title_length_total = int(header["title_length_total"])
+        self.body_length_total = int(header["body_length_total"])
+
+    def live_rows(self) -> np.ndarray:
+        if self.removed is None:
+            return np.arange(len(self.keys), dtype=np.int64)
+        return np.flatnonzero(~self.removed)
+
+    def row(self, key: Hashable) -> Optional[int]:
+        if not isinstance(key, str):
+            return None
+        row = self.keys.find(key)
+        if row is None or (self.removed is not None and self.removed[row]):
+            return None
+        return row
+
+    def remove(self, row: int):
+        if self.removed is None:
+            self.removed = np.zeros(len(self.keys), dtype=bool)
+        self.removed[row] = True
+        self.count -= 1
+        self.title_length_total -= int(self.lengths[row, 0])
+        self.body_length_total -= int(self.lengths[row, 1])
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """``(rows, tfs)`` of the live documents containing ``term``"""
+        index = self.terms.find(term)
+        if index is None:
+            return self.posting_rows[:0], self.posting_tfs[:0]
+        start, end = int(self.posting_offsets[index]), int(self.posting_offsets[index + 1])
+        rows, tfs = self.posting_rows[start:end], self.posting_tfs[start:end]
+        if self.removed is not None:
+            live = ~self.removed[rows]
+            rows, tfs = rows[live], tfs[live]
+        return rows, tfs
+
+    def top_k(
+        self,
+        terms: List[Tuple[float, np.ndarray, np.ndarray]],
+        norms: Tuple[np.ndarray, np.ndarray],
+        k1: float,
+        k: int
+    ) -> List[Tuple[int, float]]:
+        """Top ``k`` rows for ``(idf, rows, tfs)`` terms, scored like ``BM25F.accumulate`` but vectorized"""
+        if k <= 0:
+            return []
+        scores = np.zeros(len(self.keys))
+        for term_idf, rows, tfs in terms:
+            tf = tfs[:, 0] * norms[0][rows] + tfs[:, 1] * norms[1][rows]
+            scores[rows] += term_idf * tf / (k1 + tf)
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(row), float(scores[row])) for row in order]
+
+
+class BM25Index:
+    """BM25F index over keyed ``(title, body)`` documents.
+
+    Documents added since the index was opened live in in-memory postings;
+    ``save`` writes everything to a columnar store that ``load`` memory-maps
+    again, so reopening a saved index re-analyzes nothing. Saved keys must
+    be strings.
+    """
+
+    def __init__(self, analyzer: Analyzer = default_analyzer, scorer: Optional[BM25F] = None):
+        self.analyzer = analyzer
+        self.scorer = scorer or BM25F()
+        self.metadata: Dict[str, Any] = {}
+        self._postings: Dict[str, Dict[Hashable, Tuple[int, int]]] = {}
+        self._terms: Dict[Hashable, List[str]] = {}
+        self._lengths: Dict[Hashable, Tuple[int, int]] = {}
+        self._title_length_total = 0
+        self._body_length_total = 0
+        self._norms: Optional[Dict[Hashable, Tuple[float, float]]] = None
+        self._stored: Optional[_StoredPostings] = None
+        self._stored_norms: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._lengths) + (self._stored.count if self._stored is not None else 0)
+
+    def add(self, key: Hashable, title: str, body: str):
+        """Add or replace a document"""
+        self.remove(key)
+        title_counts = Counter(self.analyzer.analyze(title))
+        body_counts = Counter(self.analyzer.analyze(body))
+        for term in title_counts.keys() | body_counts.keys():
+            self._postings.setdefault(term, {})[key] = (title_counts.get(term, 0), body_counts.get(term, 0))
+        self._terms[key] = list(title_counts.keys() | body_counts.keys())
+        lengths = (sum(title_counts.values()), sum(body_counts.values()))
+        self._lengths[key] = lengths
+        self._title_length_total += lengths[0]
+        self._body_length_total += lengths[1]
+        self._invalidate_norms()
+
+    def remove(self, key: Hashable) -> bool:
+        lengths = self._lengths.pop(key, None)
+        if lengths is None:
+            row = self._stored.row(key) if self._stored is not None else None
+            if row is None:
+                return False
+            self._stored.remove(row)
+            self._invalidate_norms()
+            return True
+        for term in self._terms.pop(key):
+            entries = self._postings[term]
+            del entries[key]
+            if not entries:
+                del self._postings[term]
+        self._title_length_total -= lengths[0]
+        self._body_length_total -= lengths[1]
+        self._invalidate_norms()
+        return True
+
+    def _invalidate_norms(self):
+        self._norms = None
+        self._stored_norms = None
+
+    def search(self, query: str, k: int) -> List[Tuple[Hashable, float]]:
+        """The ``k`` best-scoring keys for a query, best first"""
+        count = len(self)
+        if not count:
+            return []
+        stored = self._stored
+        title_total, body_total = self._title_length_total, self._body_length_total
+        if stored is not None:
+            title_total += stored.title_length_total
+            body_total += stored.body_length_total
+        avg_title, avg_body = title_total / count, body_total / count
+        if self._norms is None:
+            self._norms = {
+                key: self.scorer.length_norms(title_length, body_length, avg_title, avg_body)
+                for key, (title_length, body_length) in self._lengths.items()
+            }
+
+        # Document frequencies, and so IDF, span the saved and the in-memory documents
+        terms, stored_terms = [], []
+        for term in dict.fromkeys(self.analyzer.analyze(query)):
+            postings = self._postings.get(term, {})
+            rows, tfs = stored.postings(term) if stored is not None else ((), ())
+            if not postings and not len(rows):
+                continue
+            term_idf = idf(count, len(postings) + len(rows))
+            if postings:
+                terms.append((term_idf, postings))
+            if len(rows):
+                stored_terms.append((term_idf, rows, tfs))
+
+        results = self.scorer.top_k(terms, self._norms, k) if terms else []
+        if stored_terms:
+            if self._stored_norms is None:
+                self._stored_norms = self.scorer.length_norms(
+                    stored.lengths[:, 0], stored.lengths[:, 1], avg_title, avg_body
+                )
+            stored_terms.sort(key=itemgetter(0), reverse=True)
+            stored_results = stored.top_k(stored_terms, self._stored_norms, self.scorer.k1, k)
+            results = heapq.nlargest(
+                k, results + [(stored.keys[row], score) for row, score in stored_results], key=itemgetter(1)
+            )
+        return results
+
+    def save(self, path: str, exclude: Collection[Hashable] = (), metadata: Optional[Dict[str, Any]] = None):
+        """Write the index to ``path`` as a columnar store, then serve saved documents from it.
+
+        Documents in ``exclude`` are left out of the file but stay in the
+        index, in memory. ``metadata`` is stored in the header and comes
+        back as ``metadata`` on ``load``.
+        """
+        exclude = set(exclude)
+        stored = self._stored
+        memory_keys = [key for key in self._lengths if key not in exclude]
+        stored_rows = stored.live_rows() if stored is not None else np.empty(0, dtype=np.int64)
+        stored_key_list = stored.keys.to_list() if stored is not None else []
+        keys = [stored_key_list[row] for row in stored_rows.tolist()] + memory_keys
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        new_rows = np.empty(len(keys), dtype=np.int64)
+        new_rows[order] = np.arange(len(keys), dtype=np.int64)
+        stored_count = len(stored_rows)
+
+        lengths = np.zeros((len(keys), 2), dtype=np.int32)
+        term_list = sorted(set(self._postings) | set(stored.terms.to_list() if stored is not None else ()))
+        term_ids = {term: term_id for term_id, term in enumerate(term_list)}
+        posting_terms, posting_rows, posting_tfs = [], [], []
+        if stored is not None:
+            lengths[new_rows[:stored_count]] = stored.lengths[stored_rows]
+            row_map = np.full(len(stored.keys), -1, dtype=np.int64)
+            row_map[stored_rows] = new_rows[:stored_count]
+            rows = row_map[stored.posting_rows]
+            live = rows >= 0
+            stored_term_ids = np.array([term_ids[term] for term in stored.terms.to_list()], dtype=np.int64)
+            posting_terms.append(np.repeat(stored_term_ids, np.diff(stored.posting_offsets).astype(np.int64))[live])
+            posting_rows.append(rows[live])
+            posting_tfs.append(np.asarray(stored.posting_tfs)[live])
+        if memory_keys:
+            memory_rows = dict(zip(memory_keys, new_rows[stored_count:].tolist()))
+            lengths[new_rows[stored_count:]] = [self._lengths[key] for key in memory_keys]
+            entries = [
+                (term_ids[term], memory_rows[key], tfs)
+                for term, postings in self._postings.items()
+                for key, tfs in postings.items() if key in memory_rows
+            ]
+            if entries:
+                posting_terms.append(np.array([entry[0] for entry in entries], dtype=np.int64))
+                posting_rows.append(np.array([entry[1] for entry in entries], dtype=np.int64))
+                posting_tfs.append(np.array([entry[2] for entry in entries], dtype=np.int32))
+
+        if posting_terms:
+            term_column = np.concatenate(posting_terms)
+            row_column = np.concatenate(posting_rows)
+            tf_column = np.concatenate(posting_tfs).astype(np.int32).reshape(-1, 2)
+            sort = np.lexsort((row_column, term_column))
+            term_column, row_column, tf_column = term_column[sort], row_column[sort], tf_column[sort]
+        else:
+            term_column = row_column = np.empty(0, dtype=np.int64)
+            tf_column = np.empty((0, 2), dtype=np.int32)
+        # Terms whose every document was removed or excluded are dropped
+        counts = np.bincount(term_column, minlength=len(term_list))
+        used = np.flatnonzero(counts)
+        posting_offsets = np.zeros(len(used) + 1, dtype=np.int64)
+        np.cumsum(counts[used], out=posting_offsets[1:])
+
+        key_offsets, key_data = StringColumn.encode([keys[position] for position in order])
+        term_offsets, term_data = StringColumn.encode([term_list[term_id] for term_id in used.tolist()])
+        header = {
+            "version": LEXICAL_INDEX_FORMAT_VERSION,
+            "analyzer": self.analyzer.config,
+            "count": len(keys),
+            "title_length_total": int(lengths[:, 0].sum()),
+            "body_length_total": int(lengths[:, 1].sum()),
+            "metadata": metadata or {},
+        }
+        write_store(path, {
+            "key_offsets": key_offsets,
+            "key_data": key_data,
+            "lengths": lengths,
+            "term_offsets": term_offsets,
+            "term_data": term_data,
+            "posting_offsets": posting_offsets,
+            "posting_rows": row_column,
+            "posting_tfs": tf_column,
+        }, header)
+
+        # Excluded documents carry over, in memory, onto the saved file
+        kept = [
+            (key, {term: self._postings[term][key] for term in self._terms[key]}, self._lengths[key])
+            for key in exclude if key in self._lengths
+        ]
+        self._open(path)
+        self.metadata = metadata or {}
+        for key, postings, key_lengths in kept:
+            for term, tfs in postings.items():
+                self._postings.setdefault(term, {})[key] = tfs
+            self._terms[key] = list(postings)
+            self._lengths[key] = key_lengths
+            self._title_length_total += key_lengths[0]
+            self._body_length_total += key_lengths[1]
+
+    def _open(self, path: str) -> Dict[str, Any]:
+        header, columns = open_store(path)
+        self._stored = _StoredPostings(header, columns)
+        self._postings, self._terms, self._lengths = {}, {}, {}
+        self._title_length_total = self._body_length_total = 0
+        self._invalidate_norms()
+        return header
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        analyzer: Analyzer = default_analyzer,
+        scorer: Optional[BM25F] = None
+    ) -> Optional["BM25Index"]:
+        """Open an index saved with ``save``.
+
+        Returns None when there is none, or when it was saved by another
+        format version or with a different analyzer, whose terms would not
+        match this one's queries.
+        """
+        if not os.path.exists(path):
+            return None
+        index = cls(analyzer, scorer)
+        try:
+            header = index._open(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading lexical index from {path}: {e}")
+            return None
+        if header.get("version") != LEXICAL_INDEX_FORMAT_VERSION:
+            print(f"Ignoring lexical index at {path}: unsupported version {header.get('version')}")
+            return None
+        if header.get("analyzer") != analyzer.config:
+            print(f"Ignoring lexical index at {path}: saved with a different analyzer")
+            return None
+        index.metadata = header.get("metadata", {})
+        return index
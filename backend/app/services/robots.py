@@ -0,0 +1,169 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+# Retry sooner when robots.txt could not be read and we are disallowing everything
+ERROR_TTL_SECONDS = 10 * 60
+# Cap absurd Crawl-delay values so one host cannot stall a crawl for hours
+MAX_CRAWL_DELAY_SECONDS = 30.0
+MAX_ROBOTS_BYTES = 512 * 1024
+
+
+def _compile_rule(path_pattern: str) -> Pattern:
+    """Compile a robots.txt path pattern (``*`` wildcard, ``$`` end anchor) to a regex"""
+    anchored = path_pattern.endswith('$')
+    if anchored:
+        path_pattern = path_pattern[:-1]
+    regex = '.*'.join(re.escape(part) for part in path_pattern.split('*'))
+    return re.compile(regex + ('$' if anchored else ''))
+
+
+@dataclass
+class RobotsRules:
+    """Compiled allow/disallow rules for one host and user agent"""
+    # (pattern length, allow?, compiled pattern) - longest match wins, allow wins ties
+    rules: List[Tuple[int, bool, Pattern]] = field(default_factory=list)
+    crawl_delay: Optional[float] = None
+    sitemaps: List[str] = field(default_factory=list)
+    disallow_all: bool = False
+
+    def is_allowed(self, url: str) -> bool:
+        if self.disallow_all:
+            return False
+        parts = urlsplit(url)
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        if path == '/robots.txt':
+            return True
+
+        best_length = -1
+        allowed = True
+        for length, allow, pattern in self.rules:
+            if length < best_length:
+                continue
+            if pattern.match(path):
+                if length > best_length or allow:
+                    allowed = allow
+                best_length = length
+        return allowed
+
+
+def parse_robots(text: str, product_token: str) -> RobotsRules:
+    """Parse robots.txt, keeping the group that best matches our crawler.
+
+    Groups naming our product token (case-insensitively) take precedence over
+    the ``*`` group, as in RFC 9309.
+    """
+    agent_token = product_token.lower()
+    groups: Dict[str, List[Tuple[str, str]]] = {}
+    sitemaps = []
+
+    current_agents: List[str] = []
+    in_rules = False
+    for raw_line in text.splitlines():
+        line = raw_line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        key, value = line.split(':', 1)
+        key = key.strip().lower()
+        value = value.strip()
+
+        if key == 'sitemap':
+            if value:
+                sitemaps.append(value)
+            continue
+        if key == 'user-agent':
+            # Consecutive user-agent lines share one group
+            if in_rules:
+                current_agents = []
+                in_rules = False
+            current_agents.append(value.lower())
+            continue
+        if key in ('allow', 'disallow', 'crawl-delay'):
+            in_rules = True
+            for agent in current_agents:
+                groups.setdefault(agent, []).append((key, value))
+
+    # The product token must match exactly (case-insensitively); "bot" does not select "IntelliSearchBot"
+    matching = [agent for agent in groups if agent and agent != '*' and agent == agent_token]
+    if matching:
+        entries = [entry for agent in matching for entry in groups[agent]]
+    else:
+        entries = groups.get('*', [])
+
+    rules = RobotsRules(sitemaps=sitemaps)
+    for key, value in entries:
+        if key == 'crawl-delay':
+            try:
+                rules.crawl_delay = min(float(value), MAX_CRAWL_DELAY_SECONDS)
+            except ValueError:
+                continue
+        elif value:
+            # An empty Disallow means "allow everything" and adds no rule
+            rules.rules.append((len(value), key == 'allow', _compile_rule(value)))
+    return rules
+
+
+class RobotsCache:
+    """Fetches and caches robots.txt rules per host with a TTL.
+
+    Concurrent lookups for the same host share a single fetch. Following
+    RFC 9309, a 4xx response allows everything while a 5xx or network error
+    disallows the host until a shorter retry TTL expires.
+    """
+
+    def __init__(self, product_token: str, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.product_token = product_token
+        self.ttl_seconds = ttl_seconds
+        self._rules: Dict[str, Tuple[float, RobotsRules]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    async def get_rules(self, session: aiohttp.ClientSession, url: str) -> RobotsRules:
+        """Rules for the host serving ``url``"""
+        origin = self._origin(url)
+        cached = self._rules.get(origin)
+        if cached and cached[0] > time.time():
+            return cached[1]
+
+        task = self._pending.get(origin)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._fetch(session, origin))
+            self._pending[origin] = task
+            task.add_done_callback(lambda _: self._pending.pop(origin, None))
+        return await asyncio.shield(task)
+
+    async def is_allowed(self, session: aiohttp.ClientSession, url: str) -> bool:
+        """Whether robots.txt lets us fetch ``url``"""
+        rules = await self.get_rules(session, url)
+        return rules.is_allowed(url)
+
+    async def _fetch(self, session: aiohttp.ClientSession, origin: str) -> RobotsRules:
+        ttl = self.ttl_seconds
+        try:
+            async with session.get(f"{origin}/robots.txt") as response:
+                if response.status >= 500:
+                    print(f"robots.txt for {origin} returned HTTP {response.status}, disallowing for now")
+                    rules = RobotsRules(disallow_all=True)
+                    ttl = ERROR_TTL_SECONDS
+                elif response.status >= 400:
+                    rules = RobotsRules()
+                else:
+                    body = await response.content.read(MAX_ROBOTS_BYTES)
+                    rules = parse_robots(body.decode('utf-8', errors='replace'), self.product_token)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error fetching robots.txt for {origin}: {e}")
+            rules = RobotsRules(disallow_all=True)
+            ttl = ERROR_TTL_SECONDS
+
+        self._rules[origin] = (time.time() + ttl, rules)
+        return rules
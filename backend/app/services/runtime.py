@@ -0,0 +1,156 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Coroutine, Deque, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SearchRuntime:
+    """A long-lived event loop on a background thread for synchronous callers.
+
+    Scripts and other sync code submit coroutines here instead of spinning
+    up a thread and a fresh loop per call, so they share one warm aiohttp
+    session (``WebScraper`` keeps one per loop) and its connection pool.
+    The loop starts on first use and is stopped at interpreter exit.
+    """
+
+    def __init__(self, name: str = "search-runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop, started: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        loop.run_forever()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the background loop if it is not running yet and return it"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+                thread = threading.Thread(target=self._run_loop, args=(loop, started), name=self.name, daemon=True)
+                thread.start()
+                started.wait()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[None]]):
+        """Register a coroutine function to run on the runtime loop before it stops"""
+        self._shutdown_hooks.append(hook)
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+        """Schedule a coroutine on the runtime loop from any thread"""
+        loop = self.start()
+        if self._thread is threading.current_thread():
+            coro.close()
+            raise RuntimeError("SearchRuntime.submit() called from the runtime loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the runtime loop and block for its result.
+
+        On timeout the coroutine is cancelled and ``TimeoutError`` is raised.
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 5.0):
+        """Run the shutdown hooks, then stop the loop and its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            for hook in self._shutdown_hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    print(f"Error in search runtime shutdown hook: {e}")
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+        except Exception as e:
+            print(f"Error shutting down search runtime: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+class SharedLimiter:
+    """A concurrency limit shared by coroutines on any number of event loops.
+
+    ``asyncio.Semaphore`` belongs to a single loop, so request handlers on
+    the server loop and sync callers on the search runtime loop would each
+    get their own limit. This counts slots under a thread lock instead; a
+    released slot is handed straight to the oldest waiter, on that
+    waiter's own loop.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_use = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_use < self.limit and not self._waiters:
+                self._in_use += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed over; pass it on unless _grant will
+            if not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def _grant(self, future: asyncio.Future):
+        """Give a released slot to a waiter, or pass it on if the waiter gave up"""
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    continue  # The waiter's loop is closed
+            self._in_use -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+# Create a global instance
+search_runtime = SearchRuntime()
+atexit.register(search_runtime.stop)
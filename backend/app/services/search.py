@@ -1,55 +1,469 @@
-import time
-from typing import List, Dict, Any, Optional
 import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, List, Dict, Any, MutableMapping, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.chunk_store import LayeredDict, open_chunk_store, write_chunk_store
+from app.services.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, TextSource, batched, chunk_document
+from app.services.ranking import BM25Index, reciprocal_rank_fusion
+from app.services.vector_index import DEFAULT_NPROBE, DEFAULT_QUANTIZATION, IVFIndex
+from app.models.schemas import Document, DocumentChunk, IngestionJob, SearchResult
+from datetime import date, datetime
 
-from app.services.llm import AWSBedrockEmbeddings
-from app.models.schemas import SearchResult
-from datetime import datetime
+if TYPE_CHECKING:
+    # Only for annotations; the Bedrock client stack is heavy and the service just calls embed_*
+    from app.services.llm import AWSBedrockEmbeddings
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', '..')
+DEFAULT_VECTOR_INDEX_PATH = os.path.join('data', 'vectors')
+# Chunks fetched per requested result, since several may belong to one document or be filtered out
+CHUNK_OVERFETCH = 4
+# Filters apply after fusion; when they leave fewer than top_k results the legs are re-run this much
+# deeper, up to MAX_FETCH_DEPTH chunks per leg
+FETCH_DEPTH_GROWTH = 4
+MAX_FETCH_DEPTH = 4096
+SNIPPET_CHARS = 300
+DEFAULT_MAX_CHUNKS_PER_QUERY = 20
+# Chunks embedded per embed_documents call while indexing
+EMBED_BATCH_SIZE = 32
+CHUNK_STORE_FILE = "chunks.store"
+LEXICAL_STORE_FILE = "lexical.store"
+# Metadata format before the chunk store; read once and replaced on the next save
+LEGACY_METADATA_FILE = "chunks.json.gz"
+
+
+@dataclass
+class _StagedVersion:
+    """Chunks of a document version that is still being indexed.
+    
+    ``replaced`` journals each existing chunk the version overwrote, with
+    its vector, so a failed re-index can put it back. A closed version was
+    swapped in or rolled back and takes no more batches.
+    """
+    chunk_ids: List[str] = field(default_factory=list)
+    replaced: Dict[str, Tuple[Dict[str, Any], Optional[np.ndarray]]] = field(default_factory=dict)
+    closed: bool = False
 
 
 class SearchService:
-    """Search service with hybrid BM25 + vector search"""
+    """Search service with hybrid BM25 + vector search.
+    
+    Chunks are indexed twice: in a BM25F index over document title and chunk
+    text, and in the IVF vector index over their embeddings. A query runs
+    both retrievers concurrently and fuses their rankings with weighted
+    reciprocal-rank fusion, so hybrid latency tracks the slower leg.
+    """
     
-    def __init__(self, embeddings: AWSBedrockEmbeddings):
+    def __init__(
+        self,
+        embeddings: "AWSBedrockEmbeddings",
+        index_path: str = DEFAULT_VECTOR_INDEX_PATH,
+        nprobe: int = DEFAULT_NPROBE,
+        vector_quantization: str = DEFAULT_QUANTIZATION,
+        max_chunks_per_query: int = DEFAULT_MAX_CHUNKS_PER_QUERY,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        content_defined_chunking: bool = True
+    ):
         self.embeddings = embeddings
+        self.max_chunks_per_query = max_chunks_per_query
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.content_defined_chunking = content_defined_chunking
+        if not os.path.isabs(index_path):
+            index_path = os.path.join(BACKEND_DIR, index_path)
+        self.index_path = os.path.normpath(index_path)
+        self.vector_index = IVFIndex.load(self.index_path, nprobe=nprobe, quantization=vector_quantization)
+        self.lexical_index = BM25Index()
+        self._lock = threading.RLock()
+        # chunk id -> chunk fields, doc id -> document fields and its chunk ids
+        self._chunks: MutableMapping[str, Dict[str, Any]] = LayeredDict()
+        self._documents: MutableMapping[str, Dict[str, Any]] = LayeredDict()
+        # Chunks of document versions still being indexed; searches skip them
+        self._staged: Set[str] = set()
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._ingestion_tasks: Set[asyncio.Task] = set()
+        self._query_day = date.today()
+        self._queries_today = 0
+        self._query_time_ms_today = 0
+        self._load_metadata()
+    
+    def _load_metadata(self):
+        """Open the chunk metadata and lexical index saved next to the vector index.
+        
+        Both are memory-mapped column stores, so opening them takes the same
+        time at any corpus size. The lexical index is only rebuilt from the
+        stored chunk text when it is missing, belongs to another save of the
+        chunk store, or was built with a different analyzer.
+        """
+        store_path = os.path.join(self.index_path, CHUNK_STORE_FILE)
+        if not os.path.exists(store_path):
+            self._load_legacy_metadata()
+            return
+        try:
+            header, chunks, documents = open_chunk_store(store_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading chunk metadata from {self.index_path}: {e}")
+            return
+        self._chunks = LayeredDict(chunks)
+        self._documents = LayeredDict(documents)
+        lexical_index = BM25Index.load(os.path.join(self.index_path, LEXICAL_STORE_FILE))
+        if lexical_index is not None and lexical_index.metadata.get("generation") == header.get("generation"):
+            self.lexical_index = lexical_index
+        else:
+            print(f"Rebuilding lexical index for {len(self._chunks)} chunks in {self.index_path}")
+            self._rebuild_lexical_index()
+    
+    def _load_legacy_metadata(self):
+        path = os.path.join(self.index_path, LEGACY_METADATA_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading chunk metadata from {self.index_path}: {e}")
+            return
+        self._chunks = LayeredDict(changes=metadata.get("chunks", {}))
+        self._documents = LayeredDict(changes=metadata.get("documents", {}))
+        self._rebuild_lexical_index()
+    
+    def _rebuild_lexical_index(self):
+        self.lexical_index = BM25Index()
+        titles: Dict[str, str] = {}
+        for chunk_id, chunk in self._chunks.items():
+            doc_id = chunk["doc_id"]
+            if doc_id not in titles:
+                titles[doc_id] = self._documents[doc_id]["title"]
+            self.lexical_index.add(chunk_id, titles[doc_id], chunk["content"])
+    
+    def save(self):
+        """Persist the vector index, chunk metadata and lexical index, then serve from the saved files"""
+        with self._lock:
+            self.vector_index.save(self.index_path)
+            # Ties the lexical store to this chunk store, so a crash between the two writes is detected
+            generation = uuid.uuid4().hex
+            store_path = os.path.join(self.index_path, CHUNK_STORE_FILE)
+            # Chunks of an unfinished re-index belong to no saved document version
+            staged = {chunk_id: self._chunks[chunk_id] for chunk_id in self._staged}
+            write_chunk_store(
+                store_path,
+                ((chunk_id, chunk) for chunk_id, chunk in self._chunks.items() if chunk_id not in self._staged),
+                self._documents.items(),
+                {"generation": generation}
+            )
+            _, chunks, documents = open_chunk_store(store_path)
+            self._chunks = LayeredDict(chunks, staged)
+            self._documents = LayeredDict(documents)
+            self.lexical_index.save(
+                os.path.join(self.index_path, LEXICAL_STORE_FILE), exclude=self._staged,
+                metadata={"generation": generation}
+            )
+        legacy_path = os.path.join(self.index_path, LEGACY_METADATA_FILE)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+    
+    async def index_document(
+        self,
+        document: Document,
+        chunks: Optional[Iterable[DocumentChunk]] = None,
+        source: Optional[TextSource] = None
+    ) -> int:
+        """Add or replace a document's chunks, embedding any that have no embedding yet.
+        
+        Without ``chunks`` the document is chunked with the service's chunk
+        settings, reading ``source`` instead of ``document.content`` when
+        given. Chunks are embedded and indexed ``EMBED_BATCH_SIZE`` at a
+        time, so a large document is never held in memory all at once.
+        
+        Re-indexing is incremental: a chunk whose id and text match one
+        already indexed for the document is kept as is, so only new or
+        changed chunks are embedded and indexed, and chunks that are gone
+        are removed. Returns the number of chunks indexed.
+        
+        Each batch of new chunks goes into the indexes as soon as it is
+        embedded but stays hidden from searches until the whole version is
+        swapped in, so searches never see a half-indexed document. If
+        chunking or embedding fails part-way, the batches already added are
+        taken out again and any chunk they overwrote is restored, leaving
+        the previous version in place.
+        """
+        if chunks is None:
+            chunks = chunk_document(
+                document, self.chunk_size, self.chunk_overlap, source, self.content_defined_chunking
+            )
+        
+        with self._lock:
+            previous = self._documents.get(document.doc_id)
+            previous_ids = set(previous["chunk_ids"]) if previous else set()
+        
+        chunk_ids: List[str] = []
+        # Unchanged chunks only need their new position, applied when the version is swapped in
+        kept: List[Tuple[str, int, int, int]] = []
+        staged = _StagedVersion()
+        try:
+            for batch in batched(chunks, EMBED_BATCH_SIZE):
+                changed: List[DocumentChunk] = []
+                with self._lock:
+                    for chunk in batch:
+                        chunk_ids.append(chunk.chunk_id)
+                        existing = self._chunks.get(chunk.chunk_id) if chunk.chunk_id in previous_ids else None
+                        if existing is not None and existing["content"] == chunk.content:
+                            kept.append((chunk.chunk_id, chunk.chunk_index, chunk.start_char, chunk.end_char))
+                        else:
+                            changed.append(chunk)
+                if not changed:
+                    continue
+                
+                missing = [chunk for chunk in changed if chunk.embedding is None]
+                embedded = iter([])
+                if missing:
+                    # Bedrock calls block; keep them off the event loop
+                    embedded = iter(await asyncio.to_thread(
+                        self.embeddings.embed_documents, [chunk.content for chunk in missing]
+                    ))
+                vectors = np.stack([
+                    np.asarray(chunk.embedding if chunk.embedding is not None else next(embedded), dtype=np.float32)
+                    for chunk in changed
+                ])
+                # Adding to the vector index can trigger a k-means retrain; keep it off the event loop
+                await asyncio.to_thread(self._stage_chunks, document, changed, vectors, staged)
+            
+            await asyncio.to_thread(self._swap_chunks, document, chunk_ids, kept, staged)
+        except BaseException:
+            # Also runs on cancellation; the worker thread finishes either way, so this is safe to await
+            await asyncio.to_thread(self._unstage_chunks, staged)
+            raise
+        return len(chunk_ids)
+    
+    def _stage_chunks(
+        self,
+        document: Document,
+        chunks: List[DocumentChunk],
+        vectors: np.ndarray,
+        staged: "_StagedVersion"
+    ):
+        """Index one embedded batch of a new document version, hidden until it is swapped in"""
+        with self._lock:
+            if staged.closed:
+                return
+            chunk_ids = [chunk.chunk_id for chunk in chunks]
+            # Journal what these chunks overwrite, before the vector index drops the old vectors
+            for chunk_id in chunk_ids:
+                existing = self._chunks.get(chunk_id)
+                if existing is not None and chunk_id not in self._staged and chunk_id not in staged.replaced:
+                    staged.replaced[chunk_id] = (existing, self.vector_index.get(chunk_id))
+            self.vector_index.add(chunk_ids, vectors)
+            for chunk in chunks:
+                self._chunks[chunk.chunk_id] = {
+                    "doc_id": document.doc_id,
+                    "content": chunk.content,
+                    "chunk_index": chunk.chunk_index,
+                    "start_char": chunk.start_char,
+                    "end_char": chunk.end_char,
+                }
+                self.lexical_index.add(chunk.chunk_id, document.title, chunk.content)
+                self._staged.add(chunk.chunk_id)
+                staged.chunk_ids.append(chunk.chunk_id)
+    
+    def _swap_chunks(
+        self,
+        document: Document,
+        chunk_ids: List[str],
+        kept: List[Tuple[str, int, int, int]],
+        staged: "_StagedVersion"
+    ):
+        """Make a staged document version visible and drop what is left of the previous one"""
+        with self._lock:
+            previous = self._documents.get(document.doc_id)
+            if any(chunk_id not in self._chunks for chunk_id, _, _, _ in kept):
+                raise RuntimeError(f"Document {document.doc_id} was removed while it was being re-indexed")
+            
+            retitled = previous is not None and previous["title"] != document.title
+            for chunk_id, chunk_index, start_char, end_char in kept:
+                existing = self._chunks[chunk_id]
+                self._chunks[chunk_id] = dict(
+                    existing, chunk_index=chunk_index, start_char=start_char, end_char=end_char
+                )
+                if retitled:
+                    self.lexical_index.add(chunk_id, document.title, existing["content"])
+            self._staged.difference_update(staged.chunk_ids)
+            staged.closed = True
+            
+            if previous is not None:
+                stale = set(previous["chunk_ids"]).difference(chunk_ids)
+                self.vector_index.delete(list(stale))
+                for chunk_id in stale:
+                    self._chunks.pop(chunk_id, None)
+                    self.lexical_index.remove(chunk_id)
+            self._documents[document.doc_id] = {
+                "title": document.title,
+                "url": document.url,
+                "source": document.source,
+                "updated_at": document.updated_at.isoformat(),
+                "permissions": list(document.permissions),
+                "chunk_ids": chunk_ids,
+            }
+    
+    def _unstage_chunks(self, staged: "_StagedVersion"):
+        """Roll back a document version that failed part-way, restoring the chunks it overwrote"""
+        with self._lock:
+            if staged.closed:
+                return
+            staged.closed = True
+            self._staged.difference_update(staged.chunk_ids)
+            added = [chunk_id for chunk_id in staged.chunk_ids if chunk_id not in staged.replaced]
+            self.vector_index.delete(added)
+            for chunk_id in added:
+                self._chunks.pop(chunk_id, None)
+                self.lexical_index.remove(chunk_id)
+            for chunk_id, (chunk, vector) in staged.replaced.items():
+                self._chunks[chunk_id] = chunk
+                if vector is not None:
+                    self.vector_index.add([chunk_id], vector[None, :])
+                owner = self._documents.get(chunk["doc_id"])
+                self.lexical_index.add(chunk_id, owner["title"] if owner else "", chunk["content"])
+    
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document and all of its chunks"""
+        with self._lock:
+            document = self._documents.pop(doc_id, None)
+            if document is None:
+                return False
+            self.vector_index.delete(document["chunk_ids"])
+            for chunk_id in document["chunk_ids"]:
+                self._chunks.pop(chunk_id, None)
+                self.lexical_index.remove(chunk_id)
+            return True
+    
+    def _visible(self, document: Dict[str, Any], sources: List[str], user_permissions: List[str]) -> bool:
+        if "all" not in sources and document["source"] not in sources:
+            return False
+        # Documents without permissions are public; others need a shared group
+        return not document["permissions"] or bool(set(document["permissions"]) & set(user_permissions))
+    
+    def _lexical_search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        with self._lock:
+            return self.lexical_index.search(query, k)
+    
+    async def _embed_query(self, query: str) -> Optional[List[float]]:
+        try:
+            return await asyncio.to_thread(self.embeddings.embed_query, query)
+        except Exception as e:
+            # Degrade to keyword-only results rather than failing the search
+            print(f"Error embedding query '{query}', skipping vector search: {e}")
+            return None
+    
+    async def _vector_search(
+        self,
+        query_vector: "asyncio.Task[Optional[List[float]]]",
+        k: int,
+        nprobe: Optional[int]
+    ) -> List[Tuple[str, float]]:
+        vector = await query_vector
+        if vector is None:
+            return []
+        # A probe over many lists is real CPU work; run it beside the lexical leg, not on the loop
+        return await asyncio.to_thread(self.vector_index.search, vector, k, nprobe)
+    
+    def _collect_results(
+        self,
+        fused: List[Tuple[str, float]],
+        sources: List[str],
+        user_permissions: List[str],
+        top_k: int
+    ) -> List[SearchResult]:
+        """The best visible chunk of each document, in fused order"""
+        results: List[SearchResult] = []
+        seen_docs = set()
+        with self._lock:
+            for chunk_id, score in fused:
+                chunk = self._chunks.get(chunk_id)
+                if chunk is None or chunk_id in self._staged or chunk["doc_id"] in seen_docs:
+                    continue
+                document = self._documents[chunk["doc_id"]]
+                if not self._visible(document, sources, user_permissions):
+                    continue
+                seen_docs.add(chunk["doc_id"])
+                results.append(SearchResult(
+                    title=document["title"],
+                    url=document["url"],
+                    source=document["source"],
+                    snippet=chunk["content"][:SNIPPET_CHARS],
+                    updated_at=datetime.fromisoformat(document["updated_at"]),
+                    score=score,
+                    breadcrumb=None
+                ))
+                if len(results) >= top_k:
+                    break
+        return results
     
     async def search(
         self,
         query: str,
         sources: List[str] = ["all"],
         top_k: int = 10,
-        user_permissions: List[str] = []
+        user_permissions: List[str] = [],
+        lexical_weight: float = 1.0,
+        vector_weight: float = 1.0,
+        nprobe: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Perform hybrid search across data sources"""
+        """Perform hybrid search over indexed chunks, one result per document.
+        
+        A weight of 0 skips that retriever entirely. Result scores are the
+        fused reciprocal-rank scores. Source and permission filters apply to
+        the fused ranking, so when they leave fewer than ``top_k`` results,
+        both retrievers are asked again for deeper rankings.
+        """
         start_time = time.time()
         
-        # Mock search results for now - replace with actual search implementation
-        mock_results = [
-            SearchResult(
-                title="Saviynt Identity Governance Overview",
-                url="https://docs.saviyntcloud.com/overview",
-                source="docs",
-                snippet="Saviynt provides comprehensive identity governance and administration capabilities...",
-                updated_at=datetime.utcnow(),
-                score=0.95,
-                breadcrumb="Documentation > Overview"
-            ),
-            SearchResult(
-                title="Common Configuration Issues",
-                url="https://forums.saviynt.com/thread/123",
-                source="forums",
-                snippet="Here are the most common configuration issues and their solutions...",
-                updated_at=datetime.utcnow(),
-                score=0.87,
-                breadcrumb="Forums > Configuration"
-            )
-        ]
+        # Each leg contributes this many chunk candidates to the fusion
+        depth = max(self.max_chunks_per_query, top_k * CHUNK_OVERFETCH)
+        query_vector = None
+        if vector_weight > 0 and len(self.vector_index):
+            # Embedded once, alongside the first lexical pass, and reused by deeper passes
+            query_vector = asyncio.ensure_future(self._embed_query(query))
+        weights = [lexical_weight] if lexical_weight > 0 else []
+        if query_vector is not None:
+            weights.append(vector_weight)
+        try:
+            while True:
+                legs = []
+                if lexical_weight > 0:
+                    legs.append(asyncio.to_thread(self._lexical_search, query, depth))
+                if query_vector is not None:
+                    legs.append(self._vector_search(query_vector, depth, nprobe))
+                rankings = await asyncio.gather(*legs)
+                fused = reciprocal_rank_fusion([
+                    ([chunk_id for chunk_id, _ in hits], weight) for hits, weight in zip(rankings, weights)
+                ])
+                results = self._collect_results(fused, sources, user_permissions, top_k)
+                # A leg that returned fewer than it was asked for has nothing deeper to offer
+                exhausted = all(len(hits) < depth for hits in rankings)
+                if len(results) >= top_k or exhausted or depth >= MAX_FETCH_DEPTH:
+                    break
+                depth = min(depth * FETCH_DEPTH_GROWTH, MAX_FETCH_DEPTH)
+        finally:
+            if query_vector is not None and not query_vector.done():
+                query_vector.cancel()
         
         execution_time = int((time.time() - start_time) * 1000)
+        with self._lock:
+            if self._query_day != date.today():
+                self._query_day, self._queries_today, self._query_time_ms_today = date.today(), 0, 0
+            self._queries_today += 1
+            self._query_time_ms_today += execution_time
         
         return {
-            "results": mock_results[:top_k],
-            "total": len(mock_results),
+            "results": results,
+            "total": len(results),
             "execution_time_ms": execution_time,
             "did_you_mean": None,
             "filters": {
@@ -70,28 +484,74 @@ class SearchService:
         ]
         return suggestions[:5]
     
-    async def trigger_ingestion(self, sources: List[str]) -> str:
-        """Trigger data ingestion job"""
-        # Mock job ID - replace with actual job scheduling
-        import uuid
-        job_id = str(uuid.uuid4())
-        
-        # In production, this would trigger a background job
-        print(f"Triggering ingestion for sources: {sources}")
-        
-        return job_id
+    async def trigger_ingestion(
+        self,
+        sources: List[str],
+        load_documents: Callable[[List[str]], AsyncIterator[Document]]
+    ) -> str:
+        """Index the documents ``load_documents(sources)`` yields in a background job; returns its id"""
+        job = IngestionJob(job_id=str(uuid.uuid4()), sources=sources, status="pending", started_at=datetime.now())
+        self._jobs[job.job_id] = job
+        task = asyncio.create_task(self._run_ingestion(job, load_documents(sources)))
+        # The loop only keeps weak references to tasks
+        self._ingestion_tasks.add(task)
+        task.add_done_callback(self._ingestion_tasks.discard)
+        print(f"Started ingestion job {job.job_id} for sources: {sources}")
+        return job.job_id
+    
+    async def _run_ingestion(self, job: IngestionJob, documents: AsyncIterator[Document]):
+        job.status = "running"
+        try:
+            async for document in documents:
+                try:
+                    await self.index_document(document)
+                    job.documents_processed += 1
+                except Exception as e:
+                    # One bad document should not stop the rest of the job
+                    job.errors.append(f"{document.doc_id}: {e}")
+            await asyncio.to_thread(self.save)
+            job.status = "completed"
+        except Exception as e:
+            job.errors.append(str(e))
+            job.status = "failed"
+        finally:
+            if job.status == "running":
+                job.status = "failed"  # cancelled, e.g. on shutdown
+            job.completed_at = datetime.now()
+            print(f"Ingestion job {job.job_id} {job.status}: {job.documents_processed} documents, "
+                  f"{len(job.errors)} errors")
+    
+    def get_ingestion_job(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get search and ingestion statistics"""
-        # Mock stats - replace with actual metrics
+        return await asyncio.to_thread(self._stats)
+    
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sources: Dict[str, Dict[str, Any]] = {}
+            for _, document in self._documents.items():
+                source = sources.setdefault(document["source"], {"documents": 0, "last_update": None})
+                source["documents"] += 1
+                # ISO timestamps of one format compare in time order
+                if source["last_update"] is None or document["updated_at"] > source["last_update"]:
+                    source["last_update"] = document["updated_at"]
+            total_documents = len(self._documents)
+            queries_today = self._queries_today if self._query_day == date.today() else 0
+            query_time_ms = self._query_time_ms_today if queries_today else 0
+        completed = [job.completed_at for job in self._jobs.values() if job.status == "completed"]
         return {
-            "total_documents": 1500,
-            "last_ingestion": "2024-01-15T10:30:00Z",
-            "sources": {
-                "docs": {"documents": 500, "last_update": "2024-01-15T10:30:00Z"},
-                "forums": {"documents": 800, "last_update": "2024-01-15T09:45:00Z"},
-                "tickets": {"documents": 200, "last_update": "2024-01-15T11:15:00Z"}
-            },
-            "search_queries_today": 245,
-            "avg_response_time_ms": 150
+            "total_documents": total_documents,
+            "last_ingestion": max(completed).isoformat() if completed else None,
+            "sources": sources,
+            "search_queries_today": queries_today,
+            "avg_response_time_ms": round(query_time_ms / queries_today) if queries_today else None,
+            "vector_index": {
+                "chunks": len(self.vector_index),
+                "documents": total_documents,
+                "lists": self.vector_index.nlist,
+                "nprobe": self.vector_index.nprobe,
+                "quantization": self.vector_index.quantization
+            }
         }
@@ -0,0 +1,439 @@
+import base64
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .analysis import Analyzer, default_analyzer
+from .dedup import SimHashLSH, simhash
+from .ranking import BM25F, idf
+from .web_scraper import ScrapedContent
+
+# Version 1 stored term strings in a postings file; its docs are re-analyzed on load
+INDEX_FORMAT_VERSION = 2
+REANALYZABLE_VERSIONS = (1, 2)
+
+# Term-id arrays: unsigned 32-bit, stored little-endian
+TERM_ARRAY_TYPECODE = "I"
+
+
+def _encode_terms(terms: array) -> str:
+    if sys.byteorder == "big":
+        terms = array(TERM_ARRAY_TYPECODE, terms)
+        terms.byteswap()
+    return base64.b64encode(terms.tobytes()).decode("ascii")
+
+
+def _decode_terms(data: str) -> array:
+    terms = array(TERM_ARRAY_TYPECODE)
+    terms.frombytes(base64.b64decode(data))
+    if sys.byteorder == "big":
+        terms.byteswap()
+    return terms
+
+
+class SearchIndex:
+    """On-disk inverted index over scraped public source pages.
+
+    Title and body text go through the index's ``Analyzer`` once, when a
+    page is added, and are kept as arrays of interned term ids. Three files
+    are persisted side by side in ``index_dir``:
+
+    * ``docs.json.gz``  - doc store keyed by integer doc id, with term-id arrays
+    * ``vocab.json.gz`` - the interned vocabulary (term id -> term)
+    * ``meta.json``     - statistics, the analyzer config and per-source crawl times
+
+    The postings (term id -> {doc id: [title tf, body tf]}) are rebuilt from
+    the term-id arrays on load. Page text is analyzed once and not kept:
+    documents store only their term arrays and the fields results show
+    (title, snippet, date, breadcrumb). An index built with a different
+    analyzer config therefore can't be re-analyzed in place and is dropped
+    on load, so its sources are crawled again (or rebuilt from the page
+    archive with ``scripts/reindex_from_archive.py``).
+
+    Pages whose content is a near-duplicate (by SimHash) of a page already
+    indexed for the same source are not indexed again; their URL is recorded
+    as an alias of the first one instead, so versioned paths, locale variants
+    and print views collapse into a single result.
+
+    Queries are answered entirely in-process with BM25F (the same scorer
+    ``WebScraper.search_content`` uses for live results); only crawls touch
+    the network. Per-document length norms are computed once after the index
+    changes and reused by every query until the next change.
+    """
+
+    def __init__(self, index_dir: str, analyzer: Optional[Analyzer] = None):
+        self.index_dir = index_dir
+        self.analyzer = analyzer or default_analyzer
+        self._lock = threading.RLock()
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._url_to_id: Dict[str, int] = {}
+        # Alias URL -> id of the canonical document it duplicates
+        self._aliases: Dict[str, int] = {}
+        self._lsh = SimHashLSH()
+        # Interned vocabulary: term id -> term and back
+        self._vocab: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._postings: Dict[int, Dict[int, List[int]]] = {}
+        self._source_crawled_at: Dict[str, float] = {}
+        self._scorer = BM25F()
+        # Running field-length totals for the BM25F averages
+        self._title_length_total = 0
+        self._body_length_total = 0
+        # doc id -> BM25F length norms, overall and per source; rebuilt on the first query after a change
+        self._norms: Optional[Dict[int, Tuple[float, float]]] = None
+        self._source_norms: Dict[str, Dict[int, Tuple[float, float]]] = {}
+        self._next_id = 0
+        self._dirty = False
+        self.load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def load(self):
+        """Load the index from disk if it exists"""
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return
+
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("version") not in REANALYZABLE_VERSIONS:
+                print(f"Ignoring search index at {self.index_dir}: unsupported version {meta.get('version')}")
+                return
+
+            with gzip.open(self._path("docs.json.gz"), "rt", encoding="utf-8") as f:
+                docs = json.load(f)
+            vocab: List[str] = []
+            if meta.get("version") == INDEX_FORMAT_VERSION:
+                with gzip.open(self._path("vocab.json.gz"), "rt", encoding="utf-8") as f:
+                    vocab = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading search index from {self.index_dir}: {e}")
+            return
+
+        with self._lock:
+            # JSON object keys are always strings; restore integer doc ids
+            self._docs = {int(doc_id): doc for doc_id, doc in docs.items()}
+            self._url_to_id = {doc["url"]: doc_id for doc_id, doc in self._docs.items()}
+            self._aliases = {
+                alias: doc_id for doc_id, doc in self._docs.items() for alias in doc.get("aliases", [])
+            }
+            self._lsh = SimHashLSH()
+            for doc_id, doc in self._docs.items():
+                if doc.get("simhash") is not None:
+                    self._lsh.add(doc_id, doc["simhash"])
+
+            reanalyze = meta.get("version") != INDEX_FORMAT_VERSION or meta.get("analyzer") != self.analyzer.config
+            # Indexes written before page text was dropped still carry it and can be re-analyzed once
+            if reanalyze and not all("content" in doc for doc in self._docs.values()):
+                print(f"Dropping search index at {self.index_dir}: it was built with a different analyzer "
+                      f"and keeps no page text; re-crawl or run scripts/reindex_from_archive.py")
+                self._docs, self._url_to_id, self._aliases, self._lsh = {}, {}, {}, SimHashLSH()
+                return
+            had_content = any("content" in doc for doc in self._docs.values())
+            if reanalyze:
+                print(f"Re-analyzing {len(self._docs)} documents in {self.index_dir} with the current analyzer")
+            self._vocab = [] if reanalyze else vocab
+            self._term_ids = {term: term_id for term_id, term in enumerate(self._vocab)}
+            self._postings = {}
+            for doc_id, doc in self._docs.items():
+                if reanalyze:
+                    doc["title_terms"] = self._intern(self.analyzer.analyze(doc.get("title") or ""))
+                    doc["body_terms"] = self._intern(self.analyzer.analyze(doc.get("content") or ""))
+                    doc["title_length"] = len(doc["title_terms"])
+                    doc["body_length"] = len(doc["body_terms"])
+                else:
+                    doc["title_terms"] = _decode_terms(doc["title_terms"])
+                    doc["body_terms"] = _decode_terms(doc["body_terms"])
+                doc.pop("content", None)
+                self._add_postings(doc_id, doc)
+
+            self._source_crawled_at = meta.get("source_crawled_at", {})
+            self._title_length_total = sum(doc["title_length"] for doc in self._docs.values())
+            self._body_length_total = sum(doc["body_length"] for doc in self._docs.values())
+            self._norms = None
+            self._source_norms = {}
+            self._next_id = meta.get("next_id", len(self._docs))
+            self._dirty = reanalyze or had_content
+
+        print(f"Loaded search index with {len(self._docs)} documents from {self.index_dir}")
+
+    def save(self):
+        """Persist the index to disk atomically"""
+        with self._lock:
+            if not self._dirty:
+                return
+            # Alias lists are the only part of a doc mutated in place; copy them with the docs
+            docs = {
+                doc_id: dict(
+                    doc,
+                    aliases=list(doc.get("aliases", [])),
+                    title_terms=_encode_terms(doc["title_terms"]),
+                    body_terms=_encode_terms(doc["body_terms"])
+                )
+                for doc_id, doc in self._docs.items()
+            }
+            vocab = list(self._vocab)
+            meta = {
+                "version": INDEX_FORMAT_VERSION,
+                "analyzer": self.analyzer.config,
+                "next_id": self._next_id,
+                "document_count": len(self._docs),
+                "alias_count": len(self._aliases),
+                "term_count": len(self._postings),
+                "vocabulary_size": len(vocab),
+                "source_crawled_at": dict(self._source_crawled_at),
+                "saved_at": time.time(),
+            }
+            self._dirty = False
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._write_gzip_json("docs.json.gz", docs)
+        self._write_gzip_json("vocab.json.gz", vocab)
+        # meta.json is written last so a reader never sees it ahead of its data files
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self._path("meta.json"))
+        # Left over from a version 1 index
+        if os.path.exists(self._path("postings.json.gz")):
+            os.remove(self._path("postings.json.gz"))
+
+    def _write_gzip_json(self, name: str, data: Any):
+        tmp_path = self._path(name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=5) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self._path(name))
+
+    def _intern(self, terms: List[str]) -> array:
+        """Term-id array for analyzed terms, adding new terms to the vocabulary"""
+        term_ids = self._term_ids
+        ids = array(TERM_ARRAY_TYPECODE)
+        for term in terms:
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(self._vocab)
+                self._vocab.append(term)
+            ids.append(term_id)
+        return ids
+
+    def _add_postings(self, doc_id: int, doc: Dict[str, Any]):
+        term_freqs: Dict[int, List[int]] = {}
+        for term_id, count in Counter(doc["title_terms"]).items():
+            term_freqs[term_id] = [count, 0]
+        for term_id, count in Counter(doc["body_terms"]).items():
+            term_freqs.setdefault(term_id, [0, 0])[1] = count
+        for term_id, tfs in term_freqs.items():
+            self._postings.setdefault(term_id, {})[doc_id] = tfs
+
+    def add_document(self, source_id: str, content: ScrapedContent) -> Optional[str]:
+        """Add or replace a scraped page in the index.
+
+        Returns the canonical URL when the page was recorded as an alias of
+        an existing near-duplicate instead of being indexed, otherwise None.
+        """
+        fingerprint = content.simhash if content.simhash is not None else simhash(content.content or "")
+        title_terms = self.analyzer.analyze(content.title or "")
+        body_terms = self.analyzer.analyze(content.content or "")
+
+        with self._lock:
+            existing_id = self._url_to_id.get(content.url)
+            if existing_id is None:
+                # An alias that was refetched is checked again; its content may have diverged
+                self._remove_alias(content.url)
+                duplicate_id = self._find_duplicate(source_id, fingerprint)
+                if duplicate_id is not None:
+                    canonical = self._docs[duplicate_id]
+                    canonical.setdefault("aliases", []).append(content.url)
+                    self._aliases[content.url] = duplicate_id
+                    self._dirty = True
+                    return canonical["url"]
+
+            if existing_id is not None:
+                self._remove_postings(existing_id)
+                self._title_length_total -= self._docs[existing_id]["title_length"]
+                self._body_length_total -= self._docs[existing_id]["body_length"]
+                doc_id = existing_id
+                aliases = self._docs[doc_id].get("aliases", [])
+            else:
+                doc_id = self._next_id
+                self._next_id += 1
+                aliases = []
+
+            self._docs[doc_id] = {
+                "url": content.url,
+                "source_id": source_id,
+                "title": content.title,
+                "snippet": content.snippet,
+                "published_date": content.published_date,
+                "breadcrumb": content.breadcrumb,
+                "title_length": len(title_terms),
+                "body_length": len(body_terms),
+                "title_terms": self._intern(title_terms),
+                "body_terms": self._intern(body_terms),
+                "indexed_at": time.time(),
+                "simhash": fingerprint,
+                "aliases": aliases,
+            }
+            self._url_to_id[content.url] = doc_id
+            self._title_length_total += len(title_terms)
+            self._body_length_total += len(body_terms)
+            self._norms = None
+            self._source_norms = {}
+            if fingerprint is not None:
+                self._lsh.add(doc_id, fingerprint)
+            else:
+                self._lsh.remove(doc_id)
+
+            self._add_postings(doc_id, self._docs[doc_id])
+
+            self._dirty = True
+            return None
+
+    def _find_duplicate(self, source_id: str, fingerprint: Optional[int]) -> Optional[int]:
+        """Closest indexed document of the same source that is a near-duplicate of a fingerprint"""
+        if fingerprint is None:
+            return None
+        for doc_id, _ in self._lsh.candidates(fingerprint):
+            if self._docs[doc_id]["source_id"] == source_id:
+                return doc_id
+        return None
+
+    def _remove_alias(self, url: str):
+        doc_id = self._aliases.pop(url, None)
+        if doc_id is not None:
+            self._docs[doc_id]["aliases"].remove(url)
+            self._dirty = True
+
+    def remove_document(self, url: str) -> bool:
+        """Remove a page (or an alias of one) from the index by URL.
+
+        Removing a canonical page drops its aliases with it; they are indexed
+        in their own right the next time they are crawled.
+        """
+        with self._lock:
+            if url in self._aliases:
+                self._remove_alias(url)
+                return True
+
+            doc_id = self._url_to_id.pop(url, None)
+            if doc_id is None:
+                return False
+            self._remove_postings(doc_id)
+            doc = self._docs.pop(doc_id)
+            self._title_length_total -= doc["title_length"]
+            self._body_length_total -= doc["body_length"]
+            self._norms = None
+            self._source_norms = {}
+            for alias in doc.get("aliases", []):
+                self._aliases.pop(alias, None)
+            self._lsh.remove(doc_id)
+            self._dirty = True
+            return True
+
+    def remove_source(self, source_id: str) -> int:
+        """Remove every document of a source, returning how many were removed"""
+        with self._lock:
+            urls = [doc["url"] for doc in self._docs.values() if doc["source_id"] == source_id]
+            for url in urls:
+                self.remove_document(url)
+            return len(urls)
+
+    def canonical_url(self, url: str) -> Optional[str]:
+        """URL of the indexed document holding a page's content, following aliases"""
+        with self._lock:
+            doc_id = self._url_to_id.get(url, self._aliases.get(url))
+            return self._docs[doc_id]["url"] if doc_id is not None else None
+
+    def _remove_postings(self, doc_id: int):
+        doc = self._docs[doc_id]
+        for term_id in set(doc["title_terms"]) | set(doc["body_terms"]):
+            entries = self._postings.get(term_id)
+            if entries is None:
+                continue
+            entries.pop(doc_id, None)
+            if not entries:
+                del self._postings[term_id]
+
+    def mark_source_crawled(self, source_id: str, crawled_at: Optional[float] = None):
+        """Record when a source was last crawled into the index"""
+        with self._lock:
+            self._source_crawled_at[source_id] = crawled_at or time.time()
+            self._dirty = True
+
+    def has_source(self, source_id: str) -> bool:
+        """Whether a source has been crawled into the index at least once"""
+        return source_id in self._source_crawled_at
+
+    def source_crawled_at(self, source_id: str) -> Optional[float]:
+        """Timestamp of the last crawl of a source, if any"""
+        return self._source_crawled_at.get(source_id)
+
+    def indexed_at(self, url: str) -> Optional[float]:
+        """When a page (or the page it is an alias of) was last (re)indexed, or None if unknown"""
+        with self._lock:
+            doc_id = self._url_to_id.get(url, self._aliases.get(url))
+            return self._docs[doc_id]["indexed_at"] if doc_id is not None else None
+
+    def document_count(self, source_id: Optional[str] = None) -> int:
+        """Number of indexed documents, optionally for a single source"""
+        with self._lock:
+            if source_id is None:
+                return len(self._docs)
+            return sum(1 for doc in self._docs.values() if doc["source_id"] == source_id)
+
+    def _length_norms(self, source_id: Optional[str] = None) -> Dict[int, Tuple[float, float]]:
+        if source_id is not None:
+            if source_id not in self._source_norms:
+                self._source_norms[source_id] = {
+                    doc_id: doc_norms for doc_id, doc_norms in self._length_norms().items()
+                    if self._docs[doc_id]["source_id"] == source_id
+                }
+            return self._source_norms[source_id]
+        if self._norms is None:
+            doc_count = len(self._docs) or 1
+            avg_title = self._title_length_total / doc_count
+            avg_body = self._body_length_total / doc_count
+            length_norms = self._scorer.length_norms
+            self._norms = {
+                doc_id: length_norms(doc["title_length"], doc["body_length"], avg_title, avg_body)
+                for doc_id, doc in self._docs.items()
+            }
+        return self._norms
+
+    def search(self, query: str, source_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Score indexed documents against a query with BM25F and return the top ``limit``.
+
+        Returns results in the same shape as ``WebScraper.search_content``.
+        """
+        query_terms = list(dict.fromkeys(self.analyzer.analyze(query)))
+        if not query_terms:
+            return []
+
+        with self._lock:
+            term_ids = [self._term_ids[term] for term in query_terms if term in self._term_ids]
+            # IDF stays corpus-wide; a source filter only narrows the scored documents
+            norms = self._length_norms(source_id)
+            terms = [
+                (idf(len(self._docs), len(self._postings[term_id])), self._postings[term_id])
+                for term_id in term_ids if term_id in self._postings
+            ]
+            results = []
+            for doc_id, score in self._scorer.top_k(terms, norms, limit):
+                doc = self._docs[doc_id]
+                results.append({
+                    "title": doc["title"],
+                    "url": doc["url"],
+                    "snippet": doc["snippet"],
+                    "score": score,
+                    "published_date": doc["published_date"],
+                    "breadcrumb": doc["breadcrumb"]
+                })
+        return results
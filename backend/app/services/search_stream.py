@@ -0,0 +1,52 @@
+import json
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .public_sources import PublicSourcesManager
+
+# Response media type for each supported framing
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+# Keep proxies from buffering the stream and defeating the point of it
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_frame(event: Dict[str, Any], framing: str) -> str:
+    """Encode a search event as a Server-Sent Events message or an NDJSON line"""
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    if framing == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def stream_search(
+    manager: PublicSourcesManager,
+    query: str,
+    framing: str,
+    top_k: int = 10,
+    deadline_ms: Optional[int] = None
+) -> AsyncIterator[str]:
+    """Frames for a streaming search: one per source as it completes, then the merged top ``top_k``"""
+    started = time.perf_counter()
+    try:
+        async with aclosing(manager.iter_search_events(query, deadline_ms)) as events:
+            async for event in events:
+                if event["type"] == "source":
+                    event["elapsed_ms"] = round((time.perf_counter() - started) * 1000)
+                else:
+                    event["query"] = query
+                    event["results"] = event["results"][:top_k]
+                    event["partial"] = bool(event["incomplete_sources"])
+                    event["execution_time_ms"] = round((time.perf_counter() - started) * 1000)
+                yield format_frame(event, framing)
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        print(f"Error streaming search for '{query}': {e}")
+        yield format_frame({"type": "error", "detail": str(e)}, framing)
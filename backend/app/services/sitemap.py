@@ -0,0 +1,140 @@
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+DEFAULT_MAX_SITEMAP_DEPTH = 3
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """Parse a W3C datetime from <lastmod> into a UTC timestamp"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        if len(value) == 10:
+            parsed = datetime.strptime(value, "%Y-%m-%d")
+        else:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag"""
+    return tag.rsplit("}", 1)[-1]
+
+
+class _SitemapStreamParser:
+    """Incremental parser for <urlset> and <sitemapindex> documents.
+
+    Fed raw (possibly gzip-compressed) chunks; completed entries are drained
+    with ``pop_urls`` and their elements are cleared straight away, so memory
+    stays flat no matter how large the sitemap is.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._decompressor = None
+        self._sniffed = False
+        self.urls: List[Tuple[str, Optional[float]]] = []
+        self.child_sitemaps: List[Tuple[str, Optional[float]]] = []
+
+    def feed(self, chunk: bytes):
+        if not self._sniffed:
+            self._sniffed = True
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        self._parser.feed(chunk)
+        self._collect()
+
+    def close(self):
+        if self._decompressor is not None:
+            self._parser.feed(self._decompressor.flush())
+        self._parser.close()
+        self._collect()
+
+    def _collect(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+
+            name = _local_name(elem.tag)
+            if name not in ("url", "sitemap"):
+                continue
+
+            loc = None
+            lastmod = None
+            for child in elem:
+                child_name = _local_name(child.tag)
+                if child_name == "loc" and child.text:
+                    loc = child.text.strip()
+                elif child_name == "lastmod":
+                    lastmod = parse_lastmod(child.text)
+            # Drop finished entries from the tree so memory does not grow with the sitemap
+            self._root.clear()
+
+            if not loc:
+                continue
+            if name == "url":
+                self.urls.append((loc, lastmod))
+            else:
+                self.child_sitemaps.append((loc, lastmod))
+
+    def pop_urls(self) -> List[Tuple[str, Optional[float]]]:
+        urls, self.urls = self.urls, []
+        return urls
+
+
+async def iter_sitemap(
+    session: aiohttp.ClientSession,
+    sitemap_url: str,
+    max_depth: int = DEFAULT_MAX_SITEMAP_DEPTH,
+    _seen: Optional[Set[str]] = None
+) -> AsyncIterator[Tuple[str, Optional[float]]]:
+    """Stream ``(url, lastmod)`` pairs from a sitemap.
+
+    Handles plain and gzip-compressed sitemaps and follows nested sitemap
+    indexes up to ``max_depth`` levels. ``lastmod`` is a UTC timestamp or
+    ``None`` when the sitemap does not provide one.
+    """
+    seen = _seen if _seen is not None else set()
+    if sitemap_url in seen:
+        return
+    seen.add(sitemap_url)
+
+    parser = _SitemapStreamParser()
+    try:
+        async with session.get(sitemap_url) as response:
+            if response.status != 200:
+                print(f"Failed to fetch sitemap {sitemap_url}: HTTP {response.status}")
+                return
+
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                parser.feed(chunk)
+                for entry in parser.pop_urls():
+                    yield entry
+            parser.close()
+    except (ParseError, zlib.error) as e:
+        print(f"Error parsing sitemap {sitemap_url}: {e}")
+
+    for entry in parser.pop_urls():
+        yield entry
+
+    if max_depth <= 0:
+        return
+    for child_url, _ in parser.child_sitemaps:
+        async for entry in iter_sitemap(session, child_url, max_depth - 1, seen):
+            yield entry
@@ -0,0 +1,190 @@
+import hashlib
+import math
+import re
+from fnmatch import fnmatchcase
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Query parameters that never change page content; ``*`` globs match by prefix
+DEFAULT_STRIP_PARAMS = ["utm_*", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl", "ref_src"]
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# RFC 3986 unreserved characters never need percent-encoding
+UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+PERCENT_ESCAPE = re.compile(r"%([0-9a-fA-F]{2})")
+
+
+def _normalize_escape(match: "re.Match") -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else "%" + match.group(1).upper()
+
+
+def _remove_dot_segments(path: str) -> str:
+    """Resolve ``.`` and ``..`` path segments (RFC 3986, section 5.2.4)"""
+    output: List[str] = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    result = "/".join(output)
+    if path.endswith(("/.", "/..")):
+        result += "/"
+    return result or "/"
+
+
+def _is_stripped(name: str, strip_params: Iterable[str]) -> bool:
+    name = name.lower()
+    return any(fnmatchcase(name, pattern) for pattern in strip_params)
+
+
+def canonicalize_url(
+    url: str,
+    base_url: Optional[str] = None,
+    strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS
+) -> str:
+    """Canonical form of an http(s) URL, so trivially different spellings dedupe.
+
+    Resolves against ``base_url``, lowercases scheme and host, drops default
+    ports, the fragment, tracking parameters and a trailing slash (except on
+    the root), resolves dot segments, normalizes percent-escapes and sorts the
+    remaining query parameters. Non-http(s) URLs are returned as given.
+    """
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        # hostname drops the brackets around an IPv6 literal; the netloc needs them back
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+
+    path = _remove_dot_segments(PERCENT_ESCAPE.sub(_normalize_escape, parts.path or "/"))
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = ""
+    if parts.query:
+        params = [
+            (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_stripped(name, strip_params)
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def _hash_pair(item: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    # Force the step odd so probes cycle through every bit position
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter sized for ``capacity`` items at ``error_rate``"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    # Probe positions use double hashing: h1 + i * h2 (Kirsch & Mitzenmacher)
+    def contains_hashes(self, hashes: Tuple[int, int]) -> bool:
+        h1, h2 = hashes
+        bits, bit_count = self._bits, self.bit_count
+        for i in range(self.hash_count):
+            pos = (h1 + i * h2) % bit_count
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add_hashes(self, hashes: Tuple[int, int]):
+        h1, h2 = hashes
+        bits, bit_count = self._bits, self.bit_count
+        for i in range(self.hash_count):
+            pos = (h1 + i * h2) % bit_count
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_hashes(_hash_pair(item))
+
+    def add(self, item: str):
+        self.add_hashes(_hash_pair(item))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows as items are added (Almeida et al., 2007).
+
+    When the current filter reaches capacity a new one, ``growth`` times
+    larger and with a tighter error rate, is stacked on top, keeping the
+    overall false-positive rate under ``error_rate`` without knowing the
+    final size up front. Membership is probabilistic: ``in`` can be wrong
+    about an unseen item with probability ``error_rate``, never about an
+    item that was added.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 100_000,
+        error_rate: float = 0.001,
+        growth: int = 2,
+        tightening: float = 0.5
+    ):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self._filters: List[BloomFilter] = []
+        self._count = 0
+
+    def _new_filter(self):
+        depth = len(self._filters)
+        capacity = self.initial_capacity * self.growth ** depth
+        # The geometric series of error rates sums to at most ``error_rate``
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** depth
+        self._filters.append(BloomFilter(capacity, error_rate))
+
+    def __contains__(self, item: str) -> bool:
+        hashes = _hash_pair(item)
+        return any(f.contains_hashes(hashes) for f in reversed(self._filters))
+
+    def add(self, item: str) -> bool:
+        """Add an item; returns False if it was (probably) already present"""
+        hashes = _hash_pair(item)
+        if any(f.contains_hashes(hashes) for f in reversed(self._filters)):
+            return False
+        if not self._filters or self._filters[-1].count >= self._filters[-1].capacity:
+            self._new_filter()
+        self._filters[-1].add_hashes(hashes)
+        self._count += 1
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(f.size_bytes for f in self._filters)
@@ -0,0 +1,433 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vector_store import QUANTIZATION_DTYPES, StringColumn, open_store, quantize, write_store
+
+VECTOR_INDEX_FORMAT_VERSION = 2
+STORE_FILE = "vectors.store"
+DEFAULT_QUANTIZATION = "int8"
+
+# Below this many vectors a brute-force scan is as fast as probing lists, so training waits
+MIN_TRAIN_SIZE = 1024
+# k-means samples this many vectors per list (the usual IVF rule of thumb)
+TRAIN_SAMPLES_PER_LIST = 39
+KMEANS_ITERATIONS = 10
+# Re-cluster once the index has grown this many times past its last training size
+RETRAIN_GROWTH = 4
+DEFAULT_NPROBE = 8
+# Rows scored per matrix product while assigning vectors to lists
+ASSIGN_BATCH = 65536
+# Candidates per requested result that are rescored at full precision after the quantized scan
+RESCORE_FACTOR = 4
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _InvertedList:
+    """Vectors of one IVF cell, stored contiguously so a probe is one matrix product.
+
+    Probes scan the quantized ``codes``; ``vectors`` keeps full precision
+    for rescoring the best candidates. Lists loaded from a store are
+    read-only memory maps until their first change copies them to memory.
+    """
+
+    def __init__(self, dim: int, quantization: str):
+        self.codes = np.empty((0, dim), dtype=QUANTIZATION_DTYPES[quantization])
+        self.scales = np.empty(0, dtype=np.float32)
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.size = 0
+
+    @classmethod
+    def mapped(cls, codes: np.ndarray, scales: np.ndarray, vectors: np.ndarray, ids: np.ndarray) -> "_InvertedList":
+        cell = cls.__new__(cls)
+        cell.codes, cell.scales, cell.vectors, cell.ids = codes, scales, vectors, ids
+        cell.size = len(ids)
+        return cell
+
+    def _resize(self, capacity: int):
+        """Move the entries into fresh writable arrays with room for ``capacity``"""
+        def resized(array: np.ndarray) -> np.ndarray:
+            result = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            result[:self.size] = array[:self.size]
+            return result
+        self.codes, self.scales, self.vectors, self.ids = (
+            resized(array) for array in (self.codes, self.scales, self.vectors, self.ids)
+        )
+
+    def append(self, code: np.ndarray, scale: float, vector: np.ndarray, internal_id: int) -> int:
+        if self.size == len(self.ids):
+            self._resize(max(16, 2 * len(self.ids)))
+        self.codes[self.size] = code
+        self.scales[self.size] = scale
+        self.vectors[self.size] = vector
+        self.ids[self.size] = internal_id
+        self.size += 1
+        return self.size - 1
+
+    def remove(self, position: int) -> Optional[int]:
+        """Remove by swapping the last entry into place; returns the moved id, if any"""
+        if not (self.codes.flags.writeable and self.vectors.flags.writeable):
+            self._resize(len(self.ids))
+        self.size -= 1
+        if position == self.size:
+            return None
+        for array in (self.codes, self.scales, self.vectors, self.ids):
+            array[position] = array[self.size]
+        return int(self.ids[position])
+
+    def requantize(self, quantization: str):
+        self.codes, self.scales = quantize(self.vectors[:self.size], quantization)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of each entry to ``query``, from the quantized codes"""
+        return (self.codes[:self.size] @ query) * self.scales[:self.size]
+
+
+class IVFIndex:
+    """In-process approximate nearest-neighbor index over embedding vectors.
+
+    An inverted-file (IVF) index: vectors are clustered with spherical
+    k-means into about ``sqrt(n)`` cells, and a query only scores the vectors
+    of the ``nprobe`` cells whose centroids are closest to it. ``nprobe`` is
+    the recall/latency knob: 1 is fastest, ``nlist`` is an exact scan.
+    Similarity is cosine (vectors are normalized on the way in).
+
+    Until ``MIN_TRAIN_SIZE`` vectors have been added everything lives in one
+    cell and queries are exact. The index clusters itself at that point and
+    re-clusters whenever it has grown ``RETRAIN_GROWTH``-fold since.
+    Deletes are O(1) and never leave tombstones behind.
+
+    Probes score scalar-quantized copies of the vectors (``quantization``
+    is "int8" or "float16"), then the best ``RESCORE_FACTOR * k`` candidates
+    are rescored at full precision, so results and their scores match a
+    full-precision scan of the probed lists in all but rare near-ties.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+        quantization: str = DEFAULT_QUANTIZATION
+    ):
+        if quantization not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Unsupported quantization '{quantization}', expected one of {sorted(QUANTIZATION_DTYPES)}")
+        self.dim = dim
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self._lock = threading.RLock()
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[_InvertedList] = []
+        # External key <-> internal id, and internal id -> (list, position).
+        # For an index loaded from a store, keys are read from its key column
+        # and these maps are only built on the first change (see _load_keys)
+        self._ids: Optional[Dict[str, int]] = {}
+        self._keys: Dict[int, str] = {}
+        self._stored_keys: Optional[StringColumn] = None
+        self._locations: Dict[int, Tuple[int, int]] = {}
+        self._next_id = 0
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return sum(cell.size for cell in self._lists)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._load_keys()
+            return key in self._ids
+
+    def _load_keys(self):
+        """Build the key and location maps of a loaded index, before anything changes it"""
+        if self._ids is not None:
+            return
+        keys = self._stored_keys.to_list()
+        self._ids = {key: internal_id for internal_id, key in enumerate(keys)}
+        self._keys = dict(enumerate(keys))
+        for cell_index, cell in enumerate(self._lists):
+            for position, internal_id in enumerate(cell.ids[:cell.size].tolist()):
+                self._locations[internal_id] = (cell_index, position)
+        self._stored_keys = None
+
+    def _key(self, internal_id: int) -> str:
+        if self._stored_keys is not None:
+            return self._stored_keys[internal_id]
+        return self._keys[internal_id]
+
+    @property
+    def nlist(self) -> int:
+        return len(self._lists)
+
+    def _check_dim(self, dim: int):
+        if self.dim is None:
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {dim}")
+
+    def add(self, keys: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Add or replace vectors by key"""
+        if len(keys) != len(vectors):
+            raise ValueError("keys and vectors must have the same length")
+        if not keys:
+            return
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        codes, scales = quantize(matrix, self.quantization)
+        with self._lock:
+            self._check_dim(matrix.shape[1])
+            self._load_keys()
+            if not self._lists:
+                self._lists.append(_InvertedList(self.dim, self.quantization))
+            for key in keys:
+                self._remove(key)
+            cells = self._assign(matrix)
+            for key, code, scale, vector, cell in zip(keys, codes, scales, matrix, cells):
+                internal_id = self._next_id
+                self._next_id += 1
+                self._ids[key] = internal_id
+                self._keys[internal_id] = key
+                position = self._lists[cell].append(code, scale, vector, internal_id)
+                self._locations[internal_id] = (int(cell), position)
+
+            if len(self) >= MIN_TRAIN_SIZE and len(self) >= RETRAIN_GROWTH * self._trained_size:
+                self.train()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """A copy of the stored (normalized, full-precision) vector for ``key``, if present"""
+        with self._lock:
+            self._load_keys()
+            internal_id = self._ids.get(key)
+            if internal_id is None:
+                return None
+            cell, position = self._locations[internal_id]
+            return np.array(self._lists[cell].vectors[position])
+
+    def delete(self, keys: Sequence[str]) -> int:
+        """Remove vectors by key, returning how many were present"""
+        with self._lock:
+            self._load_keys()
+            return sum(1 for key in keys if self._remove(key))
+
+    def _remove(self, key: str) -> bool:
+        internal_id = self._ids.pop(key, None)
+        if internal_id is None:
+            return False
+        del self._keys[internal_id]
+        cell, position = self._locations.pop(internal_id)
+        moved = self._lists[cell].remove(position)
+        if moved is not None:
+            self._locations[moved] = (cell, position)
+        return True
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.zeros(len(matrix), dtype=np.int64)
+        cells = np.empty(len(matrix), dtype=np.int64)
+        for start in range(0, len(matrix), ASSIGN_BATCH):
+            batch = matrix[start:start + ASSIGN_BATCH]
+            cells[start:start + ASSIGN_BATCH] = np.argmax(batch @ self._centroids.T, axis=1)
+        return cells
+
+    def _all_entries(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Codes, scales, vectors and ids of every list, concatenated in list order"""
+        return tuple(
+            np.concatenate([getattr(cell, name)[:cell.size] for cell in self._lists])
+            for name in ("codes", "scales", "vectors", "ids")
+        )
+
+    def train(self, nlist: Optional[int] = None, seed: int = 0):
+        """(Re-)cluster all vectors into ``nlist`` cells (default ``sqrt(n)``)"""
+        with self._lock:
+            if not len(self):
+                return
+            started = time.perf_counter()
+            self._load_keys()
+            codes, scales, vectors, ids = self._all_entries()
+            nlist = max(1, min(nlist or int(math.sqrt(len(vectors))), len(vectors)))
+
+            rng = np.random.default_rng(seed)
+            sample_size = min(len(vectors), nlist * TRAIN_SAMPLES_PER_LIST)
+            sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+            centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                empty = ~sums.any(axis=1)
+                # Reseed empty cells from random sample points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+                centroids = _normalize(sums)
+
+            self._centroids = centroids.astype(np.float32)
+            self._lists = [_InvertedList(self.dim, self.quantization) for _ in range(nlist)]
+            self._locations = {}
+            entries = zip(ids.tolist(), codes, scales, vectors, self._assign(vectors))
+            for internal_id, code, scale, vector, cell in entries:
+                self._locations[internal_id] = (int(cell), self._lists[cell].append(code, scale, vector, internal_id))
+            self._trained_size = len(vectors)
+            print(f"Trained vector index: {len(vectors)} vectors in {nlist} lists "
+                  f"({time.perf_counter() - started:.1f}s)")
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 10,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """The ``k`` most similar keys with their cosine similarity, best first"""
+        query = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if not len(self) or k <= 0:
+                return []
+            self._check_dim(len(query))
+            if self._centroids is None:
+                probes = [0]
+            else:
+                nprobe = min(nprobe or self.nprobe, len(self._lists))
+                centroid_scores = self._centroids @ query
+                probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+            scores, cells, positions = [], [], []
+            for cell_index in probes:
+                cell = self._lists[cell_index]
+                if cell.size:
+                    scores.append(cell.scores(query))
+                    cells.append(np.full(cell.size, cell_index, dtype=np.int64))
+                    positions.append(np.arange(cell.size))
+            if not scores:
+                return []
+            scores, cells, positions = np.concatenate(scores), np.concatenate(cells), np.concatenate(positions)
+            candidates = min(len(scores), k * RESCORE_FACTOR)
+            if len(scores) > candidates:
+                top = np.argpartition(-scores, candidates - 1)[:candidates]
+            else:
+                top = np.arange(len(scores))
+
+            # Rescore the shortlist against the full-precision vectors
+            rows = [(int(cells[i]), int(positions[i])) for i in top]
+            exact = np.stack([self._lists[cell].vectors[position] for cell, position in rows]) @ query
+            order = np.argsort(-exact)[:k]
+            return [
+                (self._key(int(self._lists[rows[i][0]].ids[rows[i][1]])), float(exact[i]))
+                for i in order
+            ]
+
+    def save(self, index_dir: str):
+        """Persist the index to ``index_dir`` as a vector store file, atomically"""
+        with self._lock:
+            if not len(self):
+                dtype = QUANTIZATION_DTYPES[self.quantization]
+                codes = np.empty((0, self.dim or 0), dtype=dtype)
+                scales, ids = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+                vectors = np.empty((0, self.dim or 0), dtype=np.float32)
+            else:
+                codes, scales, vectors, ids = self._all_entries()
+            key_offsets, key_data = StringColumn.encode([self._key(internal_id) for internal_id in ids.tolist()])
+            columns = {
+                "codes": codes,
+                "scales": scales,
+                "vectors": vectors,
+                "key_offsets": key_offsets,
+                "key_data": key_data,
+                "list_offsets": np.cumsum([0] + [cell.size for cell in self._lists]).astype(np.int64),
+            }
+            if self._centroids is not None:
+                columns["centroids"] = self._centroids
+            header = {
+                "version": VECTOR_INDEX_FORMAT_VERSION,
+                "dim": self.dim,
+                "count": len(self),
+                "nlist": len(self._lists),
+                "quantization": self.quantization,
+                "trained_size": self._trained_size,
+                "saved_at": time.time(),
+            }
+            os.makedirs(index_dir, exist_ok=True)
+            write_store(os.path.join(index_dir, STORE_FILE), columns, header)
+        # Files of the previous npz format are superseded
+        for name in ("vectors.npz", "meta.json"):
+            path = os.path.join(index_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    @classmethod
+    def load(
+        cls,
+        index_dir: str,
+        nprobe: int = DEFAULT_NPROBE,
+        quantization: str = DEFAULT_QUANTIZATION
+    ) -> "IVFIndex":
+        """Open an index saved with ``save``, or return an empty one if there is none.
+
+        The store file is memory-mapped rather than read, so loading takes
+        the same time at any size; only the key maps are built, on the
+        first change. A store quantized differently from ``quantization``
+        is re-quantized in memory.
+        """
+        index = cls(nprobe=nprobe, quantization=quantization)
+        store_path = os.path.join(index_dir, STORE_FILE)
+        if not os.path.exists(store_path):
+            if os.path.exists(os.path.join(index_dir, "meta.json")):
+                return cls._load_npz(index_dir, nprobe, quantization)
+            return index
+        try:
+            header, columns = open_store(store_path)
+            if header.get("version") != VECTOR_INDEX_FORMAT_VERSION:
+                print(f"Ignoring vector index at {index_dir}: unsupported version {header.get('version')}")
+                return index
+            codes, scales, vectors = columns["codes"], columns["scales"], columns["vectors"]
+            offsets = columns["list_offsets"]
+            keys = StringColumn(columns["key_offsets"], columns["key_data"])
+            centroids = columns.get("centroids")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading vector index from {index_dir}: {e}")
+            return index
+
+        index.dim = header["dim"]
+        index._centroids = None if centroids is None else np.array(centroids)
+        index._trained_size = header.get("trained_size", 0)
+        index._ids = None
+        index._stored_keys = keys
+        index._next_id = len(keys)
+        for cell_index in range(len(offsets) - 1):
+            start, end = int(offsets[cell_index]), int(offsets[cell_index + 1])
+            cell = _InvertedList.mapped(
+                codes[start:end], scales[start:end], vectors[start:end], np.arange(start, end, dtype=np.int64)
+            )
+            if header.get("quantization") != quantization:
+                cell.requantize(quantization)
+            index._lists.append(cell)
+        print(f"Loaded vector index with {len(index)} vectors in {index.nlist} lists from {index_dir}")
+        return index
+
+    @classmethod
+    def _load_npz(cls, index_dir: str, nprobe: int, quantization: str) -> "IVFIndex":
+        """Load an index saved in the version 1 npz format; the next save converts it"""
+        index = cls(nprobe=nprobe, quantization=quantization)
+        try:
+            with open(os.path.join(index_dir, "meta.json"), "r") as f:
+                meta = json.load(f)
+            with np.load(os.path.join(index_dir, "vectors.npz")) as data:
+                vectors = data["vectors"]
+                centroids = data["centroids"] if "centroids" in data else None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading vector index from {index_dir}: {e}")
+            return index
+
+        # Keep the trained clustering so adding the vectors back reassigns them to the same lists
+        if centroids is not None:
+            index.dim = meta["dim"]
+            index._centroids = centroids
+            index._lists = [_InvertedList(index.dim, quantization) for _ in range(len(centroids))]
+        index._trained_size = meta.get("trained_size", 0)
+        index.add(meta["keys"], vectors)
+        print(f"Loaded vector index with {len(index)} vectors in {index.nlist} lists from {index_dir} (npz format)")
+        return index
@@ -0,0 +1,132 @@
+import json
+import os
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STORE_MAGIC = b"VECSTORE"
+# Every column starts on a cache-line boundary so its memory map can be viewed as any dtype
+COLUMN_ALIGNMENT = 64
+QUANTIZATION_DTYPES = {"int8": np.int8, "float16": np.float16}
+INT8_MAX = 127
+
+
+def quantize(vectors: np.ndarray, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Scalar-quantize rows to ``kind``, returning ``(codes, scales)`` with ``codes * scales ~= vectors``.
+
+    int8 uses one symmetric scale per row (its largest magnitude maps to
+    127); float16 needs no scale, so its scales are all 1.
+    """
+    if kind not in QUANTIZATION_DTYPES:
+        raise ValueError(f"Unsupported quantization '{kind}', expected one of {sorted(QUANTIZATION_DTYPES)}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if kind == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / INT8_MAX if vectors.size else np.empty(0, dtype=np.float32)
+    scales = scales.astype(np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+class StringColumn:
+    """Strings stored as one UTF-8 blob plus ``len + 1`` offsets, decoded on access"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    @staticmethod
+    def encode(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """``(offsets, data)`` arrays for ``strings``"""
+        encoded = [value.encode("utf-8") for value in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[int(self.offsets[index]):int(self.offsets[index + 1])].tobytes().decode("utf-8")
+
+    def find(self, value: str) -> Optional[int]:
+        """Index of ``value`` in a column encoded from sorted strings, by binary search"""
+        target = value.encode("utf-8")
+        data, offsets = self.data, self.offsets
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if data[int(offsets[middle]):int(offsets[middle + 1])].tobytes() < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and data[int(offsets[low]):int(offsets[low + 1])].tobytes() == target:
+            return low
+        return None
+
+    def to_list(self) -> List[str]:
+        blob = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(self))]
+
+
+def _aligned(position: int) -> int:
+    return -(-position // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+
+def write_store(path: str, columns: Dict[str, np.ndarray], header: Dict[str, Any]):
+    """Write named arrays as one columnar file, atomically.
+
+    Layout: the magic bytes, the header length (uint64), a JSON header
+    holding ``header`` plus each column's dtype, shape and offset, then the
+    columns themselves, raw and aligned. Offsets are relative to the first
+    column, which starts at the first aligned position after the header.
+    """
+    layout: Dict[str, Dict[str, Any]] = {}
+    position = 0
+    for name, array in columns.items():
+        position = _aligned(position)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += array.nbytes
+    header_bytes = json.dumps(dict(header, columns=layout)).encode("utf-8")
+    data_start = _aligned(len(STORE_MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(STORE_MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in columns.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + position)
+    os.replace(tmp_path, path)
+
+
+def open_store(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Map a file written by ``write_store``; returns its header and read-only column views.
+
+    Nothing but the header is read up front: columns are views into one
+    memory map, so opening costs the same at any size, pages are loaded
+    as they are touched, and processes opening the same file share them
+    through the OS page cache.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+            raise ValueError(f"{path} is not a vector store file")
+        (header_length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    data_start = _aligned(len(STORE_MAGIC) + 8 + header_length)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+
+    columns: Dict[str, np.ndarray] = {}
+    for name, spec in header.pop("columns").items():
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        end = start + dtype.itemsize * int(np.prod(spec["shape"], dtype=np.int64))
+        if end > len(buffer):
+            raise ValueError(f"{path} is truncated: column '{name}' ends past the end of the file")
+        columns[name] = buffer[start:end].view(dtype).reshape(spec["shape"])
+    return header, columns
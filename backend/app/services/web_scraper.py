@@ -1,238 +1,364 @@
 import asyncio
 import aiohttp
-import trafilatura
-import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse
-import re
+from contextlib import aclosing
+from typing import AsyncContextManager, AsyncIterator, List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+import os
 import time
-from dataclasses import dataclass
-from datetime import datetime
+import weakref
 
-@dataclass
-class ScrapedContent:
-    title: str
-    content: str
-    url: str
-    snippet: str
-    published_date: Optional[str] = None
-    breadcrumb: Optional[str] = None
+from .analysis import Analyzer, default_analyzer
+from .extraction import (
+    DEFAULT_EXTRACTOR,
+    ExtractionPool,
+    ScrapedContent,
+    extract_content,
+    extract_content_with_bs4,
+    extract_content_with_trafilatura,
+)
+from .host_health import ERROR, OK, OVERLOADED, HostHealthTracker, HostUnavailableError
+from .http_cache import HttpCache
+from .page_archive import PageArchive
+from .ranking import rank_documents
+from .robots import RobotsCache, RobotsRules
+from .sitemap import iter_sitemap
+from .urls import canonicalize_url
+
+DEFAULT_HTTP_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'http_cache')
+REQUEST_TIMEOUT_SECONDS = 30
+# Responses that mean "slow down" rather than "broken"
+OVERLOAD_STATUSES = (429, 503)
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'archive')
 
 class WebScraper:
     """Service for scraping and searching web content from public sources"""
     
-    def __init__(self):
-        self.session = None
-        self.user_agent = "Mozilla/5.0 (compatible; IntelliSearchBot/1.0)"
+    def __init__(
+        self,
+        limit: int = 10,
+        limit_per_host: int = 5,
+        http_cache: Optional[HttpCache] = None,
+        page_archive: Optional[PageArchive] = None
+    ):
+        # aiohttp sessions belong to the loop that created them, so keep one pooled session per loop
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.product_token = "IntelliSearchBot"
+        self.user_agent = f"Mozilla/5.0 (compatible; {self.product_token}/1.0)"
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.http_cache = http_cache
+        self.page_archive = page_archive
+        self.robots_cache = RobotsCache(self.product_token)
+        self.host_health = HostHealthTracker(max_limit=limit_per_host, max_timeout=REQUEST_TIMEOUT_SECONDS)
+        self.extraction_pool: Optional[ExtractionPool] = None
+        # Earliest monotonic time the next request to each host may start
+        self._next_request_at: Dict[str, float] = {}
         
     async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None or self.session.closed:
-            connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(
+        """Get or create the aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+            session = aiohttp.ClientSession(
                 connector=connector,
                 timeout=timeout,
                 headers={'User-Agent': self.user_agent}
             )
-        return self.session
+            self._sessions[loop] = session
+        return session
+    
+    async def close_session(self):
+        """Close the running event loop's session, leaving other loops' sessions alone"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session and not session.closed:
+            await session.close()
     
     async def close(self):
-        """Close the session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Close the session and release the caches and extraction pool"""
+        await self.close_session()
+        if self.http_cache:
+            self.http_cache.close()
+        if self.page_archive:
+            self.page_archive.close()
+        if self.extraction_pool:
+            self.extraction_pool.shutdown()
     
     def extract_content_with_trafilatura(self, html: str, url: str) -> Optional[ScrapedContent]:
         """Extract main content from HTML using trafilatura"""
-        try:
-            # Extract main text content
-            content = trafilatura.extract(html, include_comments=False, include_tables=True)
-            if not content:
-                return None
-            
-            # Extract title and other metadata
-            metadata = trafilatura.extract_metadata(html)
-            title = metadata.title if metadata and metadata.title else "Untitled"
-            
-            # Create snippet (first 200 characters)
-            snippet = content[:200] + "..." if len(content) > 200 else content
-            
-            # Clean up content
-            content = re.sub(r'\n\s*\n', '\n\n', content)  # Remove excessive newlines
-            
-            return ScrapedContent(
-                title=title,
-                content=content,
-                url=url,
-                snippet=snippet,
-                published_date=metadata.date if metadata else None
-            )
-        except Exception as e:
-            print(f"Error extracting content from {url}: {e}")
-            return None
+        return extract_content_with_trafilatura(html, url)
     
     def extract_content_with_bs4(self, html: str, url: str) -> Optional[ScrapedContent]:
         """Fallback content extraction using BeautifulSoup"""
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Try to find title
-            title_elem = soup.find('title')
-            title = title_elem.get_text().strip() if title_elem else "Untitled"
-            
-            # Try to find main content areas
-            content_selectors = [
-                'main', 'article', '.content', '.main-content', 
-                '.post-content', '.entry-content', '#content',
-                '.documentation', '.docs-content'
-            ]
-            
-            content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content = ' '.join([elem.get_text().strip() for elem in elements])
-                    break
-            
-            # If no specific content area found, get body text
-            if not content:
-                body = soup.find('body')
-                if body:
-                    content = body.get_text()
+        return extract_content_with_bs4(html, url)
+    
+    def start_extraction_pool(self, max_workers: int, max_queue_depth: Optional[int] = None):
+        """Move HTML extraction off the event loop into worker processes"""
+        if self.extraction_pool is None:
+            self.extraction_pool = ExtractionPool(max_workers=max_workers, max_queue_depth=max_queue_depth)
+    
+    async def extract(
+        self,
+        html: str,
+        url: str,
+        extractor: str = DEFAULT_EXTRACTOR,
+        with_links: bool = False
+    ) -> Optional[ScrapedContent]:
+        """Extract a page with the named extractor, in the process pool when one is running"""
+        if self.extraction_pool is not None:
+            return await self.extraction_pool.extract(html, url, extractor, with_links)
+        return extract_content(html, url, extractor, with_links)
+    
+    async def get_robots_rules(self, url: str) -> RobotsRules:
+        """Cached robots.txt rules for the host serving ``url``"""
+        session = await self._get_session()
+        return await self.robots_cache.get_rules(session, url)
+    
+    async def is_allowed_by_robots(self, url: str) -> bool:
+        """Whether the host's robots.txt lets us fetch ``url``"""
+        rules = await self.get_robots_rules(url)
+        return rules.is_allowed(url)
+    
+    async def fetch_html(self, url: str, crawl_delay: float = 0.0, respect_robots: bool = True) -> Optional[str]:
+        """Fetch a URL's HTML, revalidating against the HTTP cache when possible.
+        
+        With ``respect_robots`` the request is skipped when robots.txt
+        disallows it, and is spaced by the larger of ``crawl_delay`` and the
+        host's own Crawl-delay. Requests go through the host's adaptive
+        concurrency limit and circuit breaker (see ``HostHealthTracker``).
+        """
+        if respect_robots:
+            rules = await self.get_robots_rules(url)
+            if not rules.is_allowed(url):
+                print(f"Skipping {url}: disallowed by robots.txt")
+                return None
+            crawl_delay = max(crawl_delay, rules.crawl_delay or 0.0)
+        host = urlparse(url).netloc.lower()
+        
+        # Fails fast with HostUnavailableError while the host's circuit is open
+        async with self.host_health.slot(host):
+            await self._wait_for_host_slot(host, crawl_delay)
             
-            # Clean up content
-            content = re.sub(r'\s+', ' ', content).strip()
-            snippet = content[:200] + "..." if len(content) > 200 else content
+            # SQLite and zlib work runs on a thread so it never stalls other fetches
+            cached = await asyncio.to_thread(self.http_cache.get, url) if self.http_cache else None
+            headers = self.http_cache.conditional_headers(cached) if cached else {}
             
-            return ScrapedContent(
-                title=title,
-                content=content,
-                url=url,
-                snippet=snippet
+            session = await self._get_session()
+            timeout = aiohttp.ClientTimeout(total=self.host_health.request_timeout(host))
+            started = time.monotonic()
+            outcome = ERROR
+            revalidated = False
+            try:
+                async with session.get(url, headers=headers, timeout=timeout) as response:
+                    if response.status == 304 and cached:
+                        outcome = OK
+                        revalidated = True
+                        html = cached.body
+                        await asyncio.to_thread(self.http_cache.mark_revalidated, url)
+                    elif response.status != 200:
+                        if response.status in OVERLOAD_STATUSES:
+                            outcome = OVERLOADED
+                        elif response.status < 500:
+                            outcome = OK  # the host is answering; the page just isn't there
+                        print(f"Failed to fetch {url}: HTTP {response.status}")
+                        return None
+                    else:
+                        html = await response.text()
+                        outcome = OK
+            except asyncio.CancelledError:
+                # Our own cancellation says nothing about the host
+                outcome = None
+                raise
+            finally:
+                if outcome is not None:
+                    self.host_health.record(host, time.monotonic() - started, outcome)
+        
+        if self.http_cache and not revalidated:
+            await asyncio.to_thread(
+                self.http_cache.put,
+                url,
+                html,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
             )
-        except Exception as e:
-            print(f"Error extracting content with BS4 from {url}: {e}")
-            return None
+        # Raw pages are kept so extraction and indexing can be re-run without refetching. A 304 adds
+        # nothing new, unless the page was cached before the archive existed or was pruned from it
+        if self.page_archive and not (revalidated and await asyncio.to_thread(self.page_archive.lookup, url)):
+            await asyncio.to_thread(
+                self.page_archive.append, url, html, content_type=response.headers.get('Content-Type', 'text/html')
+            )
+        return html
     
-    async def fetch_and_extract(self, url: str) -> Optional[ScrapedContent]:
+    async def fetch_and_extract(
+        self,
+        url: str,
+        extractor: str = DEFAULT_EXTRACTOR,
+        with_links: bool = False,
+        crawl_delay: float = 0.0,
+        respect_robots: bool = True
+    ) -> Optional[ScrapedContent]:
         """Fetch a URL and extract its content"""
         try:
-            session = await self._get_session()
-            async with session.get(url) as response:
-                if response.status != 200:
-                    print(f"Failed to fetch {url}: HTTP {response.status}")
-                    return None
-                
-                html = await response.text()
-                
-                # Try trafilatura first
-                content = self.extract_content_with_trafilatura(html, url)
-                
-                # Fall back to BeautifulSoup if trafilatura fails
-                if not content or len(content.content) < 100:
-                    content = self.extract_content_with_bs4(html, url)
-                
-                return content
+            html = await self.fetch_html(url, crawl_delay, respect_robots)
+            if html is None:
+                return None
+            
+            # Off the event loop when the pool is running
+            return await self.extract(html, url, extractor, with_links)
                 
+        except HostUnavailableError as e:
+            print(f"Skipping {url}: {e}")
+            return None
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
     
-    def search_content(self, contents: List[ScrapedContent], query: str) -> List[Dict[str, Any]]:
-        """Search through scraped content for query matches"""
-        results = []
-        query_words = query.lower().split()
+    async def _wait_for_host_slot(self, host: str, crawl_delay: float):
+        """Space request starts to the same host at least ``crawl_delay`` seconds apart"""
+        if crawl_delay <= 0:
+            return
+        # Reserve the slot before sleeping so concurrent workers queue up behind each other
+        now = time.monotonic()
+        start_at = max(now, self._next_request_at.get(host, now))
+        self._next_request_at[host] = start_at + crawl_delay
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+    
+    async def fetch_many(
+        self,
+        urls: List[str],
+        crawl_delay: float = 0.0,
+        limiter: Optional[AsyncContextManager[Any]] = None,
+        extractor: str = DEFAULT_EXTRACTOR,
+        with_links: bool = False,
+        respect_robots: bool = True,
+        deadline: Optional[float] = None
+    ) -> List[Optional[ScrapedContent]]:
+        """Fetch and extract many URLs concurrently with a worker pool per host.
         
-        for content in contents:
-            if not content.content:
-                continue
-                
-            # Calculate relevance score
-            score = 0.0
-            title_lower = content.title.lower()
-            content_lower = content.content.lower()
-            
-            # Title matches (higher weight)
-            title_matches = sum(1 for word in query_words if word in title_lower)
-            score += title_matches * 2.0
-            
-            # Content matches
-            content_matches = sum(1 for word in query_words if word in content_lower)
-            score += content_matches * 0.5
-            
-            # Exact phrase match bonus
-            if query.lower() in title_lower:
-                score += 3.0
-            elif query.lower() in content_lower:
-                score += 1.0
-            
-            # Only include results with some relevance
-            if score > 0:
-                results.append({
-                    "title": content.title,
-                    "url": content.url,
-                    "snippet": content.snippet,
-                    "score": score,
-                    "published_date": content.published_date,
-                    "breadcrumb": content.breadcrumb
-                })
+        Each host gets at most ``limit_per_host`` workers, matching the
+        connector's per-host budget, and request starts to a host are spaced by
+        ``crawl_delay`` (or the host's robots.txt Crawl-delay, if larger). An
+        optional ``limiter`` bounds in-flight requests across all hosts.
+        Results are returned in the order of ``urls``; URLs disallowed by
+        robots.txt come back as None. At ``deadline`` (an event loop time)
+        unfinished fetches are cancelled and also come back as None.
+        """
+        results: List[Optional[ScrapedContent]] = [None] * len(urls)
+        
+        queues: Dict[str, asyncio.Queue] = {}
+        for position, url in enumerate(urls):
+            host = urlparse(url).netloc.lower()
+            queues.setdefault(host, asyncio.Queue()).put_nowait((position, url))
+        
+        async def worker(host: str, queue: asyncio.Queue):
+            while not queue.empty():
+                position, url = queue.get_nowait()
+                if limiter is None:
+                    results[position] = await self.fetch_and_extract(
+                        url, extractor, with_links, crawl_delay, respect_robots
+                    )
+                else:
+                    async with limiter:
+                        results[position] = await self.fetch_and_extract(
+                            url, extractor, with_links, crawl_delay, respect_robots
+                        )
         
-        # Sort by score (descending)
-        results.sort(key=lambda x: x["score"], reverse=True)
+        workers = [
+            worker(host, queue)
+            for host, queue in queues.items()
+            for _ in range(min(self.limit_per_host, queue.qsize()))
+        ]
+        if deadline is None:
+            await asyncio.gather(*workers)
+            return results
+        
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            # Workers fill in ``results`` as they go, so finished pages survive the cancellation
+            await asyncio.wait_for(asyncio.gather(*workers), max(0.0, remaining))
+        except asyncio.TimeoutError:
+            print(f"Deadline reached with {sum(r is None for r in results)} of {len(urls)} pages unfinished")
         return results
     
+    def search_content(
+        self,
+        contents: List[ScrapedContent],
+        query: str,
+        limit: Optional[int] = None,
+        analyzer: Analyzer = default_analyzer
+    ) -> List[Dict[str, Any]]:
+        """Rank scraped content against a query with BM25F over title and body"""
+        contents = [content for content in contents if content.content]
+        ranked = rank_documents(
+            [(content.title or "", content.content) for content in contents],
+            query,
+            limit if limit is not None else len(contents),
+            analyzer=analyzer
+        )
+        return [
+            {
+                "title": contents[position].title,
+                "url": contents[position].url,
+                "snippet": contents[position].snippet,
+                "score": score,
+                "published_date": contents[position].published_date,
+                "breadcrumb": contents[position].breadcrumb
+            }
+            for position, score in ranked
+        ]
+    
+    async def iter_sitemap_entries(self, sitemap_url: str) -> AsyncIterator[Tuple[str, Optional[float]]]:
+        """Stream (url, lastmod) pairs from a sitemap, following sitemap indexes"""
+        session = await self._get_session()
+        async with aclosing(iter_sitemap(session, sitemap_url)) as entries:
+            async for entry in entries:
+                yield entry
+    
     async def discover_urls_from_sitemap(self, sitemap_url: str, max_urls: int = 50) -> List[str]:
         """Discover URLs from sitemap"""
+        urls = []
         try:
-            session = await self._get_session()
-            async with session.get(sitemap_url) as response:
-                if response.status != 200:
-                    return []
-                
-                content = await response.text()
-                soup = BeautifulSoup(content, 'xml')
-                
-                urls = []
-                for loc in soup.find_all('loc'):
-                    url = loc.get_text().strip()
-                    if url and len(urls) < max_urls:
-                        urls.append(url)
-                
-                return urls
-                
+            async with aclosing(self.iter_sitemap_entries(sitemap_url)) as entries:
+                async for url, _ in entries:
+                    urls.append(url)
+                    if len(urls) >= max_urls:
+                        break
         except Exception as e:
             print(f"Error fetching sitemap {sitemap_url}: {e}")
-            return []
+        return urls
     
     def discover_urls_from_page(self, base_url: str, html: str, max_urls: int = 20) -> List[str]:
-        """Discover URLs from a page's links"""
+        """Discover same-site URLs from a page's links, deduplicated by canonical form"""
         try:
             soup = BeautifulSoup(html, 'html.parser')
-            urls = []
+            base_host = urlparse(base_url).hostname
+            urls = {}
             
             for link in soup.find_all('a', href=True):
-                href = link['href']
-                full_url = urljoin(base_url, href)
+                full_url = canonicalize_url(link['href'], base_url=base_url)
                 
                 # Basic filtering
-                if (full_url.startswith('http') and 
-                    len(urls) < max_urls and
-                    urlparse(full_url).netloc == urlparse(base_url).netloc):
-                    urls.append(full_url)
+                if full_url.startswith('http') and urlparse(full_url).hostname == base_host:
+                    urls.setdefault(full_url, None)
+                    if len(urls) >= max_urls:
+                        break
             
-            return list(set(urls))  # Remove duplicates
+            return list(urls)
             
         except Exception as e:
             print(f"Error discovering URLs from page: {e}")
             return []
 
 # Create a global instance
-web_scraper = WebScraper()
+web_scraper = WebScraper(
+    http_cache=HttpCache(os.path.normpath(DEFAULT_HTTP_CACHE_DIR)),
+    page_archive=PageArchive(os.path.normpath(DEFAULT_ARCHIVE_DIR))
+)
 
 # Cleanup function for graceful shutdown
 async def cleanup_scraper():
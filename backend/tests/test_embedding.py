@@ -0,0 +1,33 @@
+import pytest
+
+from app.services.embedding import BatchEmbedder, StubEmbeddingBackend
+from app.services.embedding_cache import EmbeddingCache
+
+
+class CountingBackend(StubEmbeddingBackend):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.calls = 0
+
+    def embed(self, text):
+        self.calls += 1
+        return super().embed(text)
+
+
+def test_query_embeddings_check_memory_then_disk_before_the_model(tmp_path):
+    backend = CountingBackend()
+    embedder = BatchEmbedder(backend, cache=EmbeddingCache(str(tmp_path)))
+    vector = embedder.embed_query("sap connector setup")
+    assert embedder.embed_query("sap connector setup") == vector
+    assert backend.calls == 1 and embedder.cache.hits == 0
+
+    # A new process starts with an empty LRU but shares the disk cache
+    restarted = BatchEmbedder(backend, cache=EmbeddingCache(str(tmp_path)))
+    # float16 on disk
+    assert restarted.embed_query("sap connector setup") == pytest.approx(vector, abs=1e-3)
+    assert backend.calls == 1 and restarted.cache.hits == 1
+
+    # Text embedded for a document is a cache hit for the same query
+    restarted.embed_many(["Approval routing for access requests."])
+    restarted.embed_query("Approval routing for access requests.")
+    assert backend.calls == 2
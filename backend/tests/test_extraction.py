@@ -0,0 +1,84 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.extraction import EXTRACTORS, ExtractionPool, extract_content
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'fixtures', 'extractor_corpus')
+
+
+def corpus():
+    pages = []
+    for filename in sorted(os.listdir(CORPUS_DIR)):
+        if filename.endswith('.html'):
+            with open(os.path.join(CORPUS_DIR, filename), encoding='utf-8') as f:
+                pages.append((f"https://example.com/{filename}", f.read()))
+    return pages
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Records how many extractions were submitted and not yet finished at once"""
+
+    def __init__(self, fail=False):
+        super().__init__(max_workers=8)
+        self.fail = fail
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        if self.fail:
+            raise BrokenProcessPool("worker died")
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _):
+        with self._lock:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_inline_extraction_for_every_extractor():
+    pool = ExtractionPool(max_workers=2)
+    try:
+        for extractor in EXTRACTORS:
+            for url, html in corpus():
+                expected = extract_content(html, url, extractor, with_links=True)
+                assert expected is not None
+                assert await pool.extract(html, url, extractor, with_links=True) == expected
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_submitted_extractions():
+    pool = ExtractionPool(max_workers=2, max_queue_depth=3)
+    pool._executor = executor = CountingExecutor()
+    try:
+        pages = corpus() * 10
+        results = await asyncio.gather(*(pool.extract(html, url, "lxml") for url, html in pages))
+    finally:
+        executor.shutdown()
+    assert results == [extract_content(html, url, "lxml") for url, html in pages]
+    assert 1 < executor.peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_replaced():
+    pool = ExtractionPool(max_workers=2)
+    pool._executor = CountingExecutor(fail=True)
+    url, html = corpus()[0]
+    assert await pool.extract(html, url) is None
+    assert pool._executor is None
+    try:
+        assert await pool.extract(html, url) == extract_content(html, url)
+    finally:
+        pool.shutdown()
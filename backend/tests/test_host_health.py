@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import host_health
+from app.services.host_health import (
+    CLOSED,
+    ERROR,
+    FAILURE_THRESHOLD,
+    HALF_OPEN,
+    OK,
+    OPEN,
+    OPEN_SECONDS,
+    OVERLOADED,
+    HostHealthTracker,
+    HostUnavailableError,
+)
+
+HOST = "docs.example.com"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(host_health.time, "monotonic", clock)
+    return clock
+
+
+def trip(tracker):
+    for _ in range(FAILURE_THRESHOLD):
+        tracker.record(HOST, 1.0, ERROR)
+
+
+def state(tracker):
+    return tracker.snapshot()[HOST]["state"]
+
+
+@pytest.mark.asyncio
+async def test_consecutive_failures_open_the_circuit(clock):
+    tracker = HostHealthTracker(max_limit=8)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        tracker.record(HOST, 1.0, ERROR)
+    assert state(tracker) == CLOSED
+    tracker.record(HOST, 1.0, ERROR)
+    assert state(tracker) == OPEN
+
+    with pytest.raises(HostUnavailableError):
+        async with tracker.slot(HOST):
+            pass
+
+
+def test_overload_halves_the_limit_without_opening(clock):
+    tracker = HostHealthTracker(max_limit=8)
+    for _ in range(FAILURE_THRESHOLD):
+        tracker.record(HOST, 0.1, OVERLOADED)
+    assert state(tracker) == CLOSED
+    assert tracker.snapshot()[HOST]["concurrency_limit"] == 1.0
+    tracker.record(HOST, 0.1, OK)
+    assert tracker.snapshot()[HOST]["concurrency_limit"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_successful_probe_closes_the_circuit(clock):
+    tracker = HostHealthTracker(max_limit=8)
+    trip(tracker)
+    clock.now += OPEN_SECONDS
+
+    entered = []
+
+    async def request(name):
+        async with tracker.slot(HOST):
+            entered.append(name)
+            await asyncio.sleep(0)
+
+    async with tracker.slot(HOST):
+        assert state(tracker) == HALF_OPEN
+        # Only the probe runs while half-open; the next request waits for its verdict
+        waiting = asyncio.create_task(request("queued"))
+        await asyncio.sleep(0)
+        assert entered == []
+        tracker.record(HOST, 0.1, OK)
+    await waiting
+    assert entered == ["queued"]
+    assert state(tracker) == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_for_longer(clock):
+    tracker = HostHealthTracker(max_limit=8)
+    trip(tracker)
+    clock.now += OPEN_SECONDS
+
+    async with tracker.slot(HOST):
+        waiting = asyncio.create_task(tracker.slot(HOST).__aenter__())
+        await asyncio.sleep(0)
+        tracker.record(HOST, 1.0, ERROR)
+    assert state(tracker) == OPEN
+    # Requests queued behind the probe fail fast instead of waiting for a slot
+    with pytest.raises(HostUnavailableError):
+        await waiting
+
+    clock.now += OPEN_SECONDS
+    with pytest.raises(HostUnavailableError):
+        async with tracker.slot(HOST):
+            pass
+    clock.now += OPEN_SECONDS
+    async with tracker.slot(HOST):
+        assert state(tracker) == HALF_OPEN
+
+
+def test_one_host_driven_from_two_loops():
+    """Requests from the server loop and the runtime loop share the host's slots"""
+    tracker = HostHealthTracker(max_limit=3)
+    current_limit = tracker._current_limit
+
+    def slow_current_limit(health):
+        # Give the other thread the GIL between checking a slot and taking it
+        time.sleep(0.0001)
+        return current_limit(health)
+
+    tracker._current_limit = slow_current_limit
+    active = []
+    peak = []
+    counter_lock = threading.Lock()
+
+    async def request(index):
+        async with tracker.slot(HOST):
+            with counter_lock:
+                active.append(index)
+                peak.append(len(active))
+            await asyncio.sleep(0)
+            with counter_lock:
+                active.remove(index)
+        tracker.record(HOST, 0.001, OK)
+
+    async def burst(offset):
+        await asyncio.gather(*(request(offset + i) for i in range(300)))
+
+    threads = [threading.Thread(target=asyncio.run, args=(burst(offset),)) for offset in (0, 1000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert not any(thread.is_alive() for thread in threads)
+
+    assert len(peak) == 600 and max(peak) <= 3
+    snapshot = tracker.snapshot()[HOST]
+    assert snapshot["in_flight"] == 0 and snapshot["state"] == CLOSED
+    assert not tracker._hosts[HOST].waiters
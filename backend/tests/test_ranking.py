@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from app.services.analysis import Analyzer
+from app.services.ranking import BM25F, BM25Index, idf, reciprocal_rank_fusion, top_k
+
+
+def random_corpus(rng, doc_count=2000, term_count=12):
+    norms = {doc: (rng.uniform(0.5, 4.0), rng.uniform(0.2, 2.0)) for doc in range(doc_count)}
+    terms = []
+    for _ in range(term_count):
+        # A mix of rare and very common terms, so MaxScore gets to prune
+        docs = rng.sample(range(doc_count), rng.choice([3, 20, 200, 1500]))
+        postings = {doc: [rng.choice([0, 0, 1, 2]), rng.randint(1, 9)] for doc in docs}
+        terms.append((idf(doc_count, len(postings)), postings))
+    return terms, norms
+
+
+def brute_force(scorer, terms, norms, k):
+    scores = {}
+    for term_idf, postings in terms:
+        scorer.accumulate(scores, term_idf, postings.items(), norms)
+    return top_k(scores, k)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("k", [1, 10, 50])
+def test_maxscore_matches_brute_force(seed, k):
+    rng = random.Random(seed)
+    terms, norms = random_corpus(rng)
+    query = rng.sample(terms, rng.randint(1, len(terms)))
+    scorer = BM25F()
+
+    expected = brute_force(scorer, query, norms, k)
+    actual = scorer.top_k(query, norms, k)
+    assert [doc for doc, _ in actual] == [doc for doc, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+
+
+def test_maxscore_respects_filtering_norms():
+    rng = random.Random(7)
+    terms, norms = random_corpus(rng)
+    subset = {doc: doc_norms for doc, doc_norms in norms.items() if doc % 3 == 0}
+    results = BM25F().top_k(terms, subset, 10)
+    assert results and all(doc % 3 == 0 for doc, _ in results)
+    expected = brute_force(BM25F(), terms, subset, 10)
+    assert [doc for doc, _ in results] == [doc for doc, _ in expected]
+
+
+def test_index_prefers_title_matches_and_forgets_removed_keys():
+    index = BM25Index()
+    index.add("body", "Release notes", "Configure the SAP connector before importing accounts.")
+    index.add("title", "SAP connector", "Steps for importing accounts.")
+    index.add("other", "Workflows", "Approval routing for access requests.")
+    assert [key for key, _ in index.search("sap connector", 10)] == ["title", "body"]
+
+    assert index.remove("title")
+    assert [key for key, _ in index.search("sap connector", 10)] == ["body"]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([(["a", "b", "c"], 1.0), (["c", "b", "d"], 1.0)], k=60)
+    # Appearing in both lists beats topping just one
+    assert [key for key, _ in fused] == ["c", "b", "a", "d"]
+    scores = dict(fused)
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 62)
+    assert scores["a"] == pytest.approx(1 / 61)
+
+
+def test_reciprocal_rank_fusion_weights_and_skips_zero_weight_lists():
+    fused = reciprocal_rank_fusion([(["a", "b"], 2.0), (["b", "a"], 1.0), (["z"], 0.0)])
+    assert [key for key, _ in fused] == ["a", "b"]
+
+
+def random_documents(rng, count):
+    words = "sap connector import schedule approval routing access request workflow audit".split()
+    return {
+        f"doc{i:04d}": (" ".join(rng.choices(words, k=rng.randint(0, 4))),
+                        " ".join(rng.choices(words, k=rng.randint(0, 40))))
+        for i in range(count)
+    }
+
+
+def assert_same_rankings(actual, expected, queries=("sap connector", "approval", "audit workflow access")):
+    for query in queries:
+        actual_results, expected_results = actual.search(query, 10), expected.search(query, 10)
+        assert [key for key, _ in actual_results] == [key for key, _ in expected_results]
+        assert [score for _, score in actual_results] == pytest.approx([score for _, score in expected_results])
+
+
+def test_saved_index_ranks_like_the_in_memory_one(tmp_path):
+    rng = random.Random(3)
+    path = str(tmp_path / "lexical.store")
+    expected = BM25Index()
+    index = BM25Index()
+    for key, (title, body) in random_documents(rng, 400).items():
+        expected.add(key, title, body)
+        index.add(key, title, body)
+    index.save(path, metadata={"generation": "g1"})
+
+    loaded = BM25Index.load(path)
+    assert loaded.metadata == {"generation": "g1"} and len(loaded) == 400
+    # Nothing is re-analyzed on load: every document is served from the file
+    assert not loaded._lengths
+    assert_same_rankings(loaded, expected)
+
+    # Changes after loading layer over the file and survive the next save
+    for key in list(random_documents(rng, 400))[::7]:
+        loaded.remove(key)
+        expected.remove(key)
+    for key, (title, body) in random_documents(random.Random(4), 420).items():
+        if key >= "doc0390":
+            loaded.add(key, title, body)
+            expected.add(key, title, body)
+    assert len(loaded) == len(expected)
+    assert_same_rankings(loaded, expected)
+    loaded.save(path)
+    assert_same_rankings(BM25Index.load(path), expected)
+
+
+def test_save_keeps_excluded_documents_in_memory_only(tmp_path):
+    path = str(tmp_path / "lexical.store")
+    index = BM25Index()
+    index.add("saved", "SAP connector", "Import schedule.")
+    index.add("staged", "SAP connector", "Draft import schedule.")
+    index.save(path, exclude={"staged"})
+    assert len(index) == 2 and {key for key, _ in index.search("connector", 10)} == {"saved", "staged"}
+    assert [key for key, _ in BM25Index.load(path).search("connector", 10)] == ["saved"]
+
+
+def test_load_rejects_an_index_built_with_another_analyzer(tmp_path):
+    path = str(tmp_path / "lexical.store")
+    index = BM25Index()
+    index.add("doc", "Connectors", "Importing accounts.")
+    index.save(path)
+    assert BM25Index.load(path, analyzer=Analyzer(stemming=False)) is None
+    assert BM25Index.load(str(tmp_path / "missing.store")) is None
@@ -0,0 +1,74 @@
+from app.services.robots import MAX_CRAWL_DELAY_SECONDS, parse_robots
+
+ROBOTS = """
+User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+
+User-agent: IntelliSearchBot
+User-agent: OtherBot
+Disallow: /search
+Allow: /search/help
+Disallow: /*.pdf$
+Crawl-delay: 5
+
+User-agent: Bot
+Disallow: /
+
+Sitemap: https://example.com/sitemap.xml
+"""
+
+
+def test_named_group_wins_over_wildcard():
+    rules = parse_robots(ROBOTS, "IntelliSearchBot")
+    assert rules.crawl_delay == 5
+    assert rules.is_allowed("https://example.com/private/page")
+    assert not rules.is_allowed("https://example.com/search?q=sso")
+
+
+def test_product_token_matches_case_insensitively():
+    assert parse_robots(ROBOTS, "intellisearchbot").crawl_delay == 5
+
+
+def test_partial_token_does_not_select_group():
+    # "Bot" is a different crawler, not a prefix match for ours
+    rules = parse_robots(ROBOTS, "SearchBot")
+    assert rules.crawl_delay == 2
+    assert rules.is_allowed("https://example.com/")
+    assert not rules.is_allowed("https://example.com/private/page")
+
+
+def test_longest_match_wins():
+    rules = parse_robots(ROBOTS, "IntelliSearchBot")
+    assert rules.is_allowed("https://example.com/search/help/faq")
+    assert not rules.is_allowed("https://example.com/searching")
+
+
+def test_allow_wins_ties():
+    rules = parse_robots("User-agent: *\nDisallow: /page\nAllow: /page\n", "IntelliSearchBot")
+    assert rules.is_allowed("https://example.com/page")
+
+
+def test_wildcard_and_end_anchor():
+    rules = parse_robots(ROBOTS, "IntelliSearchBot")
+    assert not rules.is_allowed("https://example.com/files/guide.pdf")
+    assert rules.is_allowed("https://example.com/files/guide.pdf.html")
+
+
+def test_empty_agent_is_ignored():
+    rules = parse_robots("User-agent:\nDisallow: /\n\nUser-agent: *\nDisallow: /tmp\n", "")
+    assert rules.is_allowed("https://example.com/docs")
+    assert not rules.is_allowed("https://example.com/tmp/x")
+
+
+def test_empty_disallow_allows_everything():
+    rules = parse_robots("User-agent: *\nDisallow:\n", "IntelliSearchBot")
+    assert rules.rules == []
+    assert rules.is_allowed("https://example.com/anything")
+
+
+def test_sitemaps_and_crawl_delay_cap():
+    text = "User-agent: *\nCrawl-delay: 3600\nSitemap: https://example.com/sitemap.xml\n"
+    rules = parse_robots(text, "IntelliSearchBot")
+    assert rules.crawl_delay == MAX_CRAWL_DELAY_SECONDS
+    assert rules.sitemaps == ["https://example.com/sitemap.xml"]
@@ -0,0 +1,276 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.models.schemas import Document, DocumentChunk
+from app.services.ranking import BM25Index
+from app.services.search import LEXICAL_STORE_FILE, SearchService
+
+from test_chunking import make_text
+
+
+class FakeEmbeddings:
+    """Bag-of-words vectors, counting how many texts were embedded"""
+
+    def __init__(self, fail_after=None):
+        self.embedded = 0
+        self.fail_after = fail_after
+
+    def _vector(self, text):
+        vector = np.zeros(64)
+        for word in text.lower().split():
+            vector[sum(map(ord, word)) % 64] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        if self.fail_after is not None and self.embedded + len(texts) > self.fail_after:
+            raise RuntimeError("throttled")
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def make_document(content, title="Access reviews"):
+    now = datetime(2024, 1, 1)
+    return Document(
+        doc_id="doc", source="docs", url="https://docs.example.com/doc", title=title,
+        content=content, created_at=now, updated_at=now
+    )
+
+
+def make_service(index_path, embeddings):
+    return SearchService(embeddings, index_path=str(index_path), chunk_size=500, chunk_overlap=80)
+
+
+def assert_consistent(service):
+    chunk_ids = set(service._documents["doc"]["chunk_ids"])
+    assert chunk_ids == set(service._chunks)
+    assert all(chunk_id in service.vector_index for chunk_id in chunk_ids)
+    assert len(service.vector_index) == len(chunk_ids)
+
+
+@pytest.mark.asyncio
+async def test_reindex_embeds_only_changed_chunks(tmp_path):
+    embeddings = FakeEmbeddings()
+    service = make_service(tmp_path, embeddings)
+    text = make_text()
+    count = await service.index_document(make_document(text))
+    assert embeddings.embedded == count
+
+    embeddings.embedded = 0
+    edit_at = text.index(". ", len(text) // 2) + 2
+    edited = text[:edit_at] + "A new sentence about certification campaigns. " + text[edit_at:]
+    await service.index_document(make_document(edited))
+    assert 0 < embeddings.embedded <= 3
+    assert_consistent(service)
+
+    assert any("certification campaigns" in chunk["content"] for chunk in service._chunks.values())
+    results = await service.search("certification campaigns", vector_weight=0)
+    assert results["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_reindex_keeps_previous_version(tmp_path):
+    embeddings = FakeEmbeddings()
+    service = make_service(tmp_path, embeddings)
+    await service.index_document(make_document(make_text(seed=0)))
+    previous = (dict(service._documents["doc"]), dict(service._chunks), len(service.vector_index))
+
+    # Fails part-way through embedding the new version, after some batches succeeded
+    embeddings.fail_after = embeddings.embedded + 40
+    with pytest.raises(RuntimeError):
+        await service.index_document(make_document(make_text(seed=1, sentences=800), title="Renamed"))
+
+    assert (dict(service._documents["doc"]), dict(service._chunks), len(service.vector_index)) == previous
+    assert_consistent(service)
+    results = await service.search("access reviews", vector_weight=0)
+    assert results["results"][0].title == "Access reviews"
+
+
+@pytest.mark.asyncio
+async def test_batches_are_hidden_until_the_version_is_swapped_in(tmp_path):
+    loop = asyncio.get_running_loop()
+    seen = []
+
+    class Watching(FakeEmbeddings):
+        def embed_documents(self, texts):
+            if self.embedded:
+                # Earlier batches are already indexed, but no search may return them yet
+                search = service.search("zebra", vector_weight=0)
+                seen.append((len(service._staged), asyncio.run_coroutine_threadsafe(search, loop).result()["total"]))
+            return super().embed_documents(texts)
+
+    service = make_service(tmp_path, Watching())
+    text = make_text().replace("access", "zebra")
+    await service.index_document(make_document(text))
+    assert seen and all(staged > 0 and total == 0 for staged, total in seen)
+    assert not service._staged
+    assert (await service.search("zebra", vector_weight=0))["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rollback_restores_overwritten_chunks(tmp_path):
+    embeddings = FakeEmbeddings()
+    service = make_service(tmp_path, embeddings)
+    document = make_document("")
+    original = [
+        DocumentChunk(chunk_id=f"doc-{i}", doc_id="doc", content=f"original text {i}",
+                      chunk_index=i, start_char=0, end_char=1)
+        for i in range(40)
+    ]
+    await service.index_document(document, chunks=original)
+    vector = service.vector_index.get("doc-0")
+
+    # Same ids, new text: the first batch overwrites chunks of the live version before the second fails
+    embeddings.fail_after = embeddings.embedded + 32
+    rewritten = [chunk.model_copy(update={"content": f"rewritten words {chunk.chunk_index}"}) for chunk in original]
+    with pytest.raises(RuntimeError):
+        await service.index_document(document, chunks=rewritten)
+
+    assert service._chunks["doc-0"]["content"] == "original text 0"
+    assert np.allclose(service.vector_index.get("doc-0"), vector)
+    assert not service._staged
+    assert_consistent(service)
+    assert (await service.search("rewritten", vector_weight=0))["total"] == 0
+    assert (await service.search("original", vector_weight=0))["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_index_reloads_from_disk(tmp_path):
+    service = make_service(tmp_path, FakeEmbeddings())
+    await service.index_document(make_document(make_text()))
+    service.save()
+
+    embeddings = FakeEmbeddings()
+    reloaded = make_service(tmp_path, embeddings)
+    assert_consistent(reloaded)
+    await reloaded.index_document(make_document(make_text()))
+    assert embeddings.embedded == 0
+
+
+@pytest.mark.asyncio
+async def test_reload_opens_stores_without_reanalyzing(tmp_path, monkeypatch):
+    service = make_service(tmp_path, FakeEmbeddings())
+    await service.index_document(make_document(make_text()))
+    await service.index_document(other_document("a", "Connector setup", "Configure the connector import schedule."))
+    service.save()
+    expected = await service.search("connector schedule", vector_weight=0)
+
+    def fail(*args):
+        raise AssertionError("lexical index was rebuilt")
+
+    monkeypatch.setattr(BM25Index, "add", fail)
+    reloaded = make_service(tmp_path, FakeEmbeddings())
+    assert not reloaded._chunks.changes and not reloaded._documents.changes
+    assert len(reloaded._chunks) == len(reloaded.vector_index) == len(service._chunks)
+    results = await reloaded.search("connector schedule", vector_weight=0)
+    assert [r.url for r in results["results"]] == [r.url for r in expected["results"]]
+
+
+@pytest.mark.asyncio
+async def test_changes_after_reload_are_saved(tmp_path):
+    service = make_service(tmp_path, FakeEmbeddings())
+    await service.index_document(make_document(make_text()))
+    await service.index_document(other_document("a", "Connector setup", "Configure the connector import schedule."))
+    service.save()
+
+    reloaded = make_service(tmp_path, FakeEmbeddings())
+    reloaded.remove_document("a")
+    await reloaded.index_document(make_document(make_text(seed=1), title="Certification campaigns"))
+    await reloaded.index_document(other_document("b", "Workflows", "Approval routing for access requests."))
+    reloaded.save()
+
+    final = make_service(tmp_path, FakeEmbeddings())
+    assert set(final._documents) == {"doc", "b"}
+    assert final._documents["doc"]["title"] == "Certification campaigns"
+    assert set(final._chunks) == set(final._documents["doc"]["chunk_ids"]) | set(final._documents["b"]["chunk_ids"])
+    results = await final.search("connector schedule", vector_weight=0)
+    assert "https://example.com/a" not in [r.url for r in results["results"]]
+    results = await final.search("approval routing", vector_weight=0)
+    assert results["results"][0].url == "https://example.com/b"
+
+
+@pytest.mark.asyncio
+async def test_stale_lexical_store_is_rebuilt(tmp_path):
+    service = make_service(tmp_path, FakeEmbeddings())
+    await service.index_document(other_document("a", "Connector setup", "Configure the connector import schedule."))
+    service.save()
+    # A lexical store from another save of the chunk store, as after a crash between the two writes
+    service.lexical_index.save(str(tmp_path / LEXICAL_STORE_FILE), metadata={"generation": "other"})
+
+    reloaded = make_service(tmp_path, FakeEmbeddings())
+    assert len(reloaded.lexical_index._lengths) == len(reloaded._chunks)
+    assert (await reloaded.search("connector", vector_weight=0))["total"] == 1
+
+
+def other_document(doc_id, title, content, source="forums", permissions=()):
+    now = datetime(2024, 1, 1)
+    return Document(
+        doc_id=doc_id, source=source, url=f"https://example.com/{doc_id}", title=title,
+        content=content, created_at=now, updated_at=now, permissions=list(permissions)
+    )
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_both_legs(tmp_path):
+    service = make_service(tmp_path, FakeEmbeddings())
+    await service.index_document(other_document("a", "Connector setup", "Configure the connector import schedule."))
+    await service.index_document(other_document("b", "Workflows", "Approval routing for access requests."))
+
+    lexical = await service.search("connector schedule", vector_weight=0)
+    vector = await service.search("connector schedule", lexical_weight=0)
+    hybrid = await service.search("connector schedule")
+    assert [r.url for r in lexical["results"]][:1] == ["https://example.com/a"]
+    assert [r.url for r in vector["results"]][:1] == ["https://example.com/a"]
+    assert hybrid["results"][0].url == "https://example.com/a"
+    # RRF scores: a chunk ranked first by both legs scores 2 / (60 + 1)
+    assert hybrid["results"][0].score == pytest.approx(2 / 61)
+
+
+@pytest.mark.asyncio
+async def test_filtered_search_fetches_deeper_for_top_k(tmp_path):
+    service = make_service(tmp_path, FakeEmbeddings())
+    for i in range(30):
+        await service.index_document(other_document(f"f{i}", "Connector setup", f"Connector schedule number {i}."))
+    await service.index_document(other_document(
+        "d", "Release notes", "Many unrelated words about approvals and routing. " * 5 + "Also a connector.",
+        source="docs"
+    ))
+    # The only docs match ranks below the first fetch depth
+    first_pass = service.lexical_index.search("connector", service.max_chunks_per_query)
+    assert "d" not in {service._chunks[chunk_id]["doc_id"] for chunk_id, _ in first_pass}
+    results = await service.search("connector", sources=["docs"], top_k=1, vector_weight=0)
+    assert [r.url for r in results["results"]] == ["https://example.com/d"]
+
+
+@pytest.mark.asyncio
+async def test_ingestion_job_indexes_loaded_documents_and_updates_stats(tmp_path):
+    service = make_service(tmp_path, FakeEmbeddings())
+    requested = []
+
+    async def load_documents(sources):
+        requested.append(sources)
+        yield other_document("a", "Connector setup", "Configure the connector import schedule.", source="docs")
+        yield other_document("b", "Workflows", "Approval routing for access requests.")
+
+    job_id = await service.trigger_ingestion(["docs", "forums"], load_documents)
+    await asyncio.gather(*service._ingestion_tasks)
+    job = service.get_ingestion_job(job_id)
+    assert requested == [["docs", "forums"]]
+    assert job.status == "completed" and job.documents_processed == 2 and not job.errors
+    # Saved at the end of the job
+    assert set(make_service(tmp_path, FakeEmbeddings())._documents) == {"a", "b"}
+
+    await service.search("connector")
+    stats = await service.get_stats()
+    assert stats["total_documents"] == 2
+    assert stats["sources"] == {
+        "docs": {"documents": 1, "last_update": "2024-01-01T00:00:00"},
+        "forums": {"documents": 1, "last_update": "2024-01-01T00:00:00"},
+    }
+    assert stats["last_ingestion"] == job.completed_at.isoformat()
+    assert stats["search_queries_today"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import public_sources
+from app.services.public_sources import PublicSourcesManager
+
+DEADLINE_MS = 100
+GRACE_SECONDS = 0.2
+
+
+def result(source_id, score):
+    return {"title": source_id, "url": f"https://{source_id}.example.com/", "snippet": "", "score": score}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """Four never-crawled sources, searched live by a stub that takes as long as each source's name says"""
+    config = {
+        "public_sources": [
+            {"id": source_id, "name": source_id, "search_enabled": True}
+            for source_id in ("fast", "partial", "late", "stuck")
+        ],
+        "search_config": {"index": {"path": str(tmp_path / "index"), "live_fallback": True}},
+    }
+    config_path = tmp_path / "public_sources.json"
+    config_path.write_text(json.dumps(config))
+    manager = PublicSourcesManager(str(config_path))
+    manager.cancelled = []
+    monkeypatch.setattr(public_sources, "DEADLINE_GRACE_SECONDS", GRACE_SECONDS)
+
+    async def live_search(source, query, deadline):
+        source_id = source["id"]
+        loop = asyncio.get_running_loop()
+        try:
+            if source_id == "partial":
+                # Fetches until the deadline, then scores what it has
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+                return [result(source_id, 2.0)], False
+            if source_id == "late":
+                # Still scoring shortly after the deadline, within the grace period
+                await asyncio.sleep(max(0.0, deadline - loop.time()) + GRACE_SECONDS / 4)
+                return [result(source_id, 1.0)], False
+            if source_id == "stuck":
+                await asyncio.sleep(3600)
+            return [result(source_id, 3.0)], True
+        except asyncio.CancelledError:
+            manager.cancelled.append(source_id)
+            raise
+
+    monkeypatch.setattr(manager, "_live_search_source", live_search)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_partial_results_and_cancels_stuck_sources(manager):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    search = await manager.search_with_deadline("connector", DEADLINE_MS)
+    elapsed = loop.time() - started
+
+    assert DEADLINE_MS / 1000 <= elapsed < DEADLINE_MS / 1000 + GRACE_SECONDS + 0.1
+    assert [r["source"] for r in search.results] == ["fast", "partial", "late"]
+    assert sorted(search.incomplete_sources) == ["late", "partial", "stuck"]
+    assert manager.cancelled == ["stuck"]
+
+
+@pytest.mark.asyncio
+async def test_search_events_arrive_in_completion_order(manager):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    events = []
+    async for event in manager.iter_search_events("connector", DEADLINE_MS):
+        events.append((event, loop.time() - started))
+
+    sources = [(event["source"], event["complete"]) for event, _ in events[:-1]]
+    assert sources == [("fast", True), ("partial", False), ("late", False)]
+    # Results are streamed as sources finish, not held back until the deadline
+    assert events[0][1] < DEADLINE_MS / 1000
+    final, _ = events[-1]
+    assert final["type"] == "final" and final["total_results"] == 3
+    assert final["incomplete_sources"] == ["partial", "late", "stuck"]
+    assert manager.cancelled == ["stuck"]
+
@@ -0,0 +1,69 @@
+import gzip
+
+from app.services.analysis import Analyzer
+from app.services.extraction import ScrapedContent
+from app.services.search_index import SearchIndex
+
+PAGES = [
+    ("docs", "https://docs.example.com/connectors", "Configuring connectors",
+     "Connectors link the identity platform to target applications such as Active Directory and SAP."),
+    ("docs", "https://docs.example.com/workflows", "Approval workflows",
+     "Workflows route access requests through managers and application owners for approval."),
+    ("forums", "https://forums.example.com/t/123", "Connector timeout errors",
+     "After the upgrade our REST connector keeps timing out while importing accounts overnight."),
+]
+
+
+def page(url, title, content):
+    return ScrapedContent(title=title, content=content, url=url, snippet=content[:80])
+
+
+def build_index(index_dir):
+    index = SearchIndex(str(index_dir))
+    for source_id, url, title, content in PAGES:
+        index.add_document(source_id, page(url, title, content))
+    index.mark_source_crawled("docs", 1000.0)
+    return index
+
+
+def test_reload_returns_same_results(tmp_path):
+    index = build_index(tmp_path)
+    before = index.search("connector timeout")
+    index.save()
+
+    reloaded = SearchIndex(str(tmp_path))
+    assert reloaded.document_count() == 3
+    assert reloaded.document_count("docs") == 2
+    assert reloaded.source_crawled_at("docs") == 1000.0
+    assert reloaded.search("connector timeout") == before
+    assert before[0]["url"] == "https://forums.example.com/t/123"
+
+
+def test_source_filter_survives_reload(tmp_path):
+    build_index(tmp_path).save()
+    results = SearchIndex(str(tmp_path)).search("connector", source_id="docs")
+    assert [result["url"] for result in results] == ["https://docs.example.com/connectors"]
+
+
+def test_removed_document_stays_removed(tmp_path):
+    index = build_index(tmp_path)
+    assert index.remove_document("https://docs.example.com/workflows")
+    index.save()
+
+    reloaded = SearchIndex(str(tmp_path))
+    assert reloaded.document_count() == 2
+    assert reloaded.search("approval workflows") == []
+
+
+def test_page_text_is_not_persisted(tmp_path):
+    build_index(tmp_path).save()
+    with gzip.open(tmp_path / "docs.json.gz", "rt", encoding="utf-8") as f:
+        docs = f.read()
+    assert "importing accounts overnight" not in docs
+
+
+def test_analyzer_change_drops_index(tmp_path):
+    build_index(tmp_path).save()
+    reloaded = SearchIndex(str(tmp_path), analyzer=Analyzer(stemming=False))
+    assert reloaded.document_count() == 0
+    assert not reloaded.has_source("docs")
@@ -0,0 +1,94 @@
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.main_simple import app
+from app.services.public_sources import public_sources_manager
+from app.services.search_stream import format_frame
+
+
+def result(source_id, score):
+    return {"title": source_id, "url": f"https://{source_id}.example.com/", "source": source_id, "score": score}
+
+
+async def search_events(query, deadline_ms=None, source_ids=None, max_results=20):
+    """Two sources finishing in turn, the second past the deadline, then the merged results"""
+    yield {"type": "source", "source": "fast", "source_name": "Fast", "complete": True,
+           "results": [result("fast", 3.0), result("fast", 1.0)]}
+    yield {"type": "source", "source": "slow", "source_name": "Slow", "complete": False,
+           "results": [result("slow", 2.0)]}
+    yield {"type": "final", "results": [result("fast", 3.0), result("slow", 2.0), result("fast", 1.0)],
+           "total_results": 3, "incomplete_sources": ["slow"]}
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(public_sources_manager, "iter_search_events", search_events)
+    # Requests go straight to the ASGI app; startup never runs, so nothing is crawled
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def parse_sse(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.split("\n"))
+        data = json.loads(fields["data"])
+        assert fields["event"] == data["type"]
+        events.append(data)
+    return events
+
+
+def parse_ndjson(body):
+    return [json.loads(line) for line in body.strip().split("\n")]
+
+
+@pytest.mark.parametrize("framing, media_type, parse", [
+    ("sse", "text/event-stream", parse_sse),
+    ("ndjson", "application/x-ndjson", parse_ndjson),
+])
+@pytest.mark.asyncio
+async def test_stream_sends_sources_then_final_summary(client, framing, media_type, parse):
+    response = await client.get("/search/stream", params={"q": "connector", "format": framing, "top_k": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(media_type)
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["x-accel-buffering"] == "no"
+
+    events = parse(response.text)
+    assert [event["type"] for event in events] == ["source", "source", "final"]
+    assert [(event["source"], event["complete"]) for event in events[:2]] == [("fast", True), ("slow", False)]
+    assert all(isinstance(event["elapsed_ms"], int) for event in events[:2])
+
+    final = events[-1]
+    assert final["query"] == "connector"
+    assert [r["score"] for r in final["results"]] == [3.0, 2.0]
+    assert final["total_results"] == 3
+    assert final["partial"] is True and final["incomplete_sources"] == ["slow"]
+    assert isinstance(final["execution_time_ms"], int)
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_failures_in_band(client, monkeypatch):
+    async def failing_events(query, deadline_ms=None, source_ids=None, max_results=20):
+        yield {"type": "source", "source": "fast", "source_name": "Fast", "complete": True, "results": []}
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(public_sources_manager, "iter_search_events", failing_events)
+    response = await client.get("/search/stream", params={"q": "connector", "format": "ndjson"})
+    assert response.status_code == 200
+    events = parse_ndjson(response.text)
+    assert [event["type"] for event in events] == ["source", "error"]
+    assert events[-1]["detail"] == "index unavailable"
+
+
+@pytest.mark.asyncio
+async def test_unknown_format_is_rejected(client):
+    assert (await client.get("/search/stream", params={"q": "connector", "format": "xml"})).status_code == 422
+
+
+def test_sse_frames_escape_newlines_in_data():
+    frame = format_frame({"type": "final", "results": [{"snippet": "line one\nline two"}]}, "sse")
+    assert frame.endswith("\n\n") and frame.count("\n") == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from app.services.urls import BloomFilter, ScalableBloomFilter, canonicalize_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Docs.Example.COM:443/Guide/", "https://docs.example.com/Guide"),
+    ("http://example.com:8080/", "http://example.com:8080/"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com/a/./b/../c#section", "https://example.com/a/c"),
+    ("https://example.com/%7euser/%2f", "https://example.com/~user/%2F"),
+    ("https://example.com./page", "https://example.com/page"),
+    ("https://user:pw@example.com/", "https://user:pw@example.com/"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_query_parameters_are_sorted_and_tracking_stripped():
+    url = "https://example.com/search?q=sso&utm_source=mail&a=2&gclid=x&UTM_Medium=y&a=1"
+    assert canonicalize_url(url) == "https://example.com/search?a=1&a=2&q=sso"
+
+
+def test_blank_query_values_are_kept():
+    assert canonicalize_url("https://example.com/?b=&a") == "https://example.com/?a=&b="
+
+
+def test_ipv6_hosts_keep_their_brackets():
+    assert canonicalize_url("http://[2001:DB8::1]:80/x") == "http://[2001:db8::1]/x"
+    assert canonicalize_url("https://[::1]:8443/") == "https://[::1]:8443/"
+
+
+def test_relative_urls_resolve_against_base():
+    assert canonicalize_url("../b?z=1", base_url="https://example.com/a/c/") == "https://example.com/a/b?z=1"
+
+
+def test_non_http_urls_are_returned_as_given():
+    assert canonicalize_url("mailto:Someone@Example.com") == "mailto:Someone@Example.com"
+
+
+def false_positive_rate(bloom, trials=20000):
+    return sum(f"unseen-{i}" in bloom for i in range(trials)) / trials
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(10000, 0.01)
+    for i in range(10000):
+        bloom.add(f"seen-{i}")
+    assert all(f"seen-{i}" in bloom for i in range(10000))
+    assert false_positive_rate(bloom) < 0.02
+
+
+def test_scalable_bloom_filter_grows_within_error_rate():
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    added = sum(bloom.add(f"seen-{i}") for i in range(20000))
+    # An unseen item can collide with one already added, so a few adds report a duplicate
+    assert added == len(bloom) > 20000 * 0.99
+    assert len(bloom._filters) > 1
+    assert not bloom.add("seen-123")
+    assert all(f"seen-{i}" in bloom for i in range(20000))
+    assert false_positive_rate(bloom) < 0.02
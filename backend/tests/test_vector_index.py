@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import MIN_TRAIN_SIZE, IVFIndex
+
+DIM = 32
+
+
+def clustered_vectors(count, seed=0, clusters=40):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    return (centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, DIM))).astype(np.float32)
+
+
+def exact_top_k(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+@pytest.fixture(scope="module")
+def data():
+    return clustered_vectors(3000), clustered_vectors(50, seed=1)
+
+
+@pytest.fixture(scope="module")
+def trained(data):
+    vectors, _ = data
+    index = IVFIndex(nprobe=8)
+    index.add([str(i) for i in range(len(vectors))], vectors)
+    return index
+
+
+def test_small_index_is_exact():
+    vectors = clustered_vectors(100)
+    index = IVFIndex()
+    index.add([str(i) for i in range(len(vectors))], vectors)
+    assert index.nlist == 1
+    results = index.search(vectors[5], k=5)
+    assert results[0][0] == "5"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert {int(key) for key, _ in results} == exact_top_k(vectors, vectors[5], 5)
+
+
+def test_index_trains_and_keeps_recall(data, trained):
+    vectors, queries = data
+    assert len(vectors) >= MIN_TRAIN_SIZE
+    assert trained.nlist > 1
+    recall = np.mean([
+        len({int(key) for key, _ in trained.search(query, k=10)} & exact_top_k(vectors, query, 10)) / 10
+        for query in queries
+    ])
+    assert recall >= 0.9
+
+
+def test_probing_every_list_is_exact(data, trained):
+    vectors, queries = data
+    for query in queries[:10]:
+        results = trained.search(query, k=10, nprobe=trained.nlist)
+        assert {int(key) for key, _ in results} == exact_top_k(vectors, query, 10)
+
+
+def test_add_replaces_and_delete_removes():
+    vectors = clustered_vectors(20)
+    index = IVFIndex()
+    index.add([str(i) for i in range(20)], vectors)
+    index.add(["3"], vectors[7:8])
+    assert len(index) == 20
+    assert {key for key, _ in index.search(vectors[7], k=2)} == {"3", "7"}
+
+    assert index.delete(["3", "7", "missing"]) == 2
+    assert len(index) == 18
+    assert "7" not in index
+    assert all(key not in ("3", "7") for key, _ in index.search(vectors[7], k=18))
+
+
+def test_dimension_mismatch_is_rejected():
+    index = IVFIndex()
+    index.add(["a"], clustered_vectors(1))
+    with pytest.raises(ValueError):
+        index.add(["b"], np.ones((1, DIM + 1), dtype=np.float32))
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_save_and_load_round_trip(tmp_path, data, quantization):
+    vectors, queries = data
+    index = IVFIndex(quantization=quantization)
+    index.add([f"doc-{i}" for i in range(len(vectors))], vectors)
+    index.save(str(tmp_path))
+
+    loaded = IVFIndex.load(str(tmp_path), quantization=quantization)
+    assert len(loaded) == len(vectors)
+    assert loaded.nlist == index.nlist
+    for query in queries[:10]:
+        assert loaded.search(query, k=10) == index.search(query, k=10)
+
+    # A loaded index accepts changes and saves them again
+    loaded.delete(["doc-0"])
+    loaded.add(["new"], vectors[:1])
+    loaded.save(str(tmp_path))
+    reloaded = IVFIndex.load(str(tmp_path), quantization=quantization)
+    assert "doc-0" not in reloaded
+    assert reloaded.search(vectors[0], k=1)[0][0] == "new"
+
+
+def test_load_without_store_is_empty(tmp_path):
+    index = IVFIndex.load(str(tmp_path))
+    assert len(index) == 0
+    assert index.search(clustered_vectors(1)[0]) == []
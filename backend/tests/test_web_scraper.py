@@ -0,0 +1,39 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.http_cache import HttpCache
+from app.services.page_archive import PageArchive
+from app.services.web_scraper import WebScraper
+
+PAGE = "<html><head><title>Connector setup</title></head><body><p>Configure the import.</p></body></html>"
+
+
+async def page(request):
+    if request.headers.get("If-None-Match") == '"v1"':
+        return web.Response(status=304, headers={"ETag": '"v1"'})
+    return web.Response(text=PAGE, content_type="text/html", headers={"ETag": '"v1"'})
+
+
+@pytest.mark.asyncio
+async def test_revalidated_page_is_archived_when_missing(tmp_path):
+    app = web.Application()
+    app.router.add_get("/page", page)
+    async with TestServer(app) as server:
+        url = str(server.make_url("/page"))
+        http_cache = HttpCache(str(tmp_path / "http"))
+        scraper = WebScraper(http_cache=http_cache)
+        assert await scraper.fetch_html(url, respect_robots=False) == PAGE
+        await scraper.close_session()
+
+        # The archive was enabled after the page was cached, so the next fetch is a 304
+        archive = PageArchive(str(tmp_path / "archive"))
+        scraper = WebScraper(http_cache=http_cache, page_archive=archive)
+        assert await scraper.fetch_html(url, respect_robots=False) == PAGE
+        assert http_cache.revalidations == 1
+        assert archive.get(url).html == PAGE
+
+        record = archive.lookup(url)
+        assert await scraper.fetch_html(url, respect_robots=False) == PAGE
+        assert archive.lookup(url) == record
+        await scraper.close()
@@ -5,6 +5,7 @@ Script to add new public sources to the enterprise search application.
 Usage:
     python add_public_source.py --url "https://example.com" --name "Example Docs" --category "documentation"
     python add_public_source.py --config-file new_source.json
+    python add_public_source.py search "api tokens" --sources saviynt_docs
 """
 
 import argparse
@@ -162,6 +163,12 @@ def main():
     remove_parser = subparsers.add_parser('remove', help='Remove a source')
     remove_parser.add_argument('source_id', help='ID of the source to remove')
     
+    # Search command, handy for checking a newly added source
+    search_parser = subparsers.add_parser('search', help='Search public sources')
+    search_parser.add_argument('query', help='Search query')
+    search_parser.add_argument('--sources', help='Comma-separated source IDs (default: all enabled)')
+    search_parser.add_argument('--max-results', type=int, default=10, help='Maximum results to show')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -245,6 +252,20 @@ def main():
         else:
             print(f"❌ Failed to remove source '{args.source_id}'")
             sys.exit(1)
+    
+    elif args.command == 'search':
+        source_ids = [s.strip() for s in args.sources.split(',')] if args.sources else None
+        results = manager.search_public_sources_sync(args.query, source_ids, args.max_results)
+        
+        if not results:
+            print(f"No results for '{args.query}'")
+            return
+        
+        print(f"Results for '{args.query}' ({len(results)}):")
+        print("-" * 60)
+        for result in results:
+            print(f"{result['source_icon']} {result['title']} ({result['score']:.2f})")
+            print(f"   {result['url']}")
 
 if __name__ == '__main__':
     main()
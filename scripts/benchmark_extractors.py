@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the content extractors on a corpus of HTML pages.
+
+Reports throughput (pages/s and MB/s) and output quality for each extractor.
+Quality is the token-level F1 score against ``<page>.expected.txt``, a
+hand-written reference of the page's main content. Pages without one are
+timed but not scored: scoring them against another extractor's output
+would favor that extractor.
+
+Usage:
+    python benchmark_extractors.py
+    python benchmark_extractors.py --corpus /path/to/html --iterations 20
+    python benchmark_extractors.py --extractors lxml,bs4
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Add the backend app to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.extraction import EXTRACTORS, extract_content
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'extractor_corpus')
+
+
+def load_corpus(corpus_dir: str) -> List[Tuple[str, str, Optional[str]]]:
+    """Load (name, html, expected text) triples from a directory of .html files"""
+    pages = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        if not filename.endswith(('.html', '.htm')):
+            continue
+        path = os.path.join(corpus_dir, filename)
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            html = f.read()
+
+        expected = None
+        expected_path = os.path.splitext(path)[0] + '.expected.txt'
+        if os.path.exists(expected_path):
+            with open(expected_path, 'r', encoding='utf-8') as f:
+                expected = f.read()
+
+        pages.append((filename, html, expected))
+    return pages
+
+
+def token_f1(candidate: str, reference: str) -> float:
+    """Bag-of-words F1 between extracted text and a reference text"""
+    candidate_tokens = Counter(re.findall(r'\w+', candidate.lower()))
+    reference_tokens = Counter(re.findall(r'\w+', reference.lower()))
+    if not candidate_tokens or not reference_tokens:
+        return 0.0
+
+    overlap = sum((candidate_tokens & reference_tokens).values())
+    if overlap == 0:
+        return 0.0
+    precision = overlap / sum(candidate_tokens.values())
+    recall = overlap / sum(reference_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def benchmark(pages: List[Tuple[str, str, Optional[str]]], extractor: str, iterations: int) -> Dict[str, float]:
+    """Time an extractor over the corpus and score its output"""
+    total_bytes = sum(len(html.encode('utf-8')) for _, html, _ in pages) * iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for name, html, _ in pages:
+            extract_content(html, name, extractor)
+    elapsed = time.perf_counter() - start
+
+    scores = []
+    failures = 0
+    for name, html, expected in pages:
+        result = extract_content(html, name, extractor)
+        if result is None:
+            failures += 1
+        if expected is not None:
+            scores.append(token_f1(result.content, expected) if result else 0.0)
+
+    pages_processed = len(pages) * iterations
+    return {
+        "pages_per_second": pages_processed / elapsed if elapsed else 0.0,
+        "mb_per_second": total_bytes / elapsed / (1024 * 1024) if elapsed else 0.0,
+        "ms_per_page": elapsed * 1000 / pages_processed if pages_processed else 0.0,
+        "mean_f1": sum(scores) / len(scores) if scores else None,
+        "min_f1": min(scores) if scores else None,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content extractors on an HTML corpus")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Directory of .html pages; only those with a .expected.txt are scored')
+    parser.add_argument('--iterations', type=int, default=10, help='Passes over the corpus per extractor')
+    parser.add_argument('--extractors', default=','.join(EXTRACTORS), help='Comma-separated extractors to compare')
+
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"No HTML pages found in {args.corpus}")
+        sys.exit(1)
+
+    extractors = [name.strip() for name in args.extractors.split(',') if name.strip()]
+    unknown = [name for name in extractors if name not in EXTRACTORS]
+    if unknown:
+        print(f"Unknown extractors: {', '.join(unknown)} (available: {', '.join(EXTRACTORS)})")
+        sys.exit(1)
+
+    labeled = sum(1 for _, _, expected in pages if expected is not None)
+    print(f"Corpus: {args.corpus} ({len(pages)} pages, {labeled} with expected text, {args.iterations} iterations)")
+    if labeled < len(pages):
+        print(f"Warning: F1 only covers the {labeled} pages with a .expected.txt file")
+    print("-" * 78)
+    print(f"{'extractor':<12} {'pages/s':>10} {'MB/s':>8} {'ms/page':>9} {'mean F1':>9} {'min F1':>8} {'failed':>7}")
+    print("-" * 78)
+
+    for extractor in extractors:
+        stats = benchmark(pages, extractor, args.iterations)
+        mean_f1 = f"{stats['mean_f1']:.3f}" if stats['mean_f1'] is not None else "n/a"
+        min_f1 = f"{stats['min_f1']:.3f}" if stats['min_f1'] is not None else "n/a"
+        print(
+            f"{extractor:<12} {stats['pages_per_second']:>10.1f} {stats['mb_per_second']:>8.2f} "
+            f"{stats['ms_per_page']:>9.2f} {mean_f1:>9} {min_f1:>8} {stats['failures']:>7}"
+        )
+
+
+if __name__ == '__main__':
+    main()
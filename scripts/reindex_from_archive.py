@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Rebuild the local search index from the raw page archive without refetching.
+
+Re-runs extraction on the latest archived copy of every page, in parallel
+across CPU cores. Pages are assigned to the configured source whose domains
+and patterns cover them, and each re-indexed source's documents are replaced
+wholesale; sources with no archived pages are left untouched. The index is
+rebuilt in a copy that is swapped into place at the end. Stop the backend
+first, or restart it afterwards, since a running server keeps its own
+in-memory copy of the index.
+
+Usage:
+    python reindex_from_archive.py
+    python reindex_from_archive.py --extractor lxml --workers 8
+    python reindex_from_archive.py --sources saviynt_docs,postman_docs
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+# Add the backend app to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.extraction import EXTRACTORS, ScrapedContent, extract_content
+from app.services.page_archive import ArchiveRecord, PageArchive, read_record
+from app.services.public_sources import PublicSourcesManager
+from app.services.search_index import SearchIndex
+from app.services.web_scraper import DEFAULT_ARCHIVE_DIR
+
+
+def extract_record(job: Tuple[str, ArchiveRecord, str, str]) -> Tuple[str, Optional[ScrapedContent]]:
+    """Read one archived page and extract it (runs in a worker process)"""
+    archive_dir, record, source_id, extractor = job
+    try:
+        page = read_record(archive_dir, record)
+        return source_id, extract_content(page.html, page.url, extractor)
+    except Exception as e:
+        print(f"Error re-extracting {record.url}: {e}")
+        return source_id, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the search index from the raw page archive")
+    parser.add_argument('--archive', default=os.path.normpath(DEFAULT_ARCHIVE_DIR), help='Page archive directory')
+    parser.add_argument('--index', help='Index directory to rebuild (defaults to the configured index path)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Extraction worker processes')
+    parser.add_argument('--extractor', help=f"Extractor for every page ({', '.join(EXTRACTORS)}); defaults to each source's")
+    parser.add_argument('--sources', help='Comma-separated source ids to include (default: all)')
+
+    args = parser.parse_args()
+
+    if args.extractor and args.extractor not in EXTRACTORS:
+        print(f"Unknown extractor '{args.extractor}' (available: {', '.join(EXTRACTORS)})")
+        sys.exit(1)
+
+    manager = PublicSourcesManager()
+    index_dir = args.index or manager.get_index_path()
+    only_sources = {s.strip() for s in args.sources.split(',')} if args.sources else None
+
+    archive = PageArchive(args.archive)
+    jobs = []
+    skipped = 0
+    for record in archive.iter_latest():
+        source = manager.get_source_for_url(record.url)
+        if source is None or (only_sources and source.get("id") not in only_sources):
+            skipped += 1
+            continue
+        extractor = args.extractor or manager.get_extractor(source)
+        jobs.append((args.archive, record, source.get("id"), extractor))
+    archive.close()
+
+    if not jobs:
+        print(f"No archived pages to re-index in {args.archive}")
+        sys.exit(1)
+    print(f"Re-indexing {len(jobs)} archived pages with {args.workers} workers ({skipped} outside any source)")
+
+    rebuild_dir = index_dir + '.rebuild'
+    shutil.rmtree(rebuild_dir, ignore_errors=True)
+    if os.path.exists(index_dir):
+        shutil.copytree(index_dir, rebuild_dir)
+    index = SearchIndex(rebuild_dir, manager.get_analyzer())
+    for source_id in {source_id for _, _, source_id, _ in jobs}:
+        index.remove_source(source_id)
+
+    start = time.perf_counter()
+    indexed = failed = duplicates = 0
+    sources = set()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # map keeps archive order, so the same page wins near-duplicate ties on every rebuild
+        for source_id, content in pool.map(extract_record, jobs, chunksize=16):
+            if content is None:
+                failed += 1
+                continue
+            sources.add(source_id)
+            if index.add_document(source_id, content) is None:
+                indexed += 1
+            else:
+                duplicates += 1
+    elapsed = time.perf_counter() - start
+
+    for source_id in sources:
+        if not index.has_source(source_id):
+            index.mark_source_crawled(source_id)
+    index.save()
+
+    # Swap the rebuilt index into place
+    previous_dir = index_dir + '.previous'
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(index_dir):
+        os.replace(index_dir, previous_dir)
+    os.replace(rebuild_dir, index_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+    print(
+        f"Indexed {indexed} pages ({duplicates} near-duplicates, {failed} failed) "
+        f"in {elapsed:.1f}s ({len(jobs) / elapsed if elapsed else 0:.1f} pages/s) into {index_dir}"
+    )
+
+
+if __name__ == '__main__':
+    main()